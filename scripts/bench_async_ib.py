@@ -0,0 +1,307 @@
+"""
+Threaded vs asyncio IB client benchmark.
+
+Streams ticks from a MockTWSServer (in a separate process, so its CPU is
+not counted) through IBKRBridge (EReader thread + EClient.run() thread +
+queued signals) and AsyncIBKRBridge (asyncio streams on the Qt event loop
+through qasync), one step per (mode, rate, GUI load) combination, and
+reports for each step:
+
+* latency percentiles
+    decode  - socket read -> IBKRClient.tickPrice()
+    deliver - socket read -> tick batch on the GUI thread
+    rtt     - reqCurrentTime() sent -> currentTime() handled on the GUI
+              thread, i.e. the full request/response path under load
+* GUI event-loop lag (1 ms timer)
+* CPU of the process, split into the GUI thread and the other threads
+* ticks sent by the mock and received by the bridge
+
+`--paint-ms` adds a busy repaint of that many milliseconds every 16 ms,
+to show how each path copes with a loaded GUI thread.
+
+Usage:
+    python scripts/bench_async_ib.py
+    python scripts/bench_async_ib.py --rates 1000,20000 --paint-ms 0,10 --out async.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing as mp
+import os
+import platform
+import sys
+import time
+from collections import deque
+
+# Add project root to python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import qasync
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication
+
+from bench_market_data import LoopLagProbe, git_revision, memory_mb, parse_list, percentiles
+from src.core.async_ibkr import AsyncIBKRBridge
+from src.core.ibkr_bridge import IBKRBridge
+from src.core.latency import tracker as latency
+from src.core.logger import setup_logging
+from src.core.mock_tws import MockTWSConfig, MockTWSServer
+
+FIRST_REQ_ID = 10_000
+MODES = {"threaded": IBKRBridge, "async": AsyncIBKRBridge}
+PROBE_INTERVAL_MS = 50
+PAINT_INTERVAL_MS = 16
+
+
+def run_mock(ports, commands, replies):
+    """Mock TWS server process: answers ("rate", ticks per line per second) with ticks sent so far."""
+    server = MockTWSServer(MockTWSConfig(port=0, ticks_per_second=0, positions=0, open_orders=0)).start()
+    ports.put(server.port)
+    try:
+        while True:
+            command = commands.get()
+            if command[0] == "stop":
+                break
+            server.set_tick_rate(command[1])
+            replies.put(server.stats["ticks_sent"])
+    finally:
+        server.stop()
+
+
+class RoundTripProbe(QObject):
+    """Times reqCurrentTime() -> currentTime() on the GUI thread, along the bridge's own signal path."""
+
+    _answered = Signal()
+
+    def __init__(self, bridge: IBKRBridge):
+        super().__init__()
+        self._bridge = bridge
+        self._sent = deque()
+        self.samples = []
+        self._answered.connect(self._on_answered, bridge.INTERNAL_CONNECTION)
+        self._timer = QTimer(self)
+        self._timer.setInterval(PROBE_INTERVAL_MS)
+        self._timer.timeout.connect(self._send)
+
+    def attach(self, client):
+        client.currentTime = lambda server_time: self._answered.emit()  # Called on the client's thread
+
+    def start(self):
+        self.samples = []
+        self._sent.clear()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _send(self):
+        self._sent.append(time.perf_counter())
+        self._bridge._client.reqCurrentTime()
+
+    def _on_answered(self):
+        if self._sent:
+            self.samples.append((time.perf_counter() - self._sent.popleft()) * 1e3)
+
+
+class PaintLoad:
+    """Busy-waits `ms` milliseconds every 16 ms on the GUI thread, like a heavy repaint."""
+
+    def __init__(self):
+        self.ms = 0.0
+        self._timer = QTimer()
+        self._timer.setInterval(PAINT_INTERVAL_MS)
+        self._timer.timeout.connect(self._paint)
+
+    def start(self, ms: float):
+        self.ms = ms
+        if ms > 0:
+            self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _paint(self):
+        end = time.perf_counter() + self.ms / 1e3
+        while time.perf_counter() < end:
+            pass
+
+
+class AsyncIBBench:
+    """Runs every step against one mock server process."""
+
+    def __init__(self, args):
+        self._args = args
+        context = mp.get_context("spawn")
+        self._commands = context.Queue()
+        self._replies = context.Queue()
+        ports = context.Queue()
+        self._server = context.Process(target=run_mock, args=(ports, self._commands, self._replies), daemon=True)
+        self._server.start()
+        self._port = ports.get(timeout=30)
+        self._lag = LoopLagProbe()
+        self._paint = PaintLoad()
+
+    def close(self):
+        self._commands.put(("stop",))
+        self._server.join(5)
+
+    def _set_rate(self, ticks_per_line: float) -> int:
+        self._commands.put(("rate", ticks_per_line))
+        return self._replies.get(timeout=10)
+
+    async def run(self) -> list:
+        results = []
+        latency.set_enabled(True)
+        for mode in self._args.modes:
+            bridge = MODES[mode](tick_interval_ms=self._args.tick_interval)
+            await self._connect(bridge)
+            probe = RoundTripProbe(bridge)
+            probe.attach(bridge._client)
+            for i in range(self._args.symbols):
+                bridge.subscribe_market_data(f"SYM{i}", FIRST_REQ_ID + i)
+            await asyncio.sleep(0.5)
+            try:
+                for paint_ms in self._args.paint_ms:
+                    for rate in self._args.rates:
+                        result = await self._run_step(mode, bridge, probe, rate, paint_ms)
+                        results.append(result)
+                        print_step(result)
+            finally:
+                bridge.disconnect_from_tws()
+                await asyncio.sleep(0.3)
+        latency.set_enabled(False)
+        return results
+
+    async def _connect(self, bridge: IBKRBridge):
+        bridge.connect_to_tws("127.0.0.1", self._port, client_id=1)
+        deadline = time.perf_counter() + 10
+        while not bridge.is_connected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        if not bridge.is_connected:
+            raise RuntimeError("Could not connect to the mock TWS server")
+
+    async def _run_step(self, mode: str, bridge: IBKRBridge, probe: RoundTripProbe, rate: float,
+                        paint_ms: float) -> dict:
+        args = self._args
+        await asyncio.sleep(0.1)
+        bridge._conflator.reset_stats()
+        latency.reset()
+        sent_before = self._set_rate(rate / args.symbols)
+        cpu_before, gui_cpu_before = time.process_time(), time.thread_time()
+        wall_start = time.perf_counter()
+        self._lag.start()
+        probe.start()
+        self._paint.start(paint_ms)
+
+        await asyncio.sleep(args.duration)
+        sent = self._set_rate(0) - sent_before
+        wall = time.perf_counter() - wall_start
+        self._paint.stop()
+        await asyncio.sleep(args.drain)  # Let the socket and queued batches drain
+
+        probe.stop()
+        self._lag.stop()
+        cpu = time.process_time() - cpu_before
+        gui_cpu = time.thread_time() - gui_cpu_before
+        stages = latency.snapshot()
+        received = bridge.conflation_stats["ticks_in"]
+        return {
+            "mode": mode,
+            "symbols": args.symbols,
+            "rate": rate,
+            "paint_ms": paint_ms,
+            "duration_s": round(wall, 3),
+            "ticks_sent": sent,
+            "ticks_received": received,
+            "not_received": sent - received,
+            "achieved_rate": round(received / wall, 1),
+            "latency_ms": {
+                "decode": {k: round(v, 4) for k, v in stages["decode"].items()},
+                "deliver": {k: round(v, 4) for k, v in stages["deliver"].items()},
+                "rtt": percentiles(probe.samples),
+            },
+            "loop_lag_ms": percentiles(self._lag.samples),
+            "cpu_percent": round(100.0 * cpu / wall, 1),
+            "gui_cpu_percent": round(100.0 * gui_cpu / wall, 1),
+            "memory_mb": memory_mb(),
+        }
+
+
+def print_step(result: dict):
+    latency_ms = result["latency_ms"]
+
+    def p(stage, key="p99"):
+        value = latency_ms[stage].get(key)
+        return f"{value:8.2f}" if value is not None else "       -"
+
+    print(
+        f"{result['mode']:>8} {result['rate']:>8.0f}/s paint {result['paint_ms']:>4.0f}ms | "
+        f"recv {result['achieved_rate']:>9.0f}/s behind {result['not_received']:>6} | "
+        f"decode p99 {p('decode')}  deliver p50 {p('deliver', 'p50')} p99 {p('deliver')}  "
+        f"rtt p50 {p('rtt', 'p50')} p99 {p('rtt')} | "
+        f"lag p99 {result['loop_lag_ms'].get('p99', 0):7.2f}  "
+        f"cpu {result['cpu_percent']:5.1f}% (gui {result['gui_cpu_percent']:5.1f}%)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", type=lambda text: text.split(","), default=list(MODES),
+                        help="Comma-separated client modes (default: threaded,async)")
+    parser.add_argument("--symbols", type=int, default=100, help="Market data lines")
+    parser.add_argument("--rates", type=parse_list, default=[1000, 10000, 30000],
+                        help="Comma-separated total tick rates per second (default: 1000,10000,30000)")
+    parser.add_argument("--paint-ms", type=parse_list, default=[0, 8],
+                        help="Comma-separated busy repaint times per 16 ms frame (default: 0,8)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per step")
+    parser.add_argument("--drain", type=float, default=0.5, help="Seconds to drain after each step")
+    parser.add_argument("--tick-interval", type=int, default=50, help="Bridge conflation interval (ms)")
+    parser.add_argument("--out", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+
+    setup_logging(level=logging.WARNING)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
+    print(
+        f"IB client benchmark: modes={','.join(args.modes)} symbols={args.symbols} "
+        f"tick_interval={args.tick_interval}ms duration={args.duration}s per step"
+    )
+    bench = AsyncIBBench(args)
+    try:
+        with loop:
+            steps = loop.run_until_complete(bench.run())
+    finally:
+        bench.close()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "symbols": args.symbols,
+            "tick_interval_ms": args.tick_interval,
+            "duration_s": args.duration,
+        },
+        "steps": steps,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
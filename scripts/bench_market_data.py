@@ -0,0 +1,498 @@
+"""
+Market data throughput/latency benchmark.
+
+Pushes synthetic tick floods through IBKRBridge -> DashboardInterface ->
+LiveChartWidget with Qt running offscreen, one step per (symbols, rate)
+combination, and reports for each step:
+
+* latency percentiles per stage
+    ingest   - IBKRClient.tickPrice() on the producer (reader) thread
+    deliver  - tick sent -> batch received on the GUI thread
+    dispatch - handling one ticks_received batch (bridge + dashboard slots)
+    render   - tick sent -> chart redraw that shows it
+    flush    - duration of one chart redraw
+* ticks coalesced by the conflator and chart updates merged into one frame
+* GUI event-loop lag (1 ms timer)
+* CPU and memory of the process
+
+The default source calls IBKRClient.tickPrice() directly from a producer
+thread, i.e. the exact path the TWS reader thread takes. `--source mock`
+streams through a MockTWSServer socket and the ibapi decoder instead; ticks
+cannot be stamped there, so only the duration stages are reported.
+
+Usage:
+    python scripts/bench_market_data.py
+    python scripts/bench_market_data.py --symbols 1,100,1000,5000 --rates 1000,10000,50000
+    python scripts/bench_market_data.py --out after.json --compare before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PySide6 import __version__ as pyside_version
+from PySide6.QtCore import QElapsedTimer, QEventLoop, QTimer, Qt
+from PySide6.QtWidgets import QApplication
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from src.core.bar_store import BarStore
+from src.core.history_scheduler import HistoryScheduler
+from src.core.ibkr_bridge import IBKRBridge, IBKRClient
+from src.core.logger import setup_logging
+from src.core.mock_tws import MockTWSConfig, MockTWSServer
+from src.gui.mainwindow import DashboardInterface, TradingMainWindow
+from src.gui.update_scheduler import UpdateScheduler
+
+FIRST_REQ_ID = 10_000       # Clear of the dashboard's own request IDs
+BASE_PRICE = 100.0
+PRICE_STEP = 1e-4           # Synthetic prices encode the tick's sequence number
+TICK_TYPES = (4, 1, 2)      # last, bid, ask
+
+# Metrics checked by --compare: (path, higher is better)
+COMPARED_METRICS = [
+    (("latency_ms", "deliver", "p50"), False),
+    (("latency_ms", "deliver", "p99"), False),
+    (("latency_ms", "dispatch", "p99"), False),
+    (("latency_ms", "render", "p99"), False),
+    (("latency_ms", "flush", "p99"), False),
+    (("loop_lag_ms", "p99"), False),
+    (("cpu_percent",), False),
+    (("achieved_rate",), True),
+]
+
+
+def percentiles(samples) -> dict:
+    """Summary of a latency sample in milliseconds."""
+    values = np.asarray(samples, dtype=np.float64)
+    if len(values) == 0:
+        return {"count": 0}
+    p50, p90, p99, p999 = np.percentile(values, [50, 90, 99, 99.9])
+    return {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(p50), 4),
+        "p90": round(float(p90), 4),
+        "p99": round(float(p99), 4),
+        "p999": round(float(p999), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def memory_mb() -> dict:
+    """Current and peak resident memory (None where unavailable)."""
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)  # Windows only
+        return {
+            "rss_mb": round(info.rss / 2**20, 1),
+            "peak_rss_mb": round(peak / 2**20, 1) if peak else None,
+        }
+    try:
+        import resource
+    except ImportError:
+        return {"rss_mb": None, "peak_rss_mb": None}
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak = peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes vs KiB
+    return {"rss_mb": None, "peak_rss_mb": round(peak, 1)}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+class TickProducer(threading.Thread):
+    """
+    Calls IBKRClient.tickPrice() at a fixed total rate, round-robin over
+    the symbols and last/bid/ask, like the TWS reader thread would.
+
+    Each price encodes the tick's sequence number so receivers can look up
+    when it was sent.
+    """
+
+    def __init__(self, client: IBKRClient, symbols: int, rate: float, duration: float):
+        super().__init__(daemon=True)
+        self._client = client
+        self._symbols = symbols
+        self._rate = rate
+        self._duration = duration
+        capacity = int(rate * duration) + 1
+        self.sent_at = np.zeros(capacity, dtype=np.float64)  # perf_counter() per sequence number
+        self.ingest_us = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        tick_price = self._client.tickPrice
+        clock = time.perf_counter
+        sent_at, ingest = self.sent_at, self.ingest_us
+        symbols, capacity = self._symbols, len(self.sent_at)
+        start = clock()
+        seq = 0
+        while not self._stopped.is_set() and seq < capacity:
+            due = min(capacity, int((clock() - start) * self._rate))
+            while seq < due:
+                req_id = FIRST_REQ_ID + seq % symbols
+                tick_type = TICK_TYPES[(seq // symbols) % 3]
+                t0 = clock()
+                tick_price(req_id, tick_type, BASE_PRICE + seq * PRICE_STEP, None)
+                t1 = clock()
+                sent_at[seq] = t0
+                ingest[seq] = (t1 - t0) * 1e6
+                seq += 1
+            self.count = seq
+            time.sleep(0.001)
+        self.count = seq
+
+
+class LoopLagProbe:
+    """Measures how late a 1 ms precise timer fires on the GUI thread."""
+
+    def __init__(self, parent=None):
+        self._timer = QTimer(parent)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(1)
+        self._timer.timeout.connect(self._on_timeout)
+        self._clock = QElapsedTimer()
+        self.samples = []
+
+    def start(self):
+        self.samples = []
+        self._clock.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _on_timeout(self):
+        elapsed_ms = self._clock.nsecsElapsed() / 1e6
+        self._clock.restart()
+        self.samples.append(max(0.0, elapsed_ms - 1.0))
+
+
+class MarketDataBench:
+    """Offscreen dashboard wired to an IBKRBridge, plus the stage probes."""
+
+    def __init__(self, app: QApplication, args):
+        self._app = app
+        self._args = args
+        self._bridge = IBKRBridge(tick_interval_ms=args.tick_interval)
+        self._scheduler = UpdateScheduler(args.fps)
+        self._store_dir = tempfile.TemporaryDirectory(prefix="qs_bench_")
+        history = HistoryScheduler(self._bridge, store=BarStore(self._store_dir.name))
+        self._dashboard = DashboardInterface(self._bridge, scheduler=self._scheduler, history=history)
+        self._dashboard.resize(1280, 800)
+        self._dashboard.show()
+        self._chart = self._dashboard._chart_widget
+        self._chart.set_update_scheduler(self._scheduler)
+        # The chart plots every symbol's last price, so redraw load grows with the flood
+        self._bridge.price_received.connect(lambda req_id, price: self._chart.update_price(price))
+        self._lag = LoopLagProbe()
+        self._server = None
+
+        # Stage probes. Slots run in connection order, so the second
+        # ticks_flushed slot runs after the bridge (and everything it emits).
+        conflator = self._bridge._conflator
+        conflator.ticks_flushed.connect(self._on_batch_start)
+        conflator.ticks_flushed.connect(self._on_batch_end)
+        chart_flush = self._chart._flush_updates
+
+        def timed_flush():
+            t0 = time.perf_counter()
+            chart_flush()
+            t1 = time.perf_counter()
+            self._flush_ms.append((t1 - t0) * 1e3)
+            if self._producer is not None:
+                self._render_ms.append(self._age_ms(self._chart._last_price, t1))
+
+        self._chart._flush_updates = timed_flush
+        self._producer = None
+        self._reset_samples()
+
+    def _reset_samples(self):
+        self._deliver_ms = []
+        self._dispatch_ms = []
+        self._render_ms = []
+        self._flush_ms = []
+        self._batch_start = 0.0
+
+    def _age_ms(self, price: float, now: float) -> float:
+        seq = int(round((price - BASE_PRICE) / PRICE_STEP))
+        sent_at = self._producer.sent_at
+        if 0 <= seq < len(sent_at) and sent_at[seq] > 0:
+            return (now - sent_at[seq]) * 1e3
+        return float("nan")
+
+    def _on_batch_start(self, batch):
+        self._batch_start = now = time.perf_counter()
+        if self._producer is None:
+            return
+        sent_at = self._producer.sent_at
+        prices = np.fromiter(
+            (
+                price for tick in batch.values()
+                for price in (tick.bid, tick.ask, tick.last) if price is not None
+            ),
+            dtype=np.float64,
+        )
+        seqs = np.rint((prices - BASE_PRICE) / PRICE_STEP).astype(np.int64)
+        seqs = seqs[(seqs >= 0) & (seqs < len(sent_at))]
+        self._deliver_ms.extend(((now - sent_at[seqs]) * 1e3).tolist())
+
+    def _on_batch_end(self, batch):
+        self._dispatch_ms.append((time.perf_counter() - self._batch_start) * 1e3)
+
+    def _pump(self, seconds: float):
+        """Run the Qt event loop for a while."""
+        loop = QEventLoop()
+        QTimer.singleShot(int(seconds * 1000), loop.quit)
+        loop.exec()
+
+    def run(self) -> list:
+        results = []
+        if self._args.source == "mock":
+            self._start_mock()
+        try:
+            for symbols in self._args.symbols:
+                for rate in self._args.rates:
+                    result = self._run_step(symbols, rate)
+                    results.append(result)
+                    print_step(result)
+        finally:
+            if self._server is not None:
+                self._bridge.disconnect_from_tws()
+                self._server.stop()
+            self._store_dir.cleanup()
+        return results
+
+    def _start_mock(self):
+        self._server = MockTWSServer(MockTWSConfig(port=0, ticks_per_second=0, positions=0, open_orders=0)).start()
+        self._bridge.connect_to_tws("127.0.0.1", self._server.port, client_id=1)
+        deadline = time.perf_counter() + 10
+        while not self._bridge.is_connected and time.perf_counter() < deadline:
+            self._pump(0.05)
+        if not self._bridge.is_connected:
+            raise RuntimeError("Could not connect to the mock TWS server")
+
+    def _run_step(self, symbols: int, rate: float) -> dict:
+        args = self._args
+        client = None
+        if args.source == "mock":
+            for i in range(symbols):
+                self._bridge.subscribe_market_data(f"SYM{i}", FIRST_REQ_ID + i)
+            self._pump(0.5)
+            server_ticks = self._server.stats["ticks_sent"]
+        else:
+            client = IBKRClient(self._bridge)
+        self._pump(0.1)
+
+        self._bridge._conflator.reset_stats()
+        self._reset_samples()
+        scheduler_before = self._scheduler.stats
+        memory_before = memory_mb()
+        cpu_before = time.process_time()
+        wall_start = time.perf_counter()
+        self._lag.start()
+
+        if client is not None:
+            self._producer = TickProducer(client, symbols, rate, args.duration)
+            self._producer.start()
+        else:
+            self._server.set_tick_rate(rate / symbols)
+        self._pump(args.duration)
+        if client is not None:
+            self._producer.stop()
+            self._producer.join()
+        else:
+            self._server.set_tick_rate(0)
+        wall = time.perf_counter() - wall_start
+        self._pump(args.drain)  # Let queued batches and frames finish
+
+        self._lag.stop()
+        cpu = time.process_time() - cpu_before
+        conflation = self._bridge.conflation_stats
+        scheduler = {k: v - scheduler_before[k] for k, v in self._scheduler.stats.items() if k != "pending"}
+        if client is not None:
+            sent = self._producer.count
+            ingest = self._producer.ingest_us[:sent] / 1e3
+            self._producer = None
+        else:
+            sent = self._server.stats["ticks_sent"] - server_ticks
+            ingest = []
+            for i in range(symbols):
+                self._bridge.unsubscribe_market_data(FIRST_REQ_ID + i)
+            self._pump(0.2)
+
+        return {
+            "source": args.source,
+            "symbols": symbols,
+            "rate": rate,
+            "duration_s": round(wall, 3),
+            "ticks_sent": sent,
+            "achieved_rate": round(sent / wall, 1),
+            "ticks_in": conflation["ticks_in"],
+            "ticks_delivered": conflation["ticks_out"],
+            "coalesced": conflation["coalesced"],
+            "coalesced_ratio": round(conflation["coalesced"] / max(1, conflation["ticks_in"]), 4),
+            "not_delivered": sent - conflation["ticks_in"] + conflation["pending"],
+            "batches": conflation["batches"],
+            "chart_updates": scheduler["marks"],
+            "chart_frames": scheduler["frames"],
+            "latency_ms": {
+                "ingest": percentiles(ingest),
+                "deliver": percentiles(self._deliver_ms),
+                "dispatch": percentiles(self._dispatch_ms),
+                "render": percentiles(self._render_ms),
+                "flush": percentiles(self._flush_ms),
+            },
+            "loop_lag_ms": percentiles(self._lag.samples),
+            "cpu_percent": round(100.0 * cpu / wall, 1),
+            "memory_mb": memory_mb(),
+            "memory_before_mb": memory_before,
+        }
+
+
+def print_step(result: dict):
+    latency = result["latency_ms"]
+
+    def p(stage, key="p99"):
+        value = latency[stage].get(key)
+        return f"{value:8.2f}" if value is not None else "       -"
+
+    print(
+        f"{result['symbols']:>5} sym {result['rate']:>8.0f}/s | "
+        f"sent {result['achieved_rate']:>9.0f}/s  coalesced {result['coalesced_ratio']:6.1%} | "
+        f"deliver p50 {p('deliver', 'p50')} p99 {p('deliver')}  "
+        f"render p99 {p('render')}  dispatch p99 {p('dispatch')} | "
+        f"lag p99 {result['loop_lag_ms'].get('p99', 0):7.2f}  cpu {result['cpu_percent']:5.1f}%"
+    )
+
+
+def _metric(step: dict, path):
+    value = step
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """
+    Print metric changes against a baseline run.
+
+    Returns:
+        Number of metrics that regressed by more than `threshold` (fraction)
+    """
+    def key(step):
+        return (step["source"], step["symbols"], step["rate"])
+
+    previous = {key(step): step for step in baseline["steps"]}
+    regressions = 0
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'} ({baseline.get('created', '?')}):")
+    for step in current["steps"]:
+        old = previous.get(key(step))
+        if old is None:
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            before, after = _metric(old, path), _metric(step, path)
+            if before is None or after is None or before == 0:
+                continue
+            change = (after - before) / abs(before)
+            worse = change < -threshold if higher_is_better else change > threshold
+            regressions += worse
+            print(
+                f"  {'REGRESSION' if worse else '          '} {step['symbols']:>5} sym "
+                f"{step['rate']:>8.0f}/s  {'.'.join(path):<24} {before:10.3f} -> {after:10.3f} ({change:+.1%})"
+            )
+    return regressions
+
+
+def parse_list(text: str):
+    return [float(part) if "." in part else int(part) for part in text.split(",") if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbols", type=parse_list, default=[1, 100, 1000, 5000],
+                        help="Comma-separated symbol counts (default: 1,100,1000,5000)")
+    parser.add_argument("--rates", type=parse_list, default=[1000, 10000, 50000],
+                        help="Comma-separated total tick rates per second (default: 1000,10000,50000)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per step")
+    parser.add_argument("--drain", type=float, default=0.5, help="Seconds to drain after each step")
+    parser.add_argument("--source", choices=["direct", "mock"], default="direct",
+                        help="Call IBKRClient.tickPrice directly, or stream through a MockTWSServer socket")
+    parser.add_argument("--tick-interval", type=int, default=50, help="Bridge conflation interval (ms)")
+    parser.add_argument("--fps", type=int, default=TradingMainWindow.UI_FPS, help="UpdateScheduler frame rate")
+    parser.add_argument("--out", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change reported as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    setup_logging(level=logging.WARNING)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    print(
+        f"Market data benchmark: source={args.source} tick_interval={args.tick_interval}ms "
+        f"fps={args.fps} duration={args.duration}s per step"
+    )
+    steps = MarketDataBench(app, args).run()
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "pyside": pyside_version,
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "source": args.source,
+            "tick_interval_ms": args.tick_interval,
+            "fps": args.fps,
+            "duration_s": args.duration,
+        },
+        "steps": steps,
+    }
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
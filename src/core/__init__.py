@@ -5,10 +5,81 @@ Contains IBKR integration components.
 """
 from .nautilus_bridge import NautilusBridge
 from .ibkr_bridge import IBKRBridge
+from .tick_conflator import TickConflator
+from .ring_buffer import NumpyRingBuffer
+from .bar_store import BarStore, BAR_DTYPE
+from .bar_aggregator import BarAggregator, TIMEFRAMES
+from .basket import Basket, BasketOrder, BasketOrderError, BasketSubmitter
+from .req_ids import ReqIdRange, ORDER_ID_FLOOR
+from .pacing import PacingLimiter, MessageThrottle, MSG_PRIORITY_HIGH, MSG_PRIORITY_NORMAL, MSG_PRIORITY_LOW
+from .history_scheduler import HistoryScheduler, HistoryRequest, HistoryJob
+from .subscriptions import SubscriptionManager, Subscription
+from .contract_cache import ContractCache, ContractInfo
+from .events import (
+    TickEvent, QuoteEvent, DepthEvent, BarEvent, PositionEvent, OrderEvent, OrderStatusEvent, ExecutionEvent
+)
+from .quote_book import QuoteBook
+from .depth_book import DepthBook
+from .shm_ring import ShmRing, FEED_DTYPE
+from .feed_process import FeedProcessBridge
+from .async_ibkr import AsyncIBKRBridge, AsyncIBKRClient
+from .tick_by_tick import TickByTickStore, TickRing, TickCursor, TickJournal, TICK_DTYPE
+from .latency import LatencyHistogram, LatencyTracker
+from .logger import get_logger, setup_logging, ThrottledLogger, QtLogHandler
 
 __all__ = [
     "NautilusBridge",
     "IBKRBridge",
+    "FeedProcessBridge",
+    "AsyncIBKRBridge",
+    "AsyncIBKRClient",
+    "ShmRing",
+    "FEED_DTYPE",
+    "TickConflator",
+    "NumpyRingBuffer",
+    "BarStore",
+    "BAR_DTYPE",
+    "BarAggregator",
+    "Basket",
+    "BasketOrder",
+    "BasketOrderError",
+    "BasketSubmitter",
+    "TIMEFRAMES",
+    "PacingLimiter",
+    "ReqIdRange",
+    "ORDER_ID_FLOOR",
+    "MessageThrottle",
+    "MSG_PRIORITY_HIGH",
+    "MSG_PRIORITY_NORMAL",
+    "MSG_PRIORITY_LOW",
+    "HistoryScheduler",
+    "HistoryRequest",
+    "HistoryJob",
+    "SubscriptionManager",
+    "Subscription",
+    "ContractCache",
+    "ContractInfo",
+    "TickEvent",
+    "QuoteEvent",
+    "QuoteBook",
+    "DepthEvent",
+    "DepthBook",
+    "TickByTickStore",
+    "TickRing",
+    "TickCursor",
+    "TickJournal",
+    "TICK_DTYPE",
+    "BarEvent",
+    "PositionEvent",
+    "OrderEvent",
+    "OrderStatusEvent",
+    "ExecutionEvent",
+    "LatencyHistogram",
+    "LatencyTracker",
+    "get_logger",
+    "setup_logging",
+    "ThrottledLogger",
+    "QtLogHandler",
 ]
 
 
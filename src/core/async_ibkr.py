@@ -0,0 +1,183 @@
+"""
+Asyncio IBKR Client.
+
+Optional mode (USE_ASYNC_IB=1) that reads and decodes the TWS socket with
+asyncio streams on the Qt event loop (through qasync) instead of ibapi's
+EReader thread plus a blocking EClient.run() thread.
+
+Every ibapi callback then runs on the GUI thread: the bridge's internal
+signals are connected directly, so there is no cross-thread queue, no
+queued-signal marshalling and no GIL hand-off between the reader and the
+GUI. The flip side is that decoding shares the GUI thread's time: a long
+repaint delays reading the socket (TWS data waits in the kernel buffer),
+and a burst of messages delays the next repaint. scripts/bench_async_ib.py
+compares both paths.
+"""
+import asyncio
+from typing import Optional
+
+from ibapi import comm, decoder
+from ibapi.client import EClient
+from ibapi.common import NO_VALID_ID
+from ibapi.errors import CONNECT_FAIL
+from ibapi.server_versions import MAX_CLIENT_VER, MIN_CLIENT_VER
+from PySide6.QtCore import Qt
+
+from .ibkr_bridge import IBKRBridge, IBKRClient
+from .latency import now_ns, tracker as latency
+from .logger import get_logger
+
+log = get_logger("ibkr")
+
+_HEADER_SIZE = 4  # Big-endian payload length in front of every message
+
+
+class AsyncIBKRClient(IBKRClient):
+    """
+    IBKRClient that talks to TWS through asyncio streams.
+
+    connect_async() does the API handshake and run_async() decodes messages
+    until the connection closes; both must run on the qasync event loop.
+    Requests are encoded by EClient as usual and written to the stream
+    without blocking.
+    """
+
+    READ_SIZE = 1 << 16  # Bytes per socket read (a burst is decoded in one pass)
+
+    def __init__(self, bridge: 'IBKRBridge'):
+        super().__init__(bridge)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending = b""  # Bytes read past the handshake
+        self.messages = 0  # Messages decoded (for benchmarks)
+
+    def isConnected(self):
+        return self.connState == EClient.CONNECTED and self._writer is not None
+
+    def _transmit(self, msg):
+        if self._writer is None:
+            log.warning("Dropped a request: not connected")
+            return
+        self._writer.write(comm.make_msg(msg))
+
+    def disconnect(self):
+        self.setConnState(EClient.DISCONNECTED)
+        writer, self._writer, self._reader = self._writer, None, None
+        if writer is not None:
+            log.info("Disconnecting")
+            writer.close()
+            self.wrapper.connectionClosed()
+            self.reset()
+
+    async def connect_async(self, host: str, port: int, client_id: int) -> bool:
+        """Open the socket and do the API handshake (same steps as EClient.connect)."""
+        self.host = host
+        self.port = port
+        self.clientId = client_id
+        self.setConnState(EClient.CONNECTING)
+        try:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+        except OSError as e:
+            log.info("Could not connect: %s", e)
+            self.wrapper.error(NO_VALID_ID, CONNECT_FAIL.code(), CONNECT_FAIL.msg())
+            self.disconnect()
+            return False
+
+        version = "v%d..%d" % (MIN_CLIENT_VER, MAX_CLIENT_VER)
+        if self.connectionOptions:
+            version += " " + self.connectionOptions
+        self._writer.write(b"API\0" + comm.make_msg(version))
+
+        self.decoder = decoder.Decoder(self.wrapper, self.serverVersion())
+        buf = b""
+        while True:  # TWS may send other messages before the server version
+            try:
+                fields, buf = await self._read_message(buf)
+            except (asyncio.IncompleteReadError, OSError):
+                log.warning("Connection closed during the handshake")
+                self.disconnect()
+                return False
+            if len(fields) == 2:
+                break
+            self.decoder.interpret(fields)
+
+        server_version, conn_time = fields
+        self.connTime = conn_time
+        self.serverVersion_ = int(server_version)
+        self.decoder.serverVersion = self.serverVersion()
+        self.setConnState(EClient.CONNECTED)
+        self._pending = buf
+        log.info("Socket connected (server version %s)", self.serverVersion_)
+        self.startApi()
+        self.wrapper.connectAck()
+        return True
+
+    async def _read_message(self, buf: bytes):
+        """Next message's fields, reading more bytes as needed; returns (fields, rest)."""
+        while True:
+            if len(buf) >= _HEADER_SIZE:
+                end = _HEADER_SIZE + int.from_bytes(buf[:_HEADER_SIZE], "big")
+                if len(buf) >= end:
+                    return comm.read_fields(buf[_HEADER_SIZE:end]), buf[end:]
+            data = await self._reader.read(self.READ_SIZE)
+            if not data:
+                raise asyncio.IncompleteReadError(buf, None)
+            buf += data
+
+    async def run_async(self):
+        """Decode messages until the connection closes (the EClient.run() of this client)."""
+        buf, self._pending = self._pending, b""
+        interpret = self.decoder.interpret
+        try:
+            while self._reader is not None:
+                data = await self._reader.read(self.READ_SIZE)
+                if not data:
+                    break
+                stamp = now_ns() if latency.enabled else 0
+                buf = buf + data if buf else data
+                pos, size = 0, len(buf)
+                # Decode every complete message of this read before yielding to the loop
+                while size - pos >= _HEADER_SIZE and self._reader is not None:
+                    end = pos + _HEADER_SIZE + int.from_bytes(buf[pos:pos + _HEADER_SIZE], "big")
+                    if end > size:
+                        break
+                    self.msg_queue.last_stamp = stamp
+                    interpret(comm.read_fields(buf[pos + _HEADER_SIZE:end]))
+                    self.messages += 1
+                    pos = end
+                buf = buf[pos:]
+        except OSError as e:
+            log.warning("Socket error: %s", e)
+        finally:
+            self.disconnect()  # No-op if already disconnected
+
+
+class AsyncIBKRBridge(IBKRBridge):
+    """
+    IBKRBridge whose client runs on the qasync event loop.
+
+    Same signals and API as IBKRBridge; create it after the qasync loop
+    has been installed (see main.py) and use it from the GUI thread only.
+    """
+
+    INTERNAL_CONNECTION = Qt.DirectConnection  # Callbacks already run on the GUI thread
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task: Optional[asyncio.Task] = None
+
+    def _start_client(self, host: str, port: int, client_id: int) -> IBKRClient:
+        """Create the client and schedule its connect-and-read task on the event loop."""
+        client = AsyncIBKRClient(self)
+        self._task = asyncio.ensure_future(self._connect_and_run(client, host, port, client_id))
+        log.debug("Connection task scheduled")
+        return client
+
+    async def _connect_and_run(self, client: AsyncIBKRClient, host: str, port: int, client_id: int):
+        try:
+            if await client.connect_async(host, port, client_id):
+                await client.run_async()
+        except Exception as e:
+            log.error("Connection error: %s", e)
+            self._emit_error(-1, str(e))
+            client.disconnect()
@@ -0,0 +1,284 @@
+"""
+Bar Aggregator.
+
+Builds OHLCV bars of several timeframes at once (1s, 1m, 5m, 1h by
+default) from live trades, one aggregation pass per symbol shared by the
+chart and strategies.
+"""
+import math
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from .bar_store import BAR_DTYPE
+from .events import BarEvent, TickEvent
+from .logger import get_logger
+from .ring_buffer import NumpyRingBuffer
+
+log = get_logger("bars")
+
+# Timeframe name -> seconds
+TIMEFRAMES = {"1s": 1, "1m": 60, "5m": 300, "1h": 3600}
+
+
+class _Series:
+    """Current bar and completed-bar history of one symbol and timeframe."""
+
+    __slots__ = ("seconds", "start", "open", "high", "low", "close", "volume", "pv", "count", "history")
+
+    def __init__(self, seconds: int, history: int):
+        self.seconds = seconds
+        self.start = -1        # Start of the current (or last completed) bar
+        self.open = self.high = self.low = self.close = math.nan
+        self.volume = 0.0
+        self.pv = 0.0          # Sum of price * size, for the WAP
+        self.count = 0
+        self.history = NumpyRingBuffer(history, BAR_DTYPE)
+
+    def add(self, start: int, price: float, size: float) -> Optional[BarEvent]:
+        """Apply one trade that falls in the bar starting at `start`; returns the bar it completed."""
+        completed = None
+        if start != self.start:
+            if self.count:
+                completed = self.complete()
+            self.start = start
+            self.open = self.high = self.low = price
+            self.volume = self.pv = 0.0
+            self.count = 0
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += size
+        self.pv += price * size
+        self.count += 1
+        return completed
+
+    def seed(self, bar) -> None:
+        """Continue a partial bar from history (e.g. TWS's still-forming bar)."""
+        start = int(bar["time"])
+        volume = max(0.0, float(bar["volume"]))
+        wap = float(bar["wap"])
+        if start == self.start and self.count:
+            # Live trades came first: history knows the real open and range
+            self.open = float(bar["open"])
+            self.high = max(self.high, float(bar["high"]))
+            self.low = min(self.low, float(bar["low"]))
+        else:
+            self.start = start
+            self.open, self.high, self.low, self.close = (
+                float(bar["open"]), float(bar["high"]), float(bar["low"]), float(bar["close"])
+            )
+        if volume > self.volume:
+            self.volume = volume
+            self.pv = (wap if wap > 0 else self.close) * volume
+        self.count = max(self.count, int(bar["count"]), 1)
+
+    def complete(self) -> BarEvent:
+        """Move the current bar to the history."""
+        bar = self.current()
+        self.history.append((bar.time, bar.open, bar.high, bar.low, bar.close, bar.volume, bar.wap, bar.count))
+        self.count = 0  # start stays: trades of this period are late from now on
+        return bar
+
+    def current(self) -> BarEvent:
+        wap = self.pv / self.volume if self.volume else self.close
+        return BarEvent(self.start, self.open, self.high, self.low, self.close, self.volume, wap, self.count)
+
+
+class BarAggregator(QObject):
+    """
+    Streaming tick-to-bar aggregation for several timeframes per symbol.
+
+    Each trade updates the current bar of every timeframe in O(1); a bar is
+    completed by the first trade of the next period, or by a 1 s timer once
+    its period (plus `grace` seconds for late trades) is over, so quiet
+    symbols still close their bars. Completed bars are kept in a ring of
+    `history` bars per timeframe.
+
+    Trades come from track() (the last price of a SubscriptionManager
+    symbol, with volume from the session volume of its quote) or are fed
+    directly with add_trade() / add_ticks(), e.g. from a tick-by-tick ring.
+    Use one source per symbol. Runs on the GUI thread.
+    """
+
+    # Signals
+    bar_completed = Signal(str, str, object)  # symbol, timeframe, BarEvent
+    bars_updated = Signal(str, object)        # symbol, timeframe -> in-progress BarEvent
+
+    DEFAULT_HISTORY = 2_000
+
+    def __init__(
+        self,
+        subscriptions=None,
+        parent=None,
+        timeframes: Optional[Dict[str, int]] = None,
+        history: int = DEFAULT_HISTORY,
+        grace: float = 1.0,
+    ):
+        super().__init__(parent)
+        self._subscriptions = subscriptions
+        self._timeframes = dict(timeframes or TIMEFRAMES)
+        self._history = history
+        self._grace = grace
+        self._series: Dict[str, Dict[str, _Series]] = {}      # symbol -> timeframe -> series
+        self._tracked: Dict[str, int] = {}                     # symbol -> track() reference count
+        self._volumes: Dict[str, float] = {}                   # symbol -> last session volume seen
+
+        # Counters
+        self._trades = 0
+        self._late = 0
+        self._completed = 0
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self._on_timer)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(self._timeframes)
+
+    def _symbol_series(self, symbol: str) -> Dict[str, _Series]:
+        series = self._series.get(symbol)
+        if series is None:
+            series = self._series[symbol] = {
+                name: _Series(seconds, self._history) for name, seconds in self._timeframes.items()
+            }
+            if not self._timer.isActive():
+                self._timer.start()
+        return series
+
+    # Sources
+    def track(self, symbol: str):
+        """Aggregate a symbol's live quotes (shares its SubscriptionManager line)."""
+        symbol = symbol.upper()
+        count = self._tracked.get(symbol, 0)
+        self._tracked[symbol] = count + 1
+        if count == 0:
+            log.debug("Aggregating %s bars for %s", "/".join(self._timeframes), symbol)
+            self._symbol_series(symbol)
+            self._subscriptions.subscribe(symbol, self._on_quote)
+
+    def untrack(self, symbol: str):
+        """Drop one track() reference; the bars are kept until clear()."""
+        symbol = symbol.upper()
+        count = self._tracked.get(symbol, 0)
+        if count <= 1:
+            if self._tracked.pop(symbol, None) is not None:
+                self._subscriptions.unsubscribe(symbol, self._on_quote)
+                self._volumes.pop(symbol, None)
+        else:
+            self._tracked[symbol] = count - 1
+
+    def add_trade(self, symbol: str, price: float, size: float = 0.0, timestamp: Optional[float] = None):
+        """Apply one trade (timestamp in epoch seconds, default now)."""
+        symbol = symbol.upper()
+        self._add(symbol, self._symbol_series(symbol), timestamp or time.time(), float(price), float(size))
+        self._publish(symbol)
+
+    def add_ticks(self, symbol: str, records: np.ndarray):
+        """Apply trades from a TICK_DTYPE array (Last / AllLast records), oldest first."""
+        if not len(records):
+            return
+        symbol = symbol.upper()
+        series = self._symbol_series(symbol)
+        sizes = np.nan_to_num(records["size"])
+        for t, price, size in zip(records["time"].tolist(), records["price"].tolist(), sizes.tolist()):
+            if price == price:  # Skip NaN (BidAsk records)
+                self._add(symbol, series, t, price, size)
+        self._publish(symbol)
+
+    def seed(self, symbol: str, bars: np.ndarray, bar_seconds: int):
+        """
+        Continue the current period from history of the same timeframe.
+
+        If the last of `bars` (BAR_DTYPE, oldest first) covers the current
+        period, it becomes the in-progress bar, so live trades extend TWS's
+        partial bar instead of starting an empty one.
+        """
+        if not len(bars):
+            return
+        symbol = symbol.upper()
+        for series in self._symbol_series(symbol).values():
+            if series.seconds != bar_seconds:
+                continue
+            now = int(time.time())
+            last = bars[-1]
+            start = int(last["time"])
+            if start == now - now % bar_seconds and (series.start < start or series.count):
+                series.seed(last)
+
+    def _add(self, symbol: str, series: Dict[str, _Series], t: float, price: float, size: float):
+        t = int(t)
+        self._trades += 1
+        for name, s in series.items():
+            start = t - t % s.seconds
+            if start < s.start or (start == s.start and not s.count):
+                self._late += 1  # Period already completed
+                continue
+            completed = s.add(start, price, size)
+            if completed is not None:
+                self._completed += 1
+                self.bar_completed.emit(symbol, name, completed)
+
+    def _publish(self, symbol: str):
+        series = self._series[symbol]
+        self.bars_updated.emit(symbol, {name: s.current() for name, s in series.items() if s.count})
+
+    # Reads
+    def current(self, symbol: str, timeframe: str) -> Optional[BarEvent]:
+        """In-progress bar (None before the first trade of the period)."""
+        s = self._series.get(symbol.upper(), {}).get(timeframe)
+        return s.current() if s is not None and s.count else None
+
+    def bars(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Completed bars as a BAR_DTYPE array, oldest first (a copy)."""
+        s = self._series.get(symbol.upper(), {}).get(timeframe)
+        return s.history.view().copy() if s is not None else np.empty(0, dtype=BAR_DTYPE)
+
+    def clear(self, symbol: Optional[str] = None):
+        """Forget the bars of one symbol (default all); tracked symbols start over."""
+        symbols = [symbol.upper()] if symbol else list(self._series)
+        for name in symbols:
+            self._series.pop(name, None)
+            if name in self._tracked:
+                self._symbol_series(name)  # Tracked symbols keep aggregating
+        if not self._series:
+            self._timer.stop()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._series),
+            "tracked": len(self._tracked),
+            "trades": self._trades,
+            "late": self._late,
+            "completed": self._completed,
+        }
+
+    # Handlers
+    def _on_quote(self, symbol: str, tick: TickEvent):
+        if tick.last is None:
+            return
+        size = 0.0
+        quote = self._subscriptions.quote(symbol)
+        if quote is not None and quote.volume == quote.volume:
+            previous = self._volumes.get(symbol)
+            if previous is not None and quote.volume > previous:
+                size = quote.volume - previous
+            self._volumes[symbol] = quote.volume
+        self._add(symbol, self._symbol_series(symbol), time.time(), tick.last, size)
+        self._publish(symbol)
+
+    @Slot()
+    def _on_timer(self):
+        """Complete bars whose period is over."""
+        now = time.time() - self._grace
+        for symbol, series in self._series.items():
+            for name, s in series.items():
+                if s.count and now >= s.start + s.seconds:
+                    self._completed += 1
+                    self.bar_completed.emit(symbol, name, s.complete())
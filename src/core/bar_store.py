@@ -0,0 +1,312 @@
+"""
+Historical Bar Store.
+
+On-disk columnar cache of historical bars, one .npy file per
+(symbol, bar size, what-to-show). Files are opened memory-mapped, recently
+viewed series stay in memory, and callers only request the missing tail from
+TWS (see missing_duration()).
+"""
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .logger import get_logger
+from .paths import data_dir
+
+log = get_logger("bars")
+
+# One record per bar; `time` is the bar start in epoch seconds (UTC)
+BAR_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+    ("wap", "<f8"),
+    ("count", "<i8"),
+])
+
+# IB bar size setting -> seconds
+BAR_SIZE_SECONDS = {
+    "1 secs": 1, "5 secs": 5, "10 secs": 10, "15 secs": 15, "30 secs": 30,
+    "1 min": 60, "2 mins": 120, "3 mins": 180, "5 mins": 300,
+    "10 mins": 600, "15 mins": 900, "20 mins": 1200, "30 mins": 1800,
+    "1 hour": 3600, "2 hours": 7200, "3 hours": 10800, "4 hours": 14400,
+    "8 hours": 28800, "1 day": 86400, "1 week": 604800, "1 month": 2592000,
+}
+
+BarKey = Tuple[str, str, str]  # (symbol, bar size, what to show)
+
+
+def parse_bar_time(value) -> int:
+    """
+    Convert an IB bar date to epoch seconds.
+
+    Handles epoch strings (formatDate=2), daily "YYYYMMDD" dates (taken as
+    UTC midnight) and "YYYYMMDD  HH:MM:SS [TZ]" local times (formatDate=1).
+    """
+    text = str(value).strip()
+    if text.isdigit() and len(text) != 8:
+        return int(text)
+    parts = text.split()
+    if len(parts) == 1:
+        day = datetime.strptime(parts[0], "%Y%m%d")
+        return int(day.replace(tzinfo=timezone.utc).timestamp())
+    stamp = datetime.strptime(f"{parts[0]} {parts[1]}", "%Y%m%d %H:%M:%S")
+    if len(parts) > 2:
+        from zoneinfo import ZoneInfo
+        stamp = stamp.replace(tzinfo=ZoneInfo(parts[2]))
+    return int(stamp.timestamp())
+
+
+def bars_to_array(bars: Iterable) -> np.ndarray:
+    """
+    Convert ibapi BarData objects to a BAR_DTYPE array.
+
+    Args:
+        bars: BarData objects in any order
+    """
+    rows = [
+        (
+            parse_bar_time(bar.date),
+            bar.open, bar.high, bar.low, bar.close,
+            float(bar.volume),
+            float(getattr(bar, "wap", getattr(bar, "average", math.nan))),
+            int(bar.barCount),
+        )
+        for bar in bars
+    ]
+    return np.array(rows, dtype=BAR_DTYPE)
+
+
+class BarBuffer:
+    """
+    Growable BAR_DTYPE array for bars arriving one at a time.
+
+    Used on the TWS reader thread to collect a historical request without
+    allocating a Python object per bar.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._data = np.empty(capacity, dtype=BAR_DTYPE)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append_bar(self, bar):
+        """Append an ibapi BarData."""
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=BAR_DTYPE)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = (
+            parse_bar_time(bar.date),
+            bar.open, bar.high, bar.low, bar.close,
+            float(bar.volume),
+            float(getattr(bar, "wap", getattr(bar, "average", math.nan))),
+            int(bar.barCount),
+        )
+        self._size += 1
+
+    def take(self) -> np.ndarray:
+        """Return the collected bars as a new array and empty the buffer."""
+        bars = self._data[:self._size].copy()
+        self._size = 0
+        return bars
+
+
+def merge_bars(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """
+    Merge two bar arrays into one sorted by time.
+
+    Bars in `new` replace bars in `existing` with the same start time, so a
+    partial (still-forming) bar is overwritten once its final version arrives.
+    """
+    if len(new) == 0:
+        return existing
+    combined = np.concatenate([existing, new]) if len(existing) else new
+    times = combined["time"]
+    if np.all(times[1:] > times[:-1]):
+        return combined  # Common case: new bars extend the tail
+    order = np.argsort(times, kind="stable")
+    combined = combined[order]
+    times = combined["time"]
+    keep = np.ones(len(combined), dtype=bool)
+    keep[:-1] = times[1:] != times[:-1]  # Last occurrence wins
+    return combined[keep]
+
+
+class BarStore:
+    """
+    Local cache of historical bars.
+
+    Each series is stored as a sorted BAR_DTYPE array in
+    `<root>/<SYMBOL>_<barsize>_<WHAT>.npy`. Reads are memory-mapped and the
+    most recently used series are kept in memory; writes go to a temp file
+    that atomically replaces the old one. Used from the GUI thread only.
+    """
+
+    DEFAULT_MEMORY_SLOTS = 32
+
+    def __init__(self, root: Optional[Path] = None, memory_slots: int = DEFAULT_MEMORY_SLOTS):
+        self._root = Path(root) if root else data_dir("bars")
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._memory_slots = memory_slots
+        self._memory: "OrderedDict[BarKey, np.ndarray]" = OrderedDict()
+        self._synced: Dict[BarKey, float] = {}  # key -> time.time() of last merge
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def path(self, symbol: str, bar_size: str, what_to_show: str) -> Path:
+        """File holding one bar series."""
+        name = "_".join(
+            re.sub(r"[^A-Za-z0-9.]+", "", part)
+            for part in (symbol.upper(), bar_size, what_to_show.upper())
+        )
+        return self._root / f"{name}.npy"
+
+    def load(self, symbol: str, bar_size: str, what_to_show: str) -> np.ndarray:
+        """
+        Get the cached bars of a series (read-only, oldest first).
+
+        Returns an empty array if nothing is cached.
+        """
+        key = (symbol.upper(), bar_size, what_to_show.upper())
+        bars = self._memory.get(key)
+        if bars is not None:
+            self._memory.move_to_end(key)
+            return bars
+
+        path = self.path(*key)
+        if path.exists():
+            try:
+                bars = np.load(path, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                log.warning("Ignoring unreadable bar cache %s: %s", path.name, e)
+                bars = None
+            if bars is not None and bars.dtype != BAR_DTYPE:
+                log.warning("Ignoring bar cache %s with old layout", path.name)
+                bars = None
+        if bars is None:
+            bars = np.empty(0, dtype=BAR_DTYPE)
+        self._remember(key, bars)
+        return bars
+
+    def merge(
+        self,
+        symbol: str,
+        bar_size: str,
+        what_to_show: str,
+        bars: np.ndarray,
+        synced: bool = True,
+    ) -> np.ndarray:
+        """
+        Merge freshly downloaded bars into a series and persist it.
+
+        Args:
+            synced: The bars run up to now; marks the series up to date
+                    even when `bars` is empty
+
+        Returns:
+            The merged series (read-only, oldest first)
+        """
+        key = (symbol.upper(), bar_size, what_to_show.upper())
+        existing = self.load(*key)
+        if synced:
+            self._synced[key] = time.time()
+        if len(bars) == 0:
+            return existing
+
+        merged = merge_bars(np.asarray(existing), bars.astype(BAR_DTYPE, copy=False))
+        merged = np.array(merged)  # Own the data (detach from the memmap)
+        merged.setflags(write=False)
+        self._memory.pop(key, None)
+        del existing  # Release the memmap before replacing its file
+        self._write(self.path(*key), merged)
+        self._remember(key, merged)
+        return merged
+
+    def missing_duration(
+        self,
+        symbol: str,
+        bar_size: str,
+        what_to_show: str,
+        default: str = "1 D",
+        now: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        IB duration string covering the bars missing from a series.
+
+        Args:
+            default: Duration to request when nothing is cached
+            now: Current epoch time (defaults to time.time())
+
+        Returns:
+            None if the series is up to date, otherwise e.g. "3600 S", "4 D" or "2 Y".
+            The window always includes the last cached bar so a partial bar
+            gets replaced.
+        """
+        key = (symbol.upper(), bar_size, what_to_show.upper())
+        now = time.time() if now is None else now
+        bar_seconds = BAR_SIZE_SECONDS.get(bar_size, 60)
+
+        if now - self._synced.get(key, 0.0) < bar_seconds:
+            return None  # Synced within the current bar
+
+        bars = self.load(*key)
+        if len(bars) == 0:
+            return default
+        gap = now - float(bars["time"][-1]) + bar_seconds
+        if gap <= 86400:
+            return f"{max(bar_seconds, int(math.ceil(gap)))} S"
+        if gap <= 365 * 86400:
+            return f"{int(math.ceil(gap / 86400))} D"
+        return f"{int(math.ceil(gap / (365 * 86400)))} Y"  # TWS takes at most 365 D
+
+    def clear(self, symbol: Optional[str] = None):
+        """Delete cached series (all, or every series of one symbol)."""
+        prefix = f"{symbol.upper()}_" if symbol else ""
+        for key in [k for k in self._memory if not symbol or k[0] == symbol.upper()]:
+            del self._memory[key]
+        for key in [k for k in self._synced if not symbol or k[0] == symbol.upper()]:
+            del self._synced[key]
+        for path in self._root.glob(f"{prefix}*.npy"):
+            try:
+                path.unlink()
+            except OSError as e:
+                log.warning("Could not delete %s: %s", path.name, e)
+
+    def _remember(self, key: BarKey, bars: np.ndarray):
+        self._memory[key] = bars
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._memory_slots:
+            self._memory.popitem(last=False)
+
+    def _write(self, path: Path, bars: np.ndarray):
+        """Atomically replace a series file."""
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, bars)
+            os.replace(tmp, path)
+        except OSError as e:
+            # e.g. the old file is still mapped by a reader on Windows;
+            # the in-memory copy stays valid and the next merge retries.
+            log.warning("Could not write bar cache %s: %s", path.name, e)
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+        else:
+            log.debug("Cached %s bars in %s", len(bars), path.name)
@@ -0,0 +1,342 @@
+"""
+Basket Orders.
+
+Submits many orders at once (a rebalance across the portfolio): order IDs
+are reserved in one atomic step, the orders go out through the bridge's
+message throttle ahead of market data traffic, and every order is tracked
+from submission to acknowledgement and fill with futures and latencies.
+"""
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from PySide6.QtCore import QObject, Signal, Slot
+
+from .events import OrderStatusEvent
+from .logger import get_logger
+from .pacing import MSG_PRIORITY_HIGH
+
+log = get_logger("order")
+
+# Order statuses that mean TWS has accepted the order
+ACK_STATUSES = frozenset({"PreSubmitted", "Submitted", "Filled"})
+# Final order statuses other than Filled
+FAILED_STATUSES = frozenset({"Cancelled", "ApiCancelled", "Inactive"})
+# Order error codes that are warnings; the order stays alive
+ORDER_WARNING_CODES = frozenset({
+    399,  # Order message (e.g. will not be placed until the market opens)
+    404,  # Order held while shares are located for a short sale
+})
+
+
+class BasketOrderError(Exception):
+    """An order of a basket was rejected, cancelled or lost."""
+
+    def __init__(self, message: str, code: int = -1):
+        super().__init__(message)
+        self.code = code
+
+
+def _latency_summary(seconds: List[float]) -> dict:
+    """Count and percentiles in milliseconds."""
+    if not seconds:
+        return {"count": 0}
+    values = np.asarray(seconds) * 1e3
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "count": len(values),
+        "mean": float(values.mean()),
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "max": float(values.max()),
+    }
+
+
+class BasketOrder:
+    """
+    One order of a basket.
+
+    `ack` resolves with the first OrderStatusEvent that shows TWS accepted
+    the order; `fill` resolves with the Filled event. Both raise
+    BasketOrderError if the order is rejected, cancelled or lost first.
+    """
+
+    def __init__(self, order: dict, order_id: int, submitted_at: float):
+        self.order = order
+        self.order_id = order_id
+        self.status = ""
+        self.filled = 0.0
+        self.avg_fill_price = 0.0
+        self.submitted_at = submitted_at  # perf_counter() when the order was queued
+        self.acked_at: Optional[float] = None
+        self.done_at: Optional[float] = None
+        self.ack: Future = Future()
+        self.fill: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.fill.done()
+
+    @property
+    def ack_latency(self) -> Optional[float]:
+        """Seconds from submission to acknowledgement."""
+        return None if self.acked_at is None else self.acked_at - self.submitted_at
+
+    @property
+    def fill_latency(self) -> Optional[float]:
+        """Seconds from submission to the complete fill."""
+        if self.done_at is None or self.status != "Filled":
+            return None
+        return self.done_at - self.submitted_at
+
+    def __repr__(self):
+        return (
+            f"BasketOrder({self.order_id} {self.order['side']} {self.order['quantity']} "
+            f"{self.order['symbol']} {self.status or 'queued'})"
+        )
+
+
+class Basket:
+    """
+    Orders submitted together.
+
+    `acked` resolves with the basket once every order is acknowledged or
+    has failed, `future` once every order is filled or has failed; neither
+    raises, check `failed` for the orders that did not make it.
+    """
+
+    def __init__(self, name: str, orders: List[BasketOrder], submitted_at: float):
+        self.name = name
+        self.orders = orders
+        self.submitted_at = submitted_at
+        self.queued_at = submitted_at  # When the last order was handed to the throttle
+        self.acked: Future = Future()
+        self.future: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def pending(self) -> List[BasketOrder]:
+        return [o for o in self.orders if not o.done]
+
+    @property
+    def filled(self) -> List[BasketOrder]:
+        return [o for o in self.orders if o.status == "Filled"]
+
+    @property
+    def failed(self) -> List[BasketOrder]:
+        return [o for o in self.orders if o.done and o.status != "Filled"]
+
+    def result(self, timeout: Optional[float] = None) -> "Basket":
+        return self.future.result(timeout)
+
+    @property
+    def stats(self) -> dict:
+        """Counts and latencies (milliseconds) of the basket."""
+        acks = [o.ack_latency for o in self.orders if o.acked_at is not None]
+        fills = [o.fill_latency for o in self.orders if o.fill_latency is not None]
+        acked_at = [o.acked_at for o in self.orders if o.acked_at is not None]
+        done_at = [o.done_at for o in self.orders if o.done_at is not None]
+        return {
+            "orders": len(self.orders),
+            "acked": len(acks),
+            "filled": len(fills),
+            "failed": len(self.failed),
+            "pending": len(self.pending),
+            "queue_ms": (self.queued_at - self.submitted_at) * 1e3,
+            "ack_ms": _latency_summary(acks),
+            "fill_ms": _latency_summary(fills),
+            # Submission to the last acknowledgement / final status
+            "all_acked_s": max(acked_at) - self.submitted_at if self.acked.done() and acked_at else None,
+            "all_done_s": max(done_at) - self.submitted_at if self.done and done_at else None,
+        }
+
+    def __repr__(self):
+        return f"Basket({self.name!r}, {len(self.orders)} orders, {len(self.pending)} pending)"
+
+
+class BasketSubmitter(QObject):
+    """
+    Basket order entry on top of IBKRBridge.
+
+    submit() reserves one block of order IDs, places every order through
+    bridge.submit_many() at order priority, and tracks the orders through
+    order_status_received and order_error. Orders whose requests were
+    still queued when the connection dropped fail with BasketOrderError;
+    orders TWS already acknowledged keep being tracked after a reconnect.
+    Runs on the GUI thread.
+    """
+
+    # Signals
+    order_acked = Signal(object)    # BasketOrder
+    order_done = Signal(object)     # BasketOrder (filled, cancelled or rejected)
+    basket_acked = Signal(object)   # Basket: every order acknowledged or failed
+    basket_done = Signal(object)    # Basket: every order filled or failed
+
+    def __init__(self, bridge, parent=None):
+        super().__init__(parent)
+        self._bridge = bridge
+        self._orders: Dict[int, BasketOrder] = {}  # orderId -> open order
+        self._baskets: Dict[int, Basket] = {}      # id(basket) -> open basket
+        self._basket_of: Dict[int, Basket] = {}    # orderId -> its basket
+
+        # Counters
+        self._submitted_baskets = 0
+        self._submitted = 0
+        self._acked = 0
+        self._filled = 0
+        self._failed = 0
+
+        bridge.order_status_received.connect(self._on_order_status)
+        bridge.order_error.connect(self._on_order_error)
+        bridge.disconnected.connect(self._on_disconnected)
+
+    def submit(self, orders: Iterable[dict], name: str = "") -> Basket:
+        """
+        Place a basket of orders.
+
+        Args:
+            orders: Order dicts as taken by IBKRBridge.place_order
+            name: Label for logs
+
+        Returns:
+            The basket; its orders' futures resolve as TWS reports back
+
+        Raises:
+            ValueError: No orders
+            BasketOrderError: Not connected
+        """
+        orders = list(orders)
+        if not orders:
+            raise ValueError("empty basket")
+        first_id = self._bridge.allocate_order_ids(len(orders))
+        if first_id < 0:
+            raise BasketOrderError("not connected")
+
+        now = time.perf_counter()
+        basket = Basket(name or f"basket-{first_id}", [
+            BasketOrder(order, first_id + i, now) for i, order in enumerate(orders)
+        ], now)
+        self._baskets[id(basket)] = basket
+        for order in basket.orders:
+            self._orders[order.order_id] = order
+            self._basket_of[order.order_id] = basket
+        self._submitted_baskets += 1
+        self._submitted += len(orders)
+
+        bridge = self._bridge
+        bridge.submit_many(
+            [lambda o=o: bridge.place_order(o.order, o.order_id) for o in basket.orders],
+            MSG_PRIORITY_HIGH,
+        )
+        basket.queued_at = time.perf_counter()
+        log.info(
+            "Basket %s: %s orders (IDs %s-%s) queued in %.1f ms",
+            basket.name, len(orders), first_id, first_id + len(orders) - 1,
+            (basket.queued_at - now) * 1e3,
+        )
+        return basket
+
+    def cancel(self, basket: Basket):
+        """Cancel the orders of a basket that are still open."""
+        bridge = self._bridge
+        open_ids = [o.order_id for o in basket.pending]
+        bridge.submit_many([lambda i=i: bridge.cancel_order(i) for i in open_ids], MSG_PRIORITY_HIGH)
+
+    @property
+    def baskets(self) -> List[Basket]:
+        """Baskets with open orders."""
+        return list(self._baskets.values())
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "baskets": self._submitted_baskets,
+            "open_baskets": len(self._baskets),
+            "submitted": self._submitted,
+            "acked": self._acked,
+            "filled": self._filled,
+            "failed": self._failed,
+            "open": len(self._orders),
+        }
+
+    # Tracking
+    def _acknowledge(self, order: BasketOrder, event: Optional[OrderStatusEvent]):
+        order.acked_at = time.perf_counter()
+        self._acked += 1
+        order.ack.set_result(event)
+        self.order_acked.emit(order)
+
+    def _finish(self, order: BasketOrder, event: Optional[OrderStatusEvent] = None,
+                error: Optional[BasketOrderError] = None):
+        order.done_at = time.perf_counter()
+        self._orders.pop(order.order_id, None)
+        if error is None:
+            self._filled += 1
+            if not order.ack.done():
+                self._acknowledge(order, event)
+            order.fill.set_result(event)
+        else:
+            self._failed += 1
+            if not order.ack.done():
+                order.ack.set_exception(error)
+            order.fill.set_exception(error)
+        self.order_done.emit(order)
+
+        self._update(self._basket_of.pop(order.order_id))
+
+    def _update(self, basket: Basket):
+        """Resolve the basket's futures once all its orders got that far."""
+        if not basket.acked.done() and all(o.ack.done() for o in basket.orders):
+            basket.acked.set_result(basket)
+            self.basket_acked.emit(basket)
+        if not basket.done and all(o.done for o in basket.orders):
+            self._complete(basket)
+
+    def _complete(self, basket: Basket):
+        self._baskets.pop(id(basket), None)
+        stats = basket.stats
+        log.info(
+            "Basket %s done in %.2fs: %s filled, %s failed, ack p50 %.1f ms p99 %.1f ms",
+            basket.name, stats["all_done_s"] or 0.0, stats["filled"], stats["failed"],
+            stats["ack_ms"].get("p50", 0.0), stats["ack_ms"].get("p99", 0.0),
+        )
+        basket.future.set_result(basket)
+        self.basket_done.emit(basket)
+
+    # Handlers
+    @Slot(object)
+    def _on_order_status(self, event: OrderStatusEvent):
+        order = self._orders.get(event.order_id)
+        if order is None:
+            return
+        order.status = event.status
+        order.filled = event.filled
+        order.avg_fill_price = event.avg_fill_price
+        if event.status == "Filled":
+            self._finish(order, event)
+        elif event.status in FAILED_STATUSES:
+            self._finish(order, event, BasketOrderError(f"order {event.order_id} {event.status}"))
+        elif event.status in ACK_STATUSES and not order.ack.done():
+            self._acknowledge(order, event)
+            self._update(self._basket_of[order.order_id])
+
+    @Slot(int, int, str)
+    def _on_order_error(self, order_id: int, code: int, message: str):
+        order = self._orders.get(order_id)
+        if order is None or code >= 2000 or code in ORDER_WARNING_CODES:
+            return
+        log.warning("Basket order %s rejected (%s): %s", order_id, code, message)
+        order.status = "Rejected"
+        self._finish(order, error=BasketOrderError(message, code))
+
+    @Slot()
+    def _on_disconnected(self):
+        """Orders TWS never acknowledged may not have been sent at all."""
+        for order in [o for o in self._orders.values() if not o.ack.done()]:
+            order.status = "Lost"
+            self._finish(order, error=BasketOrderError(f"connection lost before order {order.order_id} was acknowledged"))
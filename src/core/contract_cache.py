@@ -0,0 +1,362 @@
+"""
+Contract Cache.
+
+Resolves symbols to IB contracts with reqContractDetails once and keeps the
+results (conId, primary exchange, tick size, trading hours) in an on-disk
+index that is reused across sessions. The bridge builds its Contract objects
+from here, so TWS does not have to resolve SMART/USD/STK guesses on every
+order, subscription and historical request.
+"""
+import copy
+import json
+import os
+import time
+from concurrent.futures import Future
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from .logger import get_logger
+from .paths import data_dir
+from .req_ids import CONTRACT_REQ_IDS, ReqIdRange
+
+log = get_logger("contracts")
+
+# Error codes that are warnings (data farm status); the request goes on.
+# Every other code fails the resolution.
+CONTRACT_WARNING_CODES = frozenset({
+    2103, 2105, 2157,  # Data farm connection broken (TWS reconnects it)
+    2104, 2106, 2158,  # Data farm connection is OK
+    2107, 2108,        # Data farm inactive, available on demand
+    2119,              # Data farm connecting
+})
+
+
+class ContractResolutionError(Exception):
+    """reqContractDetails failed for a symbol."""
+
+    def __init__(self, message: str, code: int = -1):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True)
+class ContractInfo:
+    """The parts of an IB ContractDetails the app needs."""
+
+    symbol: str
+    con_id: int
+    sec_type: str = "STK"
+    exchange: str = "SMART"
+    primary_exchange: str = ""
+    currency: str = "USD"
+    local_symbol: str = ""
+    trading_class: str = ""
+    min_tick: float = 0.01
+    long_name: str = ""
+    time_zone: str = ""
+    trading_hours: str = ""
+    liquid_hours: str = ""
+    resolved_at: float = 0.0  # Epoch seconds
+
+    @classmethod
+    def from_details(cls, details) -> "ContractInfo":
+        """Build from an ibapi ContractDetails."""
+        contract = details.contract
+        return cls(
+            symbol=contract.symbol.upper(),
+            con_id=int(contract.conId),
+            sec_type=contract.secType,
+            exchange="SMART",
+            primary_exchange=contract.primaryExchange,
+            currency=contract.currency,
+            local_symbol=contract.localSymbol,
+            trading_class=contract.tradingClass,
+            min_tick=float(details.minTick),
+            long_name=details.longName,
+            time_zone=details.timeZoneId,
+            trading_hours=details.tradingHours,
+            liquid_hours=details.liquidHours,
+            resolved_at=time.time(),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ContractInfo":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def make_contract(self):
+        """ibapi Contract identified by conId."""
+        from ibapi.contract import Contract
+
+        contract = Contract()
+        contract.conId = self.con_id
+        contract.symbol = self.symbol
+        contract.secType = self.sec_type
+        contract.exchange = self.exchange
+        contract.primaryExchange = self.primary_exchange
+        contract.currency = self.currency
+        return contract
+
+
+def default_contract(symbol: str, exchange: str = "SMART"):
+    """Unresolved US stock contract (TWS resolves it on every request)."""
+    from ibapi.contract import Contract
+
+    contract = Contract()
+    contract.symbol = symbol
+    contract.secType = "STK"
+    contract.exchange = exchange
+    contract.currency = "USD"
+    return contract
+
+
+class ContractCache(QObject):
+    """
+    Symbol -> contract details, resolved once and persisted.
+
+    The index lives in `<data dir>/contracts/contracts.json` and entries are
+    refreshed after `max_age_days`. warm() resolves a whole watchlist in the
+    background with at most `max_in_flight` requests outstanding. contract()
+    never blocks: it returns a prebuilt Contract (with conId) for resolved
+    symbols and an unresolved SMART/USD/STK contract otherwise. Runs on the
+    GUI thread.
+    """
+
+    # Signals
+    contract_resolved = Signal(object)        # ContractInfo
+    contract_failed = Signal(str, int, str)   # symbol, error code, message
+    warmup_finished = Signal()
+
+    DEFAULT_FIRST_REQ_ID, DEFAULT_REQ_ID_COUNT = CONTRACT_REQ_IDS
+    DEFAULT_MAX_AGE_DAYS = 7.0
+    MAX_IN_FLIGHT = 20
+    SAVE_DELAY_MS = 1000
+
+    def __init__(
+        self,
+        bridge,
+        parent=None,
+        path: Optional[Path] = None,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        first_req_id: int = DEFAULT_FIRST_REQ_ID,
+        req_id_count: int = DEFAULT_REQ_ID_COUNT,
+    ):
+        super().__init__(parent)
+        self._bridge = bridge
+        self._path = Path(path) if path else data_dir("contracts") / "contracts.json"
+        self._max_age = max_age_days * 86400.0
+        self._max_in_flight = max_in_flight
+        self._req_ids = ReqIdRange(first_req_id, req_id_count)
+
+        self._index: Dict[str, ContractInfo] = {}
+        self._contracts: Dict[str, object] = {}               # symbol -> prebuilt ibapi Contract
+        self._futures: Dict[str, Future] = {}                 # symbol -> pending resolution
+        self._queue: "OrderedDict[str, None]" = OrderedDict()  # Symbols waiting to be sent
+        self._in_flight: Dict[int, str] = {}                  # reqId -> symbol
+        self._received: Dict[int, ContractInfo] = {}          # reqId -> first matching details
+        self._failed: Dict[str, str] = {}                     # symbol -> reason (this session)
+        self._warming = False
+
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(self.SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.save)
+
+        self._load()
+
+        bridge.contract_details_received.connect(self._on_details)
+        bridge.contract_details_end.connect(self._on_details_end)
+        bridge.request_error.connect(self._on_request_error)
+        bridge.connected.connect(self._send_queued)
+        bridge.disconnected.connect(self._on_disconnected)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._index
+
+    def get(self, symbol: str) -> Optional[ContractInfo]:
+        """Cached details of a symbol (possibly stale), or None."""
+        return self._index.get(symbol.upper())
+
+    def is_fresh(self, symbol: str) -> bool:
+        info = self._index.get(symbol.upper())
+        return info is not None and time.time() - info.resolved_at < self._max_age
+
+    def contract(self, symbol: str, exchange: str = "SMART"):
+        """
+        Contract for a request or order (never blocks).
+
+        Resolved symbols get a prebuilt Contract with conId and primary
+        exchange. Unknown symbols get the unresolved default contract and are
+        queued for resolution. Callers must not modify the returned object.
+        """
+        key = symbol.upper()
+        contract = self._contracts.get(key)
+        if contract is None:
+            info = self._index.get(key)
+            if info is None:
+                if key not in self._failed:
+                    self.resolve(key)
+                return default_contract(symbol, exchange)
+            contract = self._contracts[key] = info.make_contract()
+        if exchange != contract.exchange:
+            contract = copy.copy(contract)
+            contract.exchange = exchange
+        return contract
+
+    def resolve(self, symbol: str, refresh: bool = False) -> Future:
+        """
+        Resolve a symbol.
+
+        Returns:
+            Future with the ContractInfo (already done when cached and fresh),
+            or raising ContractResolutionError
+        """
+        key = symbol.upper()
+        if not refresh and self.is_fresh(key):
+            future = Future()
+            future.set_result(self._index[key])
+            return future
+        future = self._futures.get(key)
+        if future is None:
+            future = self._futures[key] = Future()
+            self._failed.pop(key, None)
+            self._queue[key] = None
+            self._send_queued()
+        return future
+
+    def warm(self, symbols: Iterable[str]) -> List[Future]:
+        """Resolve every symbol that is missing or stale (e.g. the watchlist at startup)."""
+        futures = [self.resolve(symbol) for symbol in dict.fromkeys(s.upper() for s in symbols)]
+        pending = sum(not f.done() for f in futures)
+        if pending:
+            log.info("Resolving %s of %s watchlist contracts", pending, len(futures))
+            self._warming = True
+        else:
+            self.warmup_finished.emit()
+        return futures
+
+    @Slot()
+    def save(self):
+        """Write the index (atomically)."""
+        self._save_timer.stop()
+        data = {
+            "version": 1,
+            "contracts": {symbol: info.to_dict() for symbol, info in sorted(self._index.items())},
+        }
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self._path)
+        except OSError as e:
+            log.warning("Could not write contract index %s: %s", self._path, e)
+        else:
+            log.debug("Saved %s contracts to %s", len(self._index), self._path.name)
+
+    def _load(self):
+        if not self._path.exists():
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._index = {
+                symbol: ContractInfo.from_dict(entry)
+                for symbol, entry in data.get("contracts", {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("Ignoring unreadable contract index %s: %s", self._path, e)
+            self._index = {}
+        else:
+            log.info("Loaded %s contracts from %s", len(self._index), self._path.name)
+
+    @Slot()
+    def _send_queued(self):
+        if not self._bridge.is_connected:
+            return
+        while self._queue and len(self._in_flight) < self._max_in_flight:
+            symbol, _ = self._queue.popitem(last=False)
+            req_id = self._req_ids.next(self._in_flight)
+            if self._bridge.request_contract_details(symbol, req_id) == -1:
+                self._queue[symbol] = None
+                self._queue.move_to_end(symbol, last=False)
+                return
+            self._in_flight[req_id] = symbol
+
+    @Slot(int, object)
+    def _on_details(self, req_id: int, details):
+        symbol = self._in_flight.get(req_id)
+        if symbol is None or req_id in self._received:
+            return
+        info = ContractInfo.from_details(details)
+        # A symbol can match several contracts; prefer the US listing asked for
+        if info.symbol == symbol and info.currency == "USD":
+            self._received[req_id] = info
+
+    @Slot(int)
+    def _on_details_end(self, req_id: int):
+        symbol = self._in_flight.pop(req_id, None)
+        if symbol is None:
+            return
+        info = self._received.pop(req_id, None)
+        if info is None:
+            self._fail(symbol, 200, "No matching USD contract")
+        else:
+            self._index[symbol] = info
+            self._contracts.pop(symbol, None)
+            future = self._futures.pop(symbol, None)
+            if future is not None:
+                future.set_result(info)
+            log.debug("Resolved %s: conId=%s on %s", symbol, info.con_id, info.primary_exchange)
+            self.contract_resolved.emit(info)
+            self._save_timer.start()
+        self._after_request()
+
+    @Slot(int, int, str)
+    def _on_request_error(self, req_id: int, code: int, msg: str):
+        symbol = self._in_flight.get(req_id)
+        if symbol is None or code in CONTRACT_WARNING_CODES:
+            return
+        del self._in_flight[req_id]
+        self._received.pop(req_id, None)
+        self._fail(symbol, code, msg)
+        self._after_request()
+
+    def _fail(self, symbol: str, code: int, msg: str):
+        log.warning("Could not resolve contract %s: %s %s", symbol, code, msg)
+        self._failed[symbol] = msg
+        future = self._futures.pop(symbol, None)
+        if future is not None:
+            future.set_exception(ContractResolutionError(msg, code))
+        self.contract_failed.emit(symbol, code, msg)
+
+    def _after_request(self):
+        self._send_queued()
+        if self._warming and not self._queue and not self._in_flight:
+            self._warming = False
+            log.info("Contract warm-up finished (%s cached)", len(self._index))
+            self.warmup_finished.emit()
+
+    @Slot()
+    def _on_disconnected(self):
+        """Re-send unanswered requests after reconnecting."""
+        for req_id, symbol in list(self._in_flight.items()):
+            self._queue[symbol] = None
+            self._queue.move_to_end(symbol, last=False)
+        self._in_flight.clear()
+        self._received.clear()
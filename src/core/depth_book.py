@@ -0,0 +1,144 @@
+"""
+Market Depth Book.
+
+Level 2 order book of one reqMktDepth line, kept in fixed-size arrays per
+side and updated in place from updateMktDepth / updateMktDepthL2 on the TWS
+reader thread.
+"""
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from .events import DepthEvent
+
+# updateMktDepth side and operation codes
+ASK, BID = 0, 1
+INSERT, UPDATE, DELETE = 0, 1, 2
+
+
+class DepthBook:
+    """
+    Both sides of one depth line, best level first.
+
+    Prices and sizes live in preallocated (2, levels) float64 arrays; an
+    insert or delete shifts the rows below it in place, so an update costs a
+    slice copy of at most `levels` elements and allocates nothing. Readers
+    take DepthEvent snapshots, which copy only the levels in use.
+    Thread-safe.
+    """
+
+    def __init__(self, req_id: int, symbol: str, levels: int = 10, smart_depth: bool = True):
+        self.req_id = req_id
+        self.symbol = symbol
+        self.levels = max(1, levels)
+        self.smart_depth = smart_depth
+        self._lock = threading.Lock()
+        self._prices = np.full((2, self.levels), np.nan)
+        self._sizes = np.zeros((2, self.levels))
+        self._makers = [[""] * self.levels, [""] * self.levels]
+        self._depth = [0, 0]       # Levels in use per side
+        self._updated = 0.0
+        self._dirty = False
+        self._updates = 0
+        self._ignored = 0          # Out-of-range positions / deletes of empty levels
+
+    def apply(self, position: int, operation: int, side: int, price: float, size: float,
+              market_maker: str = "") -> bool:
+        """
+        Apply one depth update (reader thread).
+
+        Returns:
+            False if the update was out of range and ignored
+        """
+        if side not in (ASK, BID) or not 0 <= position < self.levels:
+            self._ignored += 1
+            return False
+        with self._lock:
+            prices = self._prices[side]
+            sizes = self._sizes[side]
+            makers = self._makers[side]
+            depth = self._depth[side]
+
+            if operation == DELETE:
+                if position >= depth:
+                    self._ignored += 1
+                    return False
+                depth -= 1
+                prices[position:depth] = prices[position + 1:depth + 1]
+                sizes[position:depth] = sizes[position + 1:depth + 1]
+                del makers[position]
+                makers.append("")
+                prices[depth] = np.nan
+                sizes[depth] = 0.0
+            else:
+                if operation == INSERT or position >= depth:
+                    # Updates of levels never inserted (seen after reconnects) insert too
+                    position = min(position, depth)
+                    if depth < self.levels:
+                        depth += 1
+                    prices[position + 1:depth] = prices[position:depth - 1]
+                    sizes[position + 1:depth] = sizes[position:depth - 1]
+                    makers.insert(position, market_maker)
+                    makers.pop()
+                else:
+                    makers[position] = market_maker
+                prices[position] = price
+                sizes[position] = size
+
+            self._depth[side] = depth
+            self._updated = time.time()
+            self._dirty = True
+            self._updates += 1
+        return True
+
+    def snapshot(self, levels: Optional[int] = None) -> DepthEvent:
+        """Top `levels` (default all) of both sides."""
+        with self._lock:
+            return self._snapshot(levels)
+
+    def take_snapshot(self) -> Optional[DepthEvent]:
+        """Snapshot if the book changed since the last call, else None."""
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            return self._snapshot(None)
+
+    def _snapshot(self, levels: Optional[int]) -> DepthEvent:
+        bids = min(self._depth[BID], levels or self.levels)
+        asks = min(self._depth[ASK], levels or self.levels)
+        return DepthEvent(
+            self.req_id, self.symbol,
+            self._prices[BID, :bids].copy(), self._sizes[BID, :bids].copy(),
+            self._prices[ASK, :asks].copy(), self._sizes[ASK, :asks].copy(),
+            tuple(self._makers[BID][:bids]), tuple(self._makers[ASK][:asks]),
+            self._updated,
+        )
+
+    def imbalance(self, levels: Optional[int] = None) -> float:
+        """Size imbalance of the top `levels` (see DepthEvent.imbalance)."""
+        with self._lock:
+            bids = float(self._sizes[BID, :min(self._depth[BID], levels or self.levels)].sum())
+            asks = float(self._sizes[ASK, :min(self._depth[ASK], levels or self.levels)].sum())
+        total = bids + asks
+        return (bids - asks) / total if total else 0.0
+
+    def clear(self):
+        """Drop all levels (e.g. before the line is requested again)."""
+        with self._lock:
+            self._prices[:] = np.nan
+            self._sizes[:] = 0.0
+            self._makers = [[""] * self.levels, [""] * self.levels]
+            self._depth = [0, 0]
+            self._dirty = True
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "bid_levels": self._depth[BID],
+            "ask_levels": self._depth[ASK],
+            "updates": self._updates,
+            "ignored": self._ignored,
+        }
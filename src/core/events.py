@@ -0,0 +1,176 @@
+"""
+Event Records.
+
+Typed records handed from the TWS reader thread to the GUI thread: one
+schema for ticks, quotes, depth, bars, positions, orders, order status and
+executions, shared by IBKRBridge, NautilusBridge and the widgets.
+
+All records are frozen dataclasses with __slots__: no per-instance dict,
+cheaper to allocate than the dicts they replace, and safe to pass between
+threads and consumers without copying. Use dataclasses.replace() to derive
+an updated record.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True, slots=True)
+class TickEvent:
+    """Latest prices of one market data line in a tick batch (None = no tick since the last batch)."""
+
+    req_id: int
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    last: Optional[float] = None
+
+
+@dataclass(frozen=True, slots=True)
+class BarEvent:
+    """One OHLCV bar (live or aggregated)."""
+
+    time: int                  # Bar start, epoch seconds
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+    wap: float = 0.0
+    count: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class PositionEvent:
+    """Position of one contract in one account."""
+
+    account: str
+    symbol: str
+    sec_type: str
+    position: float
+    avg_cost: float
+    con_id: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class OrderEvent:
+    """An open (or just completed) order."""
+
+    order_id: int
+    symbol: str
+    sec_type: str
+    action: str                # BUY / SELL
+    quantity: float
+    order_type: str            # MKT, LMT, STP, ...
+    status: str
+    limit_price: float = 0.0
+    aux_price: float = 0.0
+    tif: str = ""
+    filled: float = 0.0
+    perm_id: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class OrderStatusEvent:
+    """Order status change."""
+
+    order_id: int
+    status: str
+    filled: float
+    remaining: float
+    avg_fill_price: float
+    perm_id: int = 0
+    parent_id: int = 0
+    last_fill_price: float = 0.0
+    client_id: int = 0
+    why_held: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutionEvent:
+    """One fill (partial or complete) of an order."""
+
+    exec_id: str
+    order_id: int
+    symbol: str
+    sec_type: str
+    side: str                  # BOT / SLD
+    shares: float
+    price: float
+    cum_qty: float
+    avg_price: float
+    time: str                  # "yyyymmdd  hh:mm:ss" as sent by TWS
+    exchange: str
+    account: str
+    perm_id: int = 0
+    req_id: int = -1           # -1 for fills of this session, else the reqExecutions reqId
+
+
+@dataclass(frozen=True, slots=True)
+class QuoteEvent:
+    """Consistent L1 snapshot of one market data line (NaN = not received yet)."""
+
+    req_id: int
+    bid: float
+    ask: float
+    last: float
+    bid_size: float
+    ask_size: float
+    last_size: float
+    volume: float              # Session volume as reported by TWS
+    open: float
+    high: float
+    low: float
+    close: float               # Previous session close
+    last_time: float           # Epoch seconds of the last trade
+    updated: float             # Epoch seconds of the latest update to any field
+    halted: bool = False
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2.0
+
+    @property
+    def spread(self) -> float:
+        return self.ask - self.bid
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class DepthEvent:
+    """
+    Snapshot of a market depth book, best level first.
+
+    The arrays are copies owned by the snapshot; sizes of a side sum to
+    that side's visible liquidity.
+    """
+
+    req_id: int
+    symbol: str
+    bid_prices: np.ndarray
+    bid_sizes: np.ndarray
+    ask_prices: np.ndarray
+    ask_sizes: np.ndarray
+    bid_makers: Tuple[str, ...] = ()   # Market maker / exchange per level (L2 only)
+    ask_makers: Tuple[str, ...] = ()
+    updated: float = 0.0               # Epoch seconds of the latest update
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else float("nan")
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else float("nan")
+
+    def cumulative_bid_sizes(self, levels: Optional[int] = None) -> np.ndarray:
+        return np.cumsum(self.bid_sizes[:levels])
+
+    def cumulative_ask_sizes(self, levels: Optional[int] = None) -> np.ndarray:
+        return np.cumsum(self.ask_sizes[:levels])
+
+    def imbalance(self, levels: Optional[int] = None) -> float:
+        """(bid size - ask size) / total over the top `levels` (-1 all asks .. +1 all bids)."""
+        bids = float(self.bid_sizes[:levels].sum())
+        asks = float(self.ask_sizes[:levels].sum())
+        total = bids + asks
+        return (bids - asks) / total if total else 0.0
@@ -0,0 +1,468 @@
+"""
+Feed Process.
+
+Optional mode (USE_FEED_PROCESS=1) that moves the TWS socket and ibapi
+message decoding out of the GUI process, so neither a heavy repaint nor a
+market data burst can hold the other up through the GIL.
+
+The feed process runs a FeedClient that writes every callback as a
+fixed-size record into a ShmRing. In the GUI process FeedProcessBridge
+reads the ring in place every few milliseconds and replays the records
+into an ordinary IBKRClient, so quote books, conflation, depth, history
+and all bridge signals behave exactly as with IBKRBridge. Requests go the
+other way: the GUI-side client encodes them as usual and hands the
+encoded message to the feed process, which only writes it to the socket.
+
+Callbacks with nested objects (contract details, open orders, executions,
+errors, connection state) are pickled through an event queue; an EVENT
+record carrying the event's sequence number marks its place in the ring,
+so all callbacks replay in the order TWS sent them. Events whose EVENT
+record was overwritten before the GUI read it replay late (just before
+the next event, or when the feed process ends), never out of order.
+"""
+import math
+import multiprocessing as mp
+import queue
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from ibapi.client import EClient
+from ibapi.common import BarData, TickAttrib, TickAttribBidAsk, TickAttribLast
+from ibapi.contract import Contract
+from ibapi.wrapper import EWrapper
+from PySide6.QtCore import QTimer, Slot
+
+from .ibkr_bridge import IBKRBridge, IBKRClient
+from .logger import get_logger, setup_logging
+from .shm_ring import ShmRing
+
+log = get_logger("feed")
+
+# Record kinds
+TICK_PRICE = 1       # code = tick type, values = (price,)
+TICK_SIZE = 2        # code = tick type, values = (size,)
+TICK_GENERIC = 3     # code = tick type, values = (value,)
+TICK_STRING = 4      # code = tick type, text = value
+DEPTH = 5            # code = position, flags = operation | side << 2, values = (price, size)
+DEPTH_L2 = 6         # as DEPTH, flags bit 4 = smart depth, text = market maker
+TBT_LAST = 7         # code = tick type, num = time, flags = mask, values = (price, size), text = exchange|conditions
+TBT_BID_ASK = 8      # num = time, flags = mask, values = (bid, ask, bid size, ask size)
+TBT_MIDPOINT = 9     # num = time, values = (midpoint,)
+HISTORICAL_BAR = 10  # text = date, num = bar count, values = (open, high, low, close, volume, wap)
+HISTORICAL_END = 11  # text = start|end
+ORDER_STATUS = 12    # req_id = orderId, code = clientId, num = permId, text = status|whyHeld,
+                     # values = (filled, remaining, avg fill, last fill, parentId, mkt cap price)
+POSITION = 13        # num = conId, values = (position, avg cost), text = account|symbol|secType
+END = 14             # code: 0 = positionEnd, 1 = openOrderEnd, 2 = contractDetailsEnd(req_id)
+EVENT = 15           # req_id = sequence number of the event queue item to replay here
+
+_POSITION_END, _OPEN_ORDER_END, _CONTRACT_DETAILS_END = 0, 1, 2
+
+
+class FeedClient(EWrapper, EClient):
+    """ibapi client of the feed process: every callback becomes a ring record."""
+
+    def __init__(self, ring: ShmRing, events):
+        EWrapper.__init__(self)
+        EClient.__init__(self, wrapper=self)
+        self._ring = ring
+        self._events = events
+        self._event_seq = 0
+
+    def _event(self, method: str, *args):
+        seq = self._event_seq
+        self._event_seq += 1
+        self._events.put((seq, method, args))
+        self._ring.write(EVENT, seq)
+
+    # Rare callbacks (pickled)
+    def error(self, reqId, errorCode, errorString, advancedOrderRejectJson=""):
+        self._event("error", reqId, errorCode, errorString)
+
+    def connectAck(self):
+        self._event("connectAck")
+
+    def nextValidId(self, orderId):
+        self._event("_set_server_version", self.serverVersion())
+        self._event("nextValidId", orderId)
+
+    def managedAccounts(self, accountsList):
+        self._event("managedAccounts", accountsList)
+
+    def connectionClosed(self):
+        self._event("connectionClosed")
+
+    def contractDetails(self, reqId, contractDetails):
+        self._event("contractDetails", reqId, contractDetails)
+
+    def openOrder(self, orderId, contract, order, orderState):
+        self._event("openOrder", orderId, contract, order, orderState)
+
+    def execDetails(self, reqId, contract, execution):
+        self._event("execDetails", reqId, contract, execution)
+
+    # Hot callbacks (fixed-size records)
+    def tickPrice(self, reqId, tickType, price, attrib):
+        self._ring.write(TICK_PRICE, reqId, tickType, values=(price,))
+
+    def tickSize(self, reqId, tickType, size):
+        self._ring.write(TICK_SIZE, reqId, tickType, values=(size,))
+
+    def tickGeneric(self, reqId, tickType, value):
+        self._ring.write(TICK_GENERIC, reqId, tickType, values=(value,))
+
+    def tickString(self, reqId, tickType, value):
+        self._ring.write(TICK_STRING, reqId, tickType, text=value)
+
+    def updateMktDepth(self, reqId, position, operation, side, price, size):
+        self._ring.write(DEPTH, reqId, position, operation | side << 2, values=(price, size))
+
+    def updateMktDepthL2(self, reqId, position, marketMaker, operation, side, price, size, isSmartDepth):
+        flags = operation | side << 2 | bool(isSmartDepth) << 4
+        self._ring.write(DEPTH_L2, reqId, position, flags, values=(price, size), text=marketMaker)
+
+    def tickByTickAllLast(self, reqId, tickType, time, price, size, tickAttribLast, exchange, specialConditions):
+        mask = tickAttribLast.pastLimit | tickAttribLast.unreported << 1
+        self._ring.write(TBT_LAST, reqId, tickType, mask, time, (price, size), f"{exchange}|{specialConditions}")
+
+    def tickByTickBidAsk(self, reqId, time, bidPrice, askPrice, bidSize, askSize, tickAttribBidAsk):
+        mask = tickAttribBidAsk.bidPastLow | tickAttribBidAsk.askPastHigh << 1
+        self._ring.write(TBT_BID_ASK, reqId, 0, mask, time, (bidPrice, askPrice, bidSize, askSize))
+
+    def tickByTickMidPoint(self, reqId, time, midPoint):
+        self._ring.write(TBT_MIDPOINT, reqId, 0, 0, time, (midPoint,))
+
+    def historicalData(self, reqId, bar):
+        wap = getattr(bar, "wap", getattr(bar, "average", math.nan))
+        values = (bar.open, bar.high, bar.low, bar.close, float(bar.volume), float(wap))
+        self._ring.write(HISTORICAL_BAR, reqId, num=int(bar.barCount), values=values, text=bar.date)
+
+    def historicalDataEnd(self, reqId, start, end):
+        self._ring.write(HISTORICAL_END, reqId, text=f"{start}|{end}")
+
+    def orderStatus(self, orderId, status, filled, remaining, avgFillPrice,
+                    permId, parentId, lastFillPrice, clientId, whyHeld, mktCapPrice=0.0):
+        values = (filled, remaining, avgFillPrice, lastFillPrice, parentId, mktCapPrice)
+        self._ring.write(ORDER_STATUS, orderId, clientId, 0, permId, values, f"{status}|{whyHeld}")
+
+    def position(self, account, contract, pos, avgCost):
+        text = f"{account}|{contract.symbol}|{contract.secType}"
+        self._ring.write(POSITION, 0, 0, 0, contract.conId, (float(pos), avgCost), text)
+
+    def positionEnd(self):
+        self._ring.write(END, code=_POSITION_END)
+
+    def openOrderEnd(self):
+        self._ring.write(END, code=_OPEN_ORDER_END)
+
+    def contractDetailsEnd(self, reqId):
+        self._ring.write(END, reqId, _CONTRACT_DETAILS_END)
+
+
+def run_feed(host: str, port: int, client_id: int, ring_name: str, commands, events):
+    """
+    Feed process entry point: connect to TWS and publish until disconnected.
+
+    Commands from the GUI process: ("send", encoded message) and
+    ("disconnect",).
+    """
+    setup_logging()
+    ring = ShmRing.attach(ring_name)
+    client = FeedClient(ring, events)
+    try:
+        client.connect(host, port, client_id)
+        reader = threading.Thread(target=client.run, name="feed-reader", daemon=True)
+        reader.start()
+        while reader.is_alive():
+            try:
+                command = commands.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if command[0] == "send":
+                if client.isConnected():
+                    client.sendMsg(command[1])
+            elif command[0] == "disconnect":
+                client.disconnect()
+                break
+        reader.join(timeout=2.0)
+    except Exception as e:
+        log.error("Feed process error: %s", e)
+        client._event("error", -1, -1, f"Feed process error: {e}")
+    finally:
+        ring.close()
+
+
+class _RemoteClient(IBKRClient):
+    """
+    GUI-side IBKRClient of the feed process mode.
+
+    Requests are encoded by ibapi as usual and sent to the feed process;
+    callbacks are replayed by FeedProcessBridge.
+    """
+
+    def __init__(self, bridge: "FeedProcessBridge", commands):
+        super().__init__(bridge)
+        self._commands = commands
+        self.serverVersion_ = 0
+
+    def isConnected(self):
+        return self._connected
+
+    def _transmit(self, msg):
+        self._commands.put(("send", msg))
+
+    def disconnect(self):
+        self._commands.put(("disconnect",))
+
+    def _set_server_version(self, version: int):
+        self.serverVersion_ = version
+
+
+class FeedProcessBridge(IBKRBridge):
+    """
+    IBKRBridge whose TWS connection lives in a separate feed process.
+
+    Drop-in replacement for IBKRBridge (same signals and methods). Every
+    `poll_ms` the GUI thread drains the shared-memory ring and replays the
+    records; with nothing new this costs one shared-memory read. On a
+    reconnect the new feed process starts once the previous one has exited
+    (it is terminated, then killed, if it does not stop in time); the GUI
+    thread never waits for it.
+    """
+
+    DEFAULT_POLL_MS = 4
+    STOP_TIMEOUT = 2.0  # Seconds a feed process gets to exit before it is terminated, then killed
+
+    def __init__(self, parent=None, poll_ms: int = DEFAULT_POLL_MS,
+                 ring_capacity: int = ShmRing.DEFAULT_CAPACITY, **kwargs):
+        super().__init__(parent, **kwargs)
+        self._ring = ShmRing.create(ring_capacity)
+        self._context = mp.get_context("spawn")  # No fork of a process running Qt threads
+        self._process: Optional[mp.Process] = None
+        self._events = None
+        self._replay: Optional[_RemoteClient] = None  # Receives callbacks until its feed process ends
+        self._starting: Optional[tuple] = None  # (client, host, port, client_id) to start once the process exits
+        self._stop_deadline: Optional[float] = None  # When to escalate stopping the process
+        self._terminated = False
+        self._event_items: Dict[int, tuple] = {}  # Sequence -> (method, args) taken off the event queue
+        self._next_event = 0  # Sequence of the next event to replay
+        self._held: Optional[np.ndarray] = None  # Records from an EVENT whose item has not arrived yet on
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(poll_ms)
+        self._poll_timer.timeout.connect(self._poll)
+        self._replayed = 0
+
+    def _start_client(self, host: str, port: int, client_id: int) -> IBKRClient:
+        """Start a feed process for this connection (after the previous one has exited)."""
+        client = _RemoteClient(self, self._context.Queue())  # Requests queue up until the process runs
+        if self._process is None:
+            self._start_process(client, host, port, client_id)
+        else:
+            # One writer per ring: _poll() starts the new process once the previous one is gone
+            self._starting = (client, host, port, client_id)
+            self._replay.disconnect()
+            if self._stop_deadline is None:
+                self._stop_deadline = time.monotonic() + self.STOP_TIMEOUT
+        self._poll_timer.start()
+        return client
+
+    def _start_process(self, client: "_RemoteClient", host: str, port: int, client_id: int):
+        self._events = self._context.Queue()
+        self._event_items.clear()
+        self._next_event = 0
+        self._held = None
+        self._stop_deadline = None
+        self._terminated = False
+        self._replay = client
+        self._process = self._context.Process(
+            target=run_feed,
+            args=(host, port, client_id, self._ring.name, client._commands, self._events),
+            name="qs-feed",
+            daemon=True,
+        )
+        self._process.start()
+        log.info("Feed process started (pid=%s, ring=%s)", self._process.pid, self._ring.name)
+
+    def _stop_stuck_process(self):
+        """Terminate, then kill, a feed process that was asked to exit and has not (GUI thread, never waits)."""
+        if self._stop_deadline is None or time.monotonic() < self._stop_deadline:
+            return
+        if not self._terminated:
+            log.warning("Previous feed process did not exit; terminating it")
+            self._process.terminate()
+            self._terminated = True
+            self._stop_deadline = time.monotonic() + self.STOP_TIMEOUT
+        else:
+            log.warning("Previous feed process survived terminate(); killing it")
+            self._process.kill()
+            self._stop_deadline = None
+
+    @Slot()
+    def _poll(self):
+        """Replay everything the feed process has published."""
+        replay = self._replay
+        if replay is None:
+            return
+        alive = self._process is not None and self._process.is_alive()
+        held, self._held = self._held, None
+        if held is None or self._dispatch(replay, held, wait=alive):
+            for _ in range(2):  # A wrap-around takes two reads
+                records = self._ring.read()
+                if not len(records) or not self._dispatch(replay, records, wait=alive):
+                    break
+
+        if alive:
+            self._stop_stuck_process()
+        elif self._process is not None and not self._ring.lag and self._held is None:
+            log.info("Feed process exited (code %s)", self._process.exitcode)
+            self._replay_events(replay)  # Events whose records were lost
+            if replay._connected:
+                replay.connectionClosed()  # Died without saying goodbye
+            self._process = None
+            self._replay = None
+            if self._starting is not None:
+                starting, self._starting = self._starting, None
+                self._start_process(*starting)
+            else:
+                self._poll_timer.stop()
+
+    def _dispatch(self, client: IBKRClient, records, wait: bool = True) -> bool:
+        """
+        Call the client's wrapper methods for a run of ring records (GUI thread).
+
+        Stops at an EVENT record whose queue item has not arrived yet and
+        keeps the rest of the run for the next poll (returns False), unless
+        `wait` is False: then missing events are skipped.
+        """
+        kinds = records["kind"].tolist()
+        req_ids = records["req_id"].tolist()
+        codes = records["code"].tolist()
+        values = records["values"].tolist()
+        for i, kind in enumerate(kinds):
+            if kind == TICK_PRICE:
+                client.tickPrice(req_ids[i], codes[i], values[i][0], _TICK_ATTRIB)
+            elif kind == TICK_SIZE:
+                client.tickSize(req_ids[i], codes[i], values[i][0])
+            elif kind == EVENT:
+                if not self._replay_events(client, req_ids[i], wait):
+                    self._held = records[i:].copy()  # The ring may overwrite the view meanwhile
+                    self._replayed += i
+                    return False
+            else:
+                self._dispatch_other(client, kind, records[i], values[i])
+        self._replayed += len(kinds)
+        return True
+
+    def _replay_events(self, client: IBKRClient, seq: Optional[int] = None, wait: bool = False) -> bool:
+        """
+        Replay queued events up to sequence `seq` (None: all received), in order.
+
+        Events before `seq` are the ones whose EVENT records were lost to a
+        ring overrun. Returns False, replaying nothing, if `wait` is set and
+        one of them has not been taken off the queue yet.
+        """
+        items = self._event_items
+        while True:
+            try:
+                event_seq, method, args = self._events.get_nowait()
+            except queue.Empty:
+                break
+            items[event_seq] = (method, args)
+        if seq is None:
+            seq = max(items, default=self._next_event - 1)
+        if seq < self._next_event:
+            return True
+        missing = [s for s in range(self._next_event, seq + 1) if s not in items]
+        if missing and wait:
+            return False
+        if missing:
+            log.error("Feed events %s-%s never arrived; skipping them", missing[0], missing[-1])
+        if seq - self._next_event > len(missing):
+            log.warning("Replaying %s feed events whose ring records were lost", seq - self._next_event - len(missing))
+        for s in range(self._next_event, seq + 1):
+            item = items.pop(s, None)
+            if item is not None:
+                getattr(client, item[0])(*item[1])
+        self._next_event = seq + 1
+        return True
+
+    @staticmethod
+    def _dispatch_other(client: IBKRClient, kind: int, record, values: list):
+        req_id = int(record["req_id"])
+        code = int(record["code"])
+        flags = int(record["flags"])
+        text = record["text"].decode("utf-8", "replace")
+        if kind == TICK_GENERIC:
+            client.tickGeneric(req_id, code, values[0])
+        elif kind == TICK_STRING:
+            client.tickString(req_id, code, text)
+        elif kind == DEPTH:
+            client.updateMktDepth(req_id, code, flags & 3, flags >> 2 & 1, values[0], values[1])
+        elif kind == DEPTH_L2:
+            client.updateMktDepthL2(req_id, code, text, flags & 3, flags >> 2 & 1, values[0], values[1],
+                                    bool(flags & 16))
+        elif kind == TBT_LAST:
+            attrib = TickAttribLast()
+            attrib.pastLimit, attrib.unreported = bool(flags & 1), bool(flags & 2)
+            exchange, _, conditions = text.partition("|")
+            client.tickByTickAllLast(req_id, code, int(record["num"]), values[0], values[1], attrib,
+                                     exchange, conditions)
+        elif kind == TBT_BID_ASK:
+            attrib = TickAttribBidAsk()
+            attrib.bidPastLow, attrib.askPastHigh = bool(flags & 1), bool(flags & 2)
+            client.tickByTickBidAsk(req_id, int(record["num"]), *values[:4], attrib)
+        elif kind == TBT_MIDPOINT:
+            client.tickByTickMidPoint(req_id, int(record["num"]), values[0])
+        elif kind == HISTORICAL_BAR:
+            bar = BarData()
+            bar.date = text
+            bar.open, bar.high, bar.low, bar.close, bar.volume, bar.average = values
+            bar.barCount = int(record["num"])
+            client.historicalData(req_id, bar)
+        elif kind == HISTORICAL_END:
+            start, _, end = text.partition("|")
+            client.historicalDataEnd(req_id, start, end)
+        elif kind == ORDER_STATUS:
+            status, _, why_held = text.partition("|")
+            filled, remaining, avg_fill, last_fill, parent_id, mkt_cap = values
+            client.orderStatus(req_id, status, filled, remaining, avg_fill, int(record["num"]),
+                               int(parent_id), last_fill, code, why_held, mkt_cap)
+        elif kind == POSITION:
+            account, symbol, sec_type = text.split("|")
+            contract = Contract()
+            contract.symbol, contract.secType, contract.conId = symbol, sec_type, int(record["num"])
+            client.position(account, contract, values[0], values[1])
+        elif kind == END:
+            if code == _POSITION_END:
+                client.positionEnd()
+            elif code == _OPEN_ORDER_END:
+                client.openOrderEnd()
+            else:
+                client.contractDetailsEnd(req_id)
+
+    @property
+    def feed_stats(self) -> dict:
+        """Ring counters plus the number of replayed records."""
+        return {
+            **self._ring.stats,
+            "replayed": self._replayed,
+            "process_alive": self._process is not None and self._process.is_alive(),
+        }
+
+    def close(self):
+        """Stop the feed process and free the ring (at application exit)."""
+        self._poll_timer.stop()
+        self._starting = None
+        if self._process is not None and self._process.is_alive():
+            self._replay.disconnect()
+            self._process.join(timeout=self.STOP_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+        self._ring.close()
+
+
+_TICK_ATTRIB = TickAttrib()  # tickPrice attributes are not used by the bridge
@@ -0,0 +1,381 @@
+"""
+Historical Data Scheduler.
+
+Queues historical bar requests and sends them to TWS as fast as IB's pacing
+rules allow. Identical requests are merged, urgent requests (the chart) jump
+ahead of bulk backfills, and every request gets a future that resolves with
+its bars.
+"""
+import heapq
+import itertools
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal, Slot
+
+from .bar_store import BAR_DTYPE, BarStore
+from .logger import get_logger
+from .pacing import PacingLimiter
+from .req_ids import HISTORY_REQ_IDS, ReqIdRange
+
+log = get_logger("history")
+
+# Priorities (lower runs first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+
+class HistoryRequestError(Exception):
+    """A historical data request failed or was cancelled."""
+
+    def __init__(self, message: str, code: int = -1):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass(frozen=True)
+class HistoryRequest:
+    """Parameters of one reqHistoricalData call."""
+
+    symbol: str
+    duration: str = "1 D"
+    bar_size: str = "5 mins"
+    what_to_show: str = "TRADES"
+    end_time: str = ""  # "" = now
+    use_rth: bool = True
+
+    @property
+    def contract_key(self) -> Tuple[str, str]:
+        """Key of IB's same-contract burst rule."""
+        return (self.symbol.upper(), self.what_to_show.upper())
+
+
+class HistoryJob:
+    """
+    Handle of a scheduled request.
+
+    Identical submissions share one job. `future` resolves with a BAR_DTYPE
+    array, or raises HistoryRequestError.
+    """
+
+    def __init__(self, request: HistoryRequest, priority: int):
+        self.request = request
+        self.priority = priority
+        self.future: Future = Future()
+        self.req_id: Optional[int] = None
+        self.attempts = 0
+        self._chunks: List[np.ndarray] = []
+        self.bars_received = 0
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> np.ndarray:
+        return self.future.result(timeout)
+
+    def __repr__(self):
+        return f"HistoryJob({self.request.symbol} {self.request.duration} {self.request.bar_size}, reqId={self.req_id})"
+
+
+class HistoryScheduler(QObject):
+    """
+    Pacing-aware queue in front of IBKRBridge.request_historical_data.
+
+    Requests wait in a priority queue and are sent when PacingLimiter has a
+    token for them; a single-shot timer wakes the scheduler when the next one
+    becomes eligible. Requests blocked only by a per-contract rule do not hold
+    up other symbols. Pacing violations reported by TWS put the request back
+    in the queue and pause sending. Runs on the GUI thread.
+    """
+
+    # Signals
+    request_started = Signal(object)        # HistoryJob
+    request_progress = Signal(object, int)  # HistoryJob, bars received so far (long requests)
+    request_finished = Signal(object)       # HistoryJob (future holds the bars)
+    request_failed = Signal(object, str)    # HistoryJob, reason
+    queue_drained = Signal()                # Nothing queued or in flight
+
+    DEFAULT_FIRST_REQ_ID, DEFAULT_REQ_ID_COUNT = HISTORY_REQ_IDS
+    MAX_IN_FLIGHT = 10
+    PACING_BACKOFF_S = 30.0
+    REQUEST_TIMEOUT_S = 120.0
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        bridge,
+        parent=None,
+        store: Optional[BarStore] = None,
+        limiter: Optional[PacingLimiter] = None,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        first_req_id: int = DEFAULT_FIRST_REQ_ID,
+        req_id_count: int = DEFAULT_REQ_ID_COUNT,
+    ):
+        super().__init__(parent)
+        self._bridge = bridge
+        self._store = store
+        self._limiter = limiter or PacingLimiter()
+        self._max_in_flight = max_in_flight
+        self._req_ids = ReqIdRange(first_req_id, req_id_count)
+        self._seq = itertools.count()
+        self._front_seq = itertools.count(1)  # Requeued jobs sort before every submitted one
+
+        self._queue: List[Tuple[int, int, HistoryJob]] = []  # (priority, seq, job) heap
+        self._jobs: Dict[HistoryRequest, HistoryJob] = {}    # Queued or in flight
+        self._in_flight: Dict[int, HistoryJob] = {}          # reqId -> job
+        self._sent_at: Dict[int, float] = {}                 # reqId -> limiter time
+
+        # Counters
+        self._submitted = 0
+        self._deduplicated = 0
+        self._sent = 0
+        self._completed = 0
+        self._failed = 0
+        self._pacing_violations = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._dispatch)
+
+        bridge.historical_bars_received.connect(self._on_bars)
+        bridge.request_error.connect(self._on_request_error)
+        bridge.connected.connect(self._dispatch)
+        bridge.disconnected.connect(self._on_disconnected)
+
+    @property
+    def store(self) -> Optional[BarStore]:
+        """BarStore that completed requests are merged into (if any)."""
+        return self._store
+
+    @property
+    def limiter(self) -> PacingLimiter:
+        return self._limiter
+
+    def submit(self, request: HistoryRequest, priority: int = PRIORITY_NORMAL) -> HistoryJob:
+        """
+        Queue a request.
+
+        Args:
+            request: Request parameters
+            priority: PRIORITY_HIGH / PRIORITY_NORMAL / PRIORITY_LOW (lower runs first)
+
+        Returns:
+            The job; an identical queued or in-flight request is reused
+        """
+        self._submitted += 1
+        job = self._jobs.get(request)
+        if job is not None:
+            self._deduplicated += 1
+            if priority < job.priority and job.req_id is None:
+                job.priority = priority  # Promote; the old heap entry goes stale
+                heapq.heappush(self._queue, (priority, next(self._seq), job))
+                self._schedule(0)
+            return job
+
+        job = HistoryJob(request, priority)
+        self._jobs[request] = job
+        heapq.heappush(self._queue, (priority, next(self._seq), job))
+        self._schedule(0)
+        return job
+
+    def submit_many(self, requests: Iterable[HistoryRequest], priority: int = PRIORITY_LOW) -> List[HistoryJob]:
+        """Queue a bulk backfill. Returns one job per request."""
+        return [self.submit(request, priority) for request in requests]
+
+    def cancel(self, job: HistoryJob):
+        """Cancel a queued or in-flight request."""
+        if job.done:
+            return
+        if job.req_id is not None:
+            self._in_flight.pop(job.req_id, None)
+            self._sent_at.pop(job.req_id, None)
+            self._bridge.cancel_historical_data(job.req_id)
+        self._jobs.pop(job.request, None)
+        if not job.future.cancel():
+            job.future.set_exception(HistoryRequestError("cancelled"))
+        self._schedule(0)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._jobs) - len(self._in_flight)
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def stats(self) -> dict:
+        """Scheduler counters."""
+        return {
+            "submitted": self._submitted,
+            "deduplicated": self._deduplicated,
+            "sent": self._sent,
+            "completed": self._completed,
+            "failed": self._failed,
+            "pacing_violations": self._pacing_violations,
+            "queued": self.queued_count,
+            "in_flight": self.in_flight_count,
+            "tokens": self._limiter.available(),
+        }
+
+    # Dispatch
+    def _schedule(self, delay_s: float):
+        """Wake the dispatcher after `delay_s` unless it wakes earlier anyway."""
+        delay_ms = max(0, int(delay_s * 1000) + 1) if delay_s > 0 else 0
+        if self._timer.isActive() and self._timer.remainingTime() <= delay_ms:
+            return
+        self._timer.start(delay_ms)
+
+    @Slot()
+    def _dispatch(self):
+        """Send every queued request the pacing rules allow right now."""
+        now = self._limiter.now()
+        self._expire_timeouts(now)
+        if not self._bridge.is_connected:
+            return  # Resumed by bridge.connected
+
+        deferred = []
+        next_wake = None
+        while self._queue and len(self._in_flight) < self._max_in_flight:
+            global_wait = self._limiter.delay(now=now)
+            if global_wait > 0:
+                next_wake = global_wait
+                break
+            priority, seq, job = heapq.heappop(self._queue)
+            if job.done or job.req_id is not None or priority != job.priority:
+                continue  # Stale heap entry
+            wait = self._limiter.delay(job.request, job.request.contract_key, now)
+            if wait > 0:
+                # Blocked by a per-request rule only; let other symbols through
+                deferred.append((priority, seq, job))
+                next_wake = wait if next_wake is None else min(next_wake, wait)
+                continue
+            self._send(job, now)
+
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+        if self._in_flight:
+            oldest = min(self._sent_at.values())
+            timeout_wait = oldest + self.REQUEST_TIMEOUT_S - now
+            next_wake = timeout_wait if next_wake is None else min(next_wake, timeout_wait)
+        if next_wake is not None:
+            self._schedule(max(next_wake, 0.001))
+        elif not self._jobs:
+            self.queue_drained.emit()
+
+    def _send(self, job: HistoryJob, now: float):
+        if not job.future.running() and not job.future.set_running_or_notify_cancel():
+            self._jobs.pop(job.request, None)
+            return
+        request = job.request
+        req_id = self._req_ids.next(self._in_flight)
+        sent = self._bridge.request_historical_data(
+            request.symbol, req_id, request.duration, request.bar_size,
+            request.what_to_show, request.end_time, request.use_rth,
+        )
+        if sent != req_id:
+            self._fail(job, "request rejected by bridge")
+            return
+        job.req_id = req_id
+        job.attempts += 1
+        job._chunks = []
+        job.bars_received = 0
+        self._in_flight[req_id] = job
+        self._sent_at[req_id] = now
+        self._limiter.record(request, request.contract_key)  # Actual send time
+        self._sent += 1
+        self.request_started.emit(job)
+
+    def _requeue(self, job: HistoryJob):
+        """Put an in-flight job back at the front of its priority."""
+        if job.req_id is not None:
+            self._in_flight.pop(job.req_id, None)
+            self._sent_at.pop(job.req_id, None)
+        job.req_id = None
+        heapq.heappush(self._queue, (job.priority, -next(self._front_seq), job))
+
+    def _expire_timeouts(self, now: float):
+        for req_id, sent_at in list(self._sent_at.items()):
+            if now - sent_at >= self.REQUEST_TIMEOUT_S:
+                job = self._in_flight[req_id]
+                log.warning("Historical request timed out: %s", job)
+                self._bridge.cancel_historical_data(req_id)
+                self._fail(job, "timed out")
+
+    # Completion
+    def _finish(self, job: HistoryJob):
+        self._in_flight.pop(job.req_id, None)
+        self._sent_at.pop(job.req_id, None)
+        self._jobs.pop(job.request, None)
+        if len(job._chunks) == 1:
+            bars = job._chunks[0]
+        elif job._chunks:
+            bars = np.concatenate(job._chunks)
+        else:
+            bars = np.empty(0, dtype=BAR_DTYPE)
+        job._chunks = []
+        request = job.request
+        if self._store is not None:
+            self._store.merge(
+                request.symbol, request.bar_size, request.what_to_show, bars,
+                synced=not request.end_time,
+            )
+        self._completed += 1
+        job.future.set_result(bars)
+        self.request_finished.emit(job)
+        self._schedule(0)
+
+    def _fail(self, job: HistoryJob, reason: str, code: int = -1):
+        if job.req_id is not None:
+            self._in_flight.pop(job.req_id, None)
+            self._sent_at.pop(job.req_id, None)
+        self._jobs.pop(job.request, None)
+        self._failed += 1
+        if not job.future.done():
+            job.future.set_exception(HistoryRequestError(reason, code))
+        self.request_failed.emit(job, reason)
+        self._schedule(0)
+
+    @Slot(int, object, bool)
+    def _on_bars(self, req_id: int, bars: np.ndarray, final: bool):
+        job = self._in_flight.get(req_id)
+        if job is None:
+            return
+        if len(bars):
+            job._chunks.append(bars)
+            job.bars_received += len(bars)
+        if final:
+            self._finish(job)
+        else:
+            self.request_progress.emit(job, job.bars_received)
+
+    @Slot(int, int, str)
+    def _on_request_error(self, req_id: int, code: int, message: str):
+        job = self._in_flight.get(req_id)
+        if job is None:
+            return
+        text = message.lower()
+        if "pacing violation" in text:
+            self._pacing_violations += 1
+            log.warning("Pacing violation, pausing %ss: %s", self.PACING_BACKOFF_S, job)
+            self._limiter.block(self.PACING_BACKOFF_S)
+            if job.attempts < self.MAX_ATTEMPTS:
+                self._requeue(job)
+                self._schedule(self.PACING_BACKOFF_S)
+            else:
+                self._fail(job, message, code)
+        elif "returned no data" in text:
+            self._finish(job)  # Nothing new in the window
+        else:
+            self._fail(job, message, code)
+
+    @Slot()
+    def _on_disconnected(self):
+        """Requests in flight are lost with the connection; send them again later."""
+        for job in list(self._in_flight.values()):
+            self._requeue(job)
@@ -5,10 +5,31 @@ Wraps the official IB API for Qt integration, providing signals for connection s
 Uses thread-safe signal emission via QueuedConnection.
 """
 import threading
-from typing import Optional, List
-from PySide6.QtCore import QObject, Signal, Slot, Qt, QThread
+from typing import Any, Callable, Dict, Iterable, Optional, List
+from PySide6.QtCore import QObject, QTimer, Signal, Slot, Qt, QThread
 from ibapi.client import EClient
 from ibapi.wrapper import EWrapper
+from ibapi.common import UNSET_DOUBLE
+
+from .tick_conflator import TickConflator
+from .bar_store import BarBuffer
+from .contract_cache import ContractCache, default_contract
+from .events import PositionEvent, OrderEvent, OrderStatusEvent, ExecutionEvent, QuoteEvent
+from .quote_book import QuoteBook
+from .depth_book import DepthBook
+from .tick_by_tick import TickByTickStore, TickRing
+from .latency import StampedQueue, now_ns, tracker as latency
+from .pacing import MessageThrottle
+from .req_ids import ORDER_ID_FLOOR
+from .logger import get_logger, ThrottledLogger
+
+log = get_logger("ibkr")
+tick_log = ThrottledLogger(get_logger("ibkr.ticks"))  # Hot path: at most 1 record/s per reqId
+
+
+def _or_zero(value: float) -> float:
+    """0.0 for ibapi's "not set" double."""
+    return 0.0 if value == UNSET_DOUBLE else float(value)
 
 
 class IBKRClient(EWrapper, EClient):
@@ -19,43 +40,78 @@ class IBKRClient(EWrapper, EClient):
     def __init__(self, bridge: 'IBKRBridge'):
         EWrapper.__init__(self)
         EClient.__init__(self, wrapper=self)
+        self.msg_queue = StampedQueue()  # Socket read times for latency tracking
         self._bridge = bridge
         self.nextOrderId = None
+        self._order_id_lock = threading.Lock()  # nextValidId (reader thread) vs allocation (any thread)
         self.accounts: List[str] = []
         self._connected = False
+        self._history_buffers: Dict[int, BarBuffer] = {}  # reqId -> bars (reader thread only)
+        
+    def sendMsg(self, msg):
+        """Send an encoded request through the bridge's outgoing message throttle."""
+        if not self._bridge._throttle.submit(msg, self._transmit):
+            self._bridge._throttle_queued.emit()
+            
+    def _transmit(self, msg):
+        """Write an encoded request to the connection (subclasses change the transport)."""
+        if self.conn is None:
+            log.debug("Dropped a queued request: connection closed")
+            return
+        EClient.sendMsg(self, msg)
         
     def error(self, reqId, errorCode, errorString, advancedOrderRejectJson=""):
         """Handle errors from TWS."""
-        print(f"[IBKR] Error {errorCode}: {errorString}")
         if errorCode in [2104, 2106, 2158]:
             # Info messages about data farm connections
-            pass
+            log.info("Info %s: %s", errorCode, errorString)
         else:
+            log.error("Error %s: %s", errorCode, errorString, extra={"fields": {"reqId": reqId}})
             # Use thread-safe signal emission
             self._bridge._emit_error(errorCode, errorString)
+            if reqId >= ORDER_ID_FLOOR:
+                # Order IDs start above every reqId range (see req_ids)
+                self._bridge._emit_order_error(reqId, errorCode, errorString)
+            elif reqId >= 0:
+                if errorCode < 2000:  # 2xxx are warnings; the request goes on
+                    self._history_buffers.pop(reqId, None)
+                self._bridge._emit_request_error(reqId, errorCode, errorString)
             
     def connectAck(self):
         """Called when connection is acknowledged."""
-        print("[IBKR] Connection acknowledged")
+        log.info("Connection acknowledged")
         
     def nextValidId(self, orderId):
         """Called when connection is complete."""
-        print(f"[IBKR] Connected! Order ID: {orderId}")
-        self.nextOrderId = orderId
+        log.info("Connected! Order ID: %s", orderId)
+        with self._order_id_lock:
+            # Never go back: reqIds() answers may lag behind IDs already handed out.
+            # Order IDs stay above the reqId ranges, so their errors cannot be mistaken
+            orderId = max(orderId, ORDER_ID_FLOOR)
+            self.nextOrderId = orderId if self.nextOrderId is None else max(self.nextOrderId, orderId)
         self._connected = True
         # Use thread-safe signal emission
         self._bridge._emit_connected()
         
+    def allocate_order_ids(self, count: int = 1) -> int:
+        """Reserve `count` consecutive order IDs; returns the first."""
+        with self._order_id_lock:
+            if self.nextOrderId is None:
+                raise RuntimeError("No valid order ID received yet")
+            first = self.nextOrderId
+            self.nextOrderId += count
+            return first
+        
     def managedAccounts(self, accountsList):
         """Called with list of managed accounts."""
         self.accounts = accountsList.split(',')
-        print(f"[IBKR] Accounts: {self.accounts}")
+        log.info("Accounts: %s", self.accounts)
         # Use thread-safe signal emission
         self._bridge._emit_accounts(self.accounts)
         
     def connectionClosed(self):
         """Called when connection is closed."""
-        print("[IBKR] Connection closed")
+        log.info("Connection closed")
         self._connected = False
         # Use thread-safe signal emission
         self._bridge._emit_disconnected()
@@ -64,74 +120,131 @@ class IBKRClient(EWrapper, EClient):
         """Called when price tick is received."""
         # Real-time: 1=bid, 2=ask, 4=last
         # Delayed: 66=bid, 67=ask, 68=last
+        stamp = self.msg_queue.last_stamp  # 0 unless latency tracking is on
+        if stamp:
+            latency.record_since("decode", stamp)
+        self._bridge._quotes.update_price(reqId, tickType, price)
         if tickType in [4, 68]:  # Last price (real-time or delayed)
-            print(f"[IBKR] Last Price {reqId}: ${price:.2f}")
-            self._bridge._emit_price(reqId, price)
+            tick_log.debug(reqId, "Last Price %s: $%.2f", reqId, price)
+            self._bridge._conflator.update(reqId, "last", price, stamp)
         elif tickType in [1, 66]:  # Bid
-            self._bridge._emit_bid(reqId, price)
+            self._bridge._conflator.update(reqId, "bid", price, stamp)
         elif tickType in [2, 67]:  # Ask
-            self._bridge._emit_ask(reqId, price)
+            self._bridge._conflator.update(reqId, "ask", price, stamp)
             
     def tickSize(self, reqId, tickType, size):
         """Called when size tick is received."""
-        pass
+        if self._bridge._quotes.update_size(reqId, tickType, size):
+            self._bridge._conflator.touch()
         
     def tickGeneric(self, reqId, tickType, value):
         """Called for generic market data."""
-        pass
+        if self._bridge._quotes.update_generic(reqId, tickType, value):
+            self._bridge._conflator.touch()
+            
+    def tickString(self, reqId, tickType, value):
+        """Called for string market data (last trade time)."""
+        self._bridge._quotes.update_string(reqId, tickType, value)
+        
+    def updateMktDepth(self, reqId, position, operation, side, price, size):
+        """Called with an exchange depth update."""
+        book = self._bridge._depth_books.get(reqId)
+        if book is not None and book.apply(position, operation, side, price, size):
+            self._bridge._conflator.touch()
+            
+    def updateMktDepthL2(self, reqId, position, marketMaker, operation, side, price, size, isSmartDepth):
+        """Called with a depth update of an aggregated (SMART) or market maker book."""
+        book = self._bridge._depth_books.get(reqId)
+        if book is not None and book.apply(position, operation, side, price, size, marketMaker):
+            self._bridge._conflator.touch()
+            
+    def tickByTickAllLast(self, reqId, tickType, time, price, size, tickAttribLast, exchange, specialConditions):
+        """Called with one trade of a Last / AllLast tick-by-tick stream."""
+        ring = self._bridge._tick_by_tick.get(reqId)
+        if ring is not None:
+            flags = tickAttribLast.pastLimit | tickAttribLast.unreported << 1
+            ring.append(time, price, size, flags=flags)
+            self._bridge._conflator.touch()
+            
+    def tickByTickBidAsk(self, reqId, time, bidPrice, askPrice, bidSize, askSize, tickAttribBidAsk):
+        """Called with one quote of a BidAsk tick-by-tick stream."""
+        ring = self._bridge._tick_by_tick.get(reqId)
+        if ring is not None:
+            flags = tickAttribBidAsk.bidPastLow | tickAttribBidAsk.askPastHigh << 1
+            ring.append(time, bid=bidPrice, ask=askPrice, bid_size=bidSize, ask_size=askSize, flags=flags)
+            self._bridge._conflator.touch()
+            
+    def tickByTickMidPoint(self, reqId, time, midPoint):
+        """Called with one midpoint of a MidPoint tick-by-tick stream."""
+        ring = self._bridge._tick_by_tick.get(reqId)
+        if ring is not None:
+            ring.append(time, midPoint)
+            self._bridge._conflator.touch()
         
     def historicalData(self, reqId, bar):
-        """Called with historical bar data."""
-        self._bridge._emit_historical_bar(reqId, bar)
+        """Called with historical bar data (collected, not emitted per bar)."""
+        buffer = self._history_buffers.get(reqId)
+        if buffer is None:
+            buffer = self._history_buffers[reqId] = BarBuffer()
+        buffer.append_bar(bar)
+        chunk_size = self._bridge.history_chunk_size
+        if chunk_size and len(buffer) >= chunk_size:
+            self._bridge._emit_historical_bars(reqId, buffer.take(), False)
         
     def historicalDataEnd(self, reqId, start, end):
         """Called when historical data is complete."""
-        print(f"[IBKR] Historical data complete for reqId={reqId}")
+        buffer = self._history_buffers.pop(reqId, None)
+        bars = buffer.take() if buffer is not None else BarBuffer(0).take()
+        log.debug("Historical data complete for reqId=%s (%s bars in last batch)", reqId, len(bars))
+        self._bridge._emit_historical_bars(reqId, bars, True)
+        self._bridge._emit_historical_end(reqId, start, end)
+        
+    def contractDetails(self, reqId, contractDetails):
+        """Called with one contract matching reqContractDetails."""
+        self._bridge._emit_contract_details(reqId, contractDetails)
+        
+    def contractDetailsEnd(self, reqId):
+        """Called when all matching contracts were sent."""
+        self._bridge._emit_contract_details_end(reqId)
         
     def position(self, account, contract, pos, avgCost):
         """Called with position data."""
-        position_data = {
-            "account": account,
-            "symbol": contract.symbol,
-            "secType": contract.secType,
-            "position": pos,
-            "avgCost": avgCost,
-        }
-        self._bridge._emit_position(position_data)
+        self._bridge._emit_position(PositionEvent(
+            account, contract.symbol, contract.secType, float(pos), avgCost, contract.conId,
+        ))
         
     def positionEnd(self):
         """Called when position data is complete."""
-        print("[IBKR] Position data complete")
+        log.info("Position data complete")
         self._bridge._emit_position_end()
         
     def openOrder(self, orderId, contract, order, orderState):
         """Called with open order data."""
-        order_data = {
-            "orderId": orderId,
-            "symbol": contract.symbol,
-            "secType": contract.secType,
-            "action": order.action,
-            "quantity": order.totalQuantity,
-            "orderType": order.orderType,
-            "status": orderState.status,
-        }
-        self._bridge._emit_order(order_data)
+        self._bridge._emit_order(OrderEvent(
+            orderId, contract.symbol, contract.secType, order.action, _or_zero(order.totalQuantity),
+            order.orderType, orderState.status, _or_zero(order.lmtPrice), _or_zero(order.auxPrice),
+            order.tif, _or_zero(order.filledQuantity), order.permId,
+        ))
         
     def openOrderEnd(self):
         """Called when open order data is complete."""
-        print("[IBKR] Open orders complete")
+        log.info("Open orders complete")
         
     def orderStatus(self, orderId, status, filled, remaining, avgFillPrice, 
                     permId, parentId, lastFillPrice, clientId, whyHeld, mktCapPrice):
         """Called when order status changes."""
-        status_data = {
-            "orderId": orderId,
-            "status": status,
-            "filled": filled,
-            "remaining": remaining,
-            "avgFillPrice": avgFillPrice,
-        }
-        self._bridge._emit_order_status(status_data)
+        self._bridge._emit_order_status(OrderStatusEvent(
+            orderId, status, float(filled), float(remaining), avgFillPrice,
+            permId, parentId, lastFillPrice, clientId, whyHeld,
+        ))
+        
+    def execDetails(self, reqId, contract, execution):
+        """Called for every fill."""
+        self._bridge._emit_execution(ExecutionEvent(
+            execution.execId, execution.orderId, contract.symbol, contract.secType, execution.side,
+            float(execution.shares), execution.price, float(execution.cumQty), execution.avgPrice,
+            execution.time, execution.exchange, execution.acctNumber, execution.permId, reqId,
+        ))
 
 
 class IBKRBridge(QObject):
@@ -140,6 +253,7 @@ class IBKRBridge(QObject):
     
     Provides signals for connection status and events.
     Uses thread-safe signal emission via internal signals with QueuedConnection.
+    Price ticks are conflated per reqId and delivered once per frame interval.
     """
     
     # Signals (these are emitted from the main thread via _emit_* methods)
@@ -148,58 +262,111 @@ class IBKRBridge(QObject):
     connection_status_changed = Signal(str)  # "connected", "disconnected", "connecting"
     accounts_received = Signal(list)  # List of account IDs
     error_occurred = Signal(int, str)  # Error code, message
+    request_error = Signal(int, int, str)  # reqId, error code, message (request-specific errors)
+    order_error = Signal(int, int, str)    # orderId, error code, message (order rejections and warnings)
     
     # Market data signals
     price_received = Signal(int, float)  # reqId, last price
     bid_received = Signal(int, float)    # reqId, bid price
     ask_received = Signal(int, float)    # reqId, ask price
+    ticks_received = Signal(object)      # reqId -> TickEvent (one batch per frame)
+    quotes_received = Signal(object)     # reqId -> QuoteEvent of the lines changed this frame
+    depth_received = Signal(object)      # reqId -> DepthEvent of the books changed this frame
+    tick_by_tick_received = Signal(object)  # reqId -> records appended this frame (read them from the ring)
     
     # Historical data signals
-    historical_bar_received = Signal(int, object)  # reqId, bar data
+    historical_bars_received = Signal(int, object, bool)  # reqId, BAR_DTYPE array, final batch
+    historical_data_end = Signal(int, str, str)    # reqId, start, end
+    
+    # Contract signals
+    contract_details_received = Signal(int, object)  # reqId, ibapi ContractDetails
+    contract_details_end = Signal(int)               # reqId
     
     # Position signals
-    position_received = Signal(dict)  # Position data
+    position_received = Signal(object)  # PositionEvent
     positions_complete = Signal()     # All positions received
     
     # Order signals
-    order_received = Signal(dict)       # Order data
-    order_status_received = Signal(dict)  # Order status update
+    order_received = Signal(object)         # OrderEvent
+    order_status_received = Signal(object)  # OrderStatusEvent
+    execution_received = Signal(object)     # ExecutionEvent
     
     # Internal thread-safe signals
     _internal_connected = Signal()
     _internal_disconnected = Signal()
     _internal_accounts = Signal(list)
     _internal_error = Signal(int, str)
-    _internal_price = Signal(int, float)
-    _internal_bid = Signal(int, float)
-    _internal_ask = Signal(int, float)
-    _internal_historical_bar = Signal(int, object)
-    _internal_position = Signal(dict)
+    _internal_request_error = Signal(int, int, str)
+    _internal_order_error = Signal(int, int, str)
+    _internal_historical_bars = Signal(int, object, bool)
+    _internal_historical_end = Signal(int, str, str)
+    _internal_contract_details = Signal(int, object)
+    _internal_contract_details_end = Signal(int)
+    _internal_position = Signal(object)
     _internal_position_end = Signal()
-    _internal_order = Signal(dict)
-    _internal_order_status = Signal(dict)
+    _internal_order = Signal(object)
+    _internal_order_status = Signal(object)
+    _internal_execution = Signal(object)
+    _throttle_queued = Signal()  # A request is waiting for the message throttle
     
-    def __init__(self, parent=None):
+    # Historical requests longer than this are streamed in chunks (0 = one batch)
+    DEFAULT_HISTORY_CHUNK_SIZE = 5000
+    
+    # How _emit_* reaches the GUI thread (subclasses that call back on the GUI thread use DirectConnection)
+    INTERNAL_CONNECTION = Qt.QueuedConnection
+    
+    def __init__(
+        self,
+        parent=None,
+        tick_interval_ms: int = 50,
+        history_chunk_size: int = DEFAULT_HISTORY_CHUNK_SIZE,
+        tick_by_tick: Optional[TickByTickStore] = None,
+    ):
         super().__init__(parent)
         self._client: Optional[IBKRClient] = None
         self._thread: Optional[threading.Thread] = None
         self._host = "127.0.0.1"
         self._port = 7497
         self._client_id = 1
-        
-        # Connect internal signals with QueuedConnection for thread safety
-        self._internal_connected.connect(self._on_internal_connected, Qt.QueuedConnection)
-        self._internal_disconnected.connect(self._on_internal_disconnected, Qt.QueuedConnection)
-        self._internal_accounts.connect(self._on_internal_accounts, Qt.QueuedConnection)
-        self._internal_error.connect(self._on_internal_error, Qt.QueuedConnection)
-        self._internal_price.connect(self._on_internal_price, Qt.QueuedConnection)
-        self._internal_bid.connect(self._on_internal_bid, Qt.QueuedConnection)
-        self._internal_ask.connect(self._on_internal_ask, Qt.QueuedConnection)
-        self._internal_historical_bar.connect(self._on_internal_historical_bar, Qt.QueuedConnection)
-        self._internal_position.connect(self._on_internal_position, Qt.QueuedConnection)
-        self._internal_position_end.connect(self._on_internal_position_end, Qt.QueuedConnection)
-        self._internal_order.connect(self._on_internal_order, Qt.QueuedConnection)
-        self._internal_order_status.connect(self._on_internal_order_status, Qt.QueuedConnection)
+        self.history_chunk_size = history_chunk_size  # Read by the reader thread
+        self._contract_cache: Optional[ContractCache] = None
+        
+        # Conflate price ticks from the reader thread into one batch per frame
+        self._conflator = TickConflator(tick_interval_ms, self)
+        self._conflator.ticks_flushed.connect(self._on_ticks_flushed)
+        
+        # Full L1 state per line, written by the reader thread
+        self._quotes = QuoteBook()
+        self._depth_books: Dict[int, DepthBook] = {}  # reqId -> L2 book (read by the reader thread)
+        # Tick-by-tick rings, spilling to the on-disk journal (appended by the reader thread)
+        self._tick_by_tick = tick_by_tick if tick_by_tick is not None else TickByTickStore()
+        
+        # Connect internal signals (QueuedConnection by default, for thread safety)
+        connection = self.INTERNAL_CONNECTION
+        self._internal_connected.connect(self._on_internal_connected, connection)
+        self._internal_disconnected.connect(self._on_internal_disconnected, connection)
+        self._internal_accounts.connect(self._on_internal_accounts, connection)
+        self._internal_error.connect(self._on_internal_error, connection)
+        self._internal_request_error.connect(self._on_internal_request_error, connection)
+        self._internal_order_error.connect(self.order_error, connection)
+        self._internal_historical_bars.connect(self._on_internal_historical_bars, connection)
+        self._internal_historical_end.connect(self._on_internal_historical_end, connection)
+        self._internal_contract_details.connect(self._on_internal_contract_details, connection)
+        self._internal_contract_details_end.connect(self._on_internal_contract_details_end, connection)
+        self._internal_position.connect(self._on_internal_position, connection)
+        self._internal_position_end.connect(self._on_internal_position_end, connection)
+        self._internal_order.connect(self._on_internal_order, connection)
+        self._internal_order_status.connect(self._on_internal_order_status, connection)
+        self._internal_execution.connect(self._on_internal_execution, connection)
+        
+        # Outgoing requests are throttled to IB's message rate limit; queued
+        # messages are sent by a timer on the GUI thread
+        self._throttle = MessageThrottle()
+        self._throttle_timer = QTimer(self)
+        self._throttle_timer.setSingleShot(True)
+        self._throttle_timer.setTimerType(Qt.PreciseTimer)
+        self._throttle_timer.timeout.connect(self._drain_throttle)
+        self._throttle_queued.connect(self._schedule_throttle, Qt.QueuedConnection)
         
         # Connect public signals for status updates
         self.connected.connect(self._on_connected)
@@ -207,9 +374,17 @@ class IBKRBridge(QObject):
         
     # Internal signal handlers (called from main thread)
     def _on_internal_connected(self):
+        # Depth lines do not survive a reconnect: request them again
+        for book in self._depth_books.values():
+            book.clear()
+            self._request_depth(book)
+        for ring in self._tick_by_tick.rings():
+            self._request_tick_by_tick(ring)
         self.connected.emit()
         
     def _on_internal_disconnected(self):
+        self._quotes.clear()  # Lines are reopened with new reqIds
+        self._drop_queued_messages()
         self.disconnected.emit()
         
     def _on_internal_accounts(self, accounts):
@@ -218,34 +393,83 @@ class IBKRBridge(QObject):
     def _on_internal_error(self, code, msg):
         self.error_occurred.emit(code, msg)
         
-    def _on_internal_price(self, req_id, price):
-        print(f"[IBKR] Price {req_id}: ${price:.2f}")
-        self.price_received.emit(req_id, price)
+    def _on_internal_request_error(self, req_id, code, msg):
+        self.request_error.emit(req_id, code, msg)
         
-    def _on_internal_bid(self, req_id, price):
-        self.bid_received.emit(req_id, price)
+    def _on_ticks_flushed(self, batch):
+        stamps = self._conflator.batch_stamps
+        if stamps:
+            start = now_ns()
+            for stamp in stamps.values():
+                latency.record_since("deliver", stamp, start)
+            latency.mark_frame(min(stamps.values()))
+            
+        if batch:
+            self.ticks_received.emit(batch)
+        for req_id, tick in batch.items():
+            if tick.bid is not None:
+                self.bid_received.emit(req_id, tick.bid)
+            if tick.ask is not None:
+                self.ask_received.emit(req_id, tick.ask)
+            if tick.last is not None:
+                self.price_received.emit(req_id, tick.last)
+                
+        quotes = self._quotes.publish()
+        if quotes:
+            self.quotes_received.emit(quotes)
+        if self._depth_books:
+            depth = {}
+            for req_id, book in self._depth_books.items():
+                snapshot = book.take_snapshot()
+                if snapshot is not None:
+                    depth[req_id] = snapshot
+            if depth:
+                self.depth_received.emit(depth)
+        appended = self._tick_by_tick.publish()
+        if appended:
+            self.tick_by_tick_received.emit(appended)
+            
+        if stamps:
+            latency.record("dispatch", now_ns() - start)
         
-    def _on_internal_ask(self, req_id, price):
-        self.ask_received.emit(req_id, price)
+    def _on_internal_historical_bars(self, req_id, bars, final):
+        self.historical_bars_received.emit(req_id, bars, final)
         
-    def _on_internal_historical_bar(self, req_id, bar):
-        self.historical_bar_received.emit(req_id, bar)
+    def _on_internal_historical_end(self, req_id, start, end):
+        self.historical_data_end.emit(req_id, start, end)
+        
+    def _on_internal_contract_details(self, req_id, details):
+        self.contract_details_received.emit(req_id, details)
+        
+    def _on_internal_contract_details_end(self, req_id):
+        self.contract_details_end.emit(req_id)
         
     def _on_internal_position(self, position):
-        print(f"[IBKR] Position: {position['symbol']} {position['position']} @ ${position['avgCost']:.2f}")
+        log.debug("Position: %s %s @ $%.2f", position.symbol, position.position, position.avg_cost)
         self.position_received.emit(position)
         
     def _on_internal_position_end(self):
         self.positions_complete.emit()
         
     def _on_internal_order(self, order):
-        print(f"[IBKR] Order: {order['orderId']} {order['action']} {order['quantity']} {order['symbol']} - {order['status']}")
+        log.info(
+            "Order: %s %s %s %s - %s",
+            order.order_id, order.action, order.quantity, order.symbol, order.status,
+        )
         self.order_received.emit(order)
         
     def _on_internal_order_status(self, status):
-        print(f"[IBKR] Order Status: {status['orderId']} - {status['status']}")
+        log.info("Order Status: %s - %s", status.order_id, status.status)
         self.order_status_received.emit(status)
         
+    def _on_internal_execution(self, execution):
+        log.info(
+            "Execution %s: order %s %s %s %s @ %s",
+            execution.exec_id, execution.order_id, execution.side, execution.shares,
+            execution.symbol, execution.price,
+        )
+        self.execution_received.emit(execution)
+        
     # Thread-safe emit methods (called from background thread)
     def _emit_connected(self):
         self._internal_connected.emit()
@@ -259,17 +483,23 @@ class IBKRBridge(QObject):
     def _emit_error(self, code, msg):
         self._internal_error.emit(code, msg)
         
-    def _emit_price(self, req_id, price):
-        self._internal_price.emit(req_id, price)
+    def _emit_request_error(self, req_id, code, msg):
+        self._internal_request_error.emit(req_id, code, msg)
         
-    def _emit_bid(self, req_id, price):
-        self._internal_bid.emit(req_id, price)
+    def _emit_order_error(self, order_id, code, msg):
+        self._internal_order_error.emit(order_id, code, msg)
         
-    def _emit_ask(self, req_id, price):
-        self._internal_ask.emit(req_id, price)
+    def _emit_historical_bars(self, req_id, bars, final):
+        self._internal_historical_bars.emit(req_id, bars, final)
         
-    def _emit_historical_bar(self, req_id, bar):
-        self._internal_historical_bar.emit(req_id, bar)
+    def _emit_historical_end(self, req_id, start, end):
+        self._internal_historical_end.emit(req_id, start, end)
+        
+    def _emit_contract_details(self, req_id, details):
+        self._internal_contract_details.emit(req_id, details)
+        
+    def _emit_contract_details_end(self, req_id):
+        self._internal_contract_details_end.emit(req_id)
         
     def _emit_position(self, position):
         self._internal_position.emit(position)
@@ -283,6 +513,9 @@ class IBKRBridge(QObject):
     def _emit_order_status(self, status):
         self._internal_order_status.emit(status)
         
+    def _emit_execution(self, execution):
+        self._internal_execution.emit(execution)
+        
     def _on_connected(self):
         self.connection_status_changed.emit("connected")
         
@@ -301,6 +534,34 @@ class IBKRBridge(QObject):
             return self._client.accounts
         return []
         
+    @property
+    def tick_interval_ms(self) -> int:
+        """Tick conflation interval in milliseconds."""
+        return self._conflator.interval_ms
+        
+    def set_tick_interval(self, interval_ms: int):
+        """
+        Set the tick conflation interval.
+        
+        Args:
+            interval_ms: Frame interval in milliseconds (e.g. 16-100)
+        """
+        self._conflator.set_interval(interval_ms)
+        
+    @property
+    def quote_book(self) -> QuoteBook:
+        """L1 book of all market data lines."""
+        return self._quotes
+        
+    def quote(self, req_id: int) -> Optional[QuoteEvent]:
+        """Current L1 quote of a market data line (None before its first tick)."""
+        return self._quotes.quote(req_id)
+        
+    @property
+    def conflation_stats(self) -> dict:
+        """Tick coalescing counters (ticks_in, ticks_out, coalesced, batches, pending)."""
+        return self._conflator.stats
+        
     @Slot()
     def connect_to_tws(self, host: str = "127.0.0.1", port: int = 7497, client_id: int = 1):
         """
@@ -311,10 +572,10 @@ class IBKRBridge(QObject):
             port: TWS port (7497 for paper, 7496 for live)
             client_id: Unique client ID
         """
-        print(f"[IBKR] Connecting to {host}:{port} (clientId={client_id})...")
+        log.info("Connecting to %s:%s (clientId=%s)...", host, port, client_id)
         
         if self._client and self._client._connected:
-            print("[IBKR] Already connected")
+            log.info("Already connected")
             return
             
         self._host = host
@@ -322,64 +583,114 @@ class IBKRBridge(QObject):
         self._client_id = client_id
         
         self.connection_status_changed.emit("connecting")
+        self._drop_queued_messages()  # Never send an old connection's requests on the new one
+        self._client = self._start_client(host, port, client_id)
         
-        # Create client
-        self._client = IBKRClient(self)
+    def _start_client(self, host: str, port: int, client_id: int) -> IBKRClient:
+        """Create the client and run its message loop on a reader thread."""
+        client = IBKRClient(self)
         
         def connect_and_run():
             """Connect and run message loop in background thread."""
             try:
-                self._client.connect(host, port, client_id)
-                print("[IBKR] Socket connected, starting message loop...")
-                self._client.run()  # This blocks until disconnected
+                client.connect(host, port, client_id)
+                log.info("Socket connected, starting message loop...")
+                client.run()  # This blocks until disconnected
             except Exception as e:
-                print(f"[IBKR] Connection error: {e}")
+                log.error("Connection error: %s", e)
                 self._emit_error(-1, str(e))
         
         # Start connection in background thread
         self._thread = threading.Thread(target=connect_and_run, daemon=True)
         self._thread.start()
-        print("[IBKR] Connection thread started")
+        log.debug("Connection thread started")
+        return client
             
     @Slot()
     def disconnect_from_tws(self):
         """Disconnect from TWS."""
-        print("[IBKR] Disconnecting...")
+        log.info("Disconnecting...")
+        # Hand buffered ticks to the journal writer without waiting for the disk
+        self._tick_by_tick.flush(timeout=0)
         if self._client:
             try:
                 self._client.disconnect()
             except Exception as e:
-                print(f"[IBKR] Disconnect error: {e}")
+                log.warning("Disconnect error: %s", e)
             self._client = None
+        self._drop_queued_messages()
             
     @Slot()
     def reconnect(self):
         """Reconnect to TWS."""
-        print("[IBKR] Reconnecting...")
+        log.info("Reconnecting...")
         self.disconnect_from_tws()
         self.connect_to_tws(self._host, self._port, self._client_id)
         
+    def set_contract_cache(self, cache: Optional[ContractCache]):
+        """Build request and order contracts from `cache` (None = let TWS resolve every time)."""
+        self._contract_cache = cache
+        
+    def _make_contract(self, symbol: str, exchange: str = "SMART"):
+        """Contract for a US stock, identified by conId once the cache has resolved it."""
+        if self._contract_cache is not None:
+            return self._contract_cache.contract(symbol, exchange)
+        return default_contract(symbol, exchange)
+        
+    @Slot(str, int)
+    def request_contract_details(self, symbol: str, req_id: int) -> int:
+        """
+        Request the contract details of a US stock.
+        
+        Results arrive through contract_details_received (one per matching
+        contract) followed by contract_details_end.
+        
+        Args:
+            symbol: Stock symbol
+            req_id: Request ID for tracking
+            
+        Returns:
+            Request ID, or -1 if not connected
+        """
+        if not self._client or not self._client._connected:
+            log.warning("Cannot request contract details - not connected")
+            return -1
+            
+        log.debug("Requesting contract details for %s (reqId=%s)", symbol, req_id)
+        self._client.reqContractDetails(req_id, default_contract(symbol))
+        return req_id
+        
+    def allocate_order_ids(self, count: int = 1) -> int:
+        """
+        Reserve `count` consecutive order IDs (safe from any thread).
+        
+        Returns:
+            The first ID, or -1 if not connected
+        """
+        if not self._client or not self._client._connected:
+            log.warning("Cannot allocate order IDs - not connected")
+            return -1
+        return self._client.allocate_order_ids(count)
+        
     @Slot(dict)
-    def place_order(self, order: dict):
+    def place_order(self, order: dict, order_id: Optional[int] = None) -> int:
         """
         Place an order to TWS.
         
         Args:
             order: Order dict with symbol, side, type, quantity, etc.
+            order_id: ID reserved with allocate_order_ids() (default: the next free one)
+            
+        Returns:
+            Order ID, or -1 if not connected
         """
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot place order - not connected")
-            return
+            log.warning("Cannot place order - not connected")
+            return -1
             
-        from ibapi.contract import Contract
         from ibapi.order import Order
         
-        # Create contract
-        contract = Contract()
-        contract.symbol = order["symbol"]
-        contract.secType = "STK"
-        contract.exchange = order.get("exchange", "SMART")
-        contract.currency = "USD"
+        contract = self._make_contract(order["symbol"], order.get("exchange", "SMART"))
         
         # Create order
         ib_order = Order()
@@ -393,21 +704,32 @@ class IBKRBridge(QObject):
         if order.get("stop_price"):
             ib_order.auxPrice = order["stop_price"]
             
-        # Get next order ID
-        order_id = self._client.nextOrderId
-        self._client.nextOrderId += 1
+        if order_id is None:
+            order_id = self._client.allocate_order_ids()
         
-        print(f"[IBKR] Placing order {order_id}: {order['side']} {order['quantity']} {order['symbol']} @ {order['type']}")
+        log.info(
+            "Placing order %s: %s %s %s @ %s",
+            order_id, order["side"], order["quantity"], order["symbol"], order["type"],
+        )
         self._client.placeOrder(order_id, contract, ib_order)
+        return order_id
+        
+    def cancel_order(self, order_id: int):
+        """Cancel one open order."""
+        if not self._client or not self._client._connected:
+            log.warning("Cannot cancel order - not connected")
+            return
+        log.info("Cancelling order %s", order_id)
+        self._client.cancelOrder(order_id)
         
     @Slot()
     def cancel_all_orders(self):
         """Cancel all open orders."""
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot cancel orders - not connected")
+            log.warning("Cannot cancel orders - not connected")
             return
             
-        print("[IBKR] Requesting global cancel...")
+        log.info("Requesting global cancel...")
         self._client.reqGlobalCancel()
         
     @Slot(str)
@@ -423,22 +745,16 @@ class IBKRBridge(QObject):
             Request ID
         """
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot subscribe - not connected")
+            log.warning("Cannot subscribe - not connected")
             return -1
             
-        from ibapi.contract import Contract
-        
         # Request delayed data (type 3) for paper trading without real-time subscription
         # 1 = Live, 2 = Frozen, 3 = Delayed, 4 = Delayed Frozen
         self._client.reqMarketDataType(3)
         
-        contract = Contract()
-        contract.symbol = symbol
-        contract.secType = "STK"
-        contract.exchange = "SMART"
-        contract.currency = "USD"
+        contract = self._make_contract(symbol)
         
-        print(f"[IBKR] Subscribing to {symbol} (reqId={req_id}, delayed)")
+        log.info("Subscribing to %s (reqId=%s, delayed)", symbol, req_id)
         self._client.reqMktData(req_id, contract, "", False, False, [])
         return req_id
         
@@ -453,56 +769,278 @@ class IBKRBridge(QObject):
         if not self._client or not self._client._connected:
             return
             
-        print(f"[IBKR] Unsubscribing reqId={req_id}")
+        log.info("Unsubscribing reqId=%s", req_id)
         self._client.cancelMktData(req_id)
+        self._quotes.remove(req_id)
         
     @Slot(str, int)
-    def request_historical_data(self, symbol: str, req_id: int = 2001):
+    def request_market_depth(
+        self,
+        symbol: str,
+        req_id: int,
+        num_rows: int = 10,
+        smart_depth: bool = True,
+    ) -> int:
         """
-        Request historical bar data for a symbol.
+        Subscribe to market depth (level 2) for a symbol.
+        
+        Updates are applied to a DepthBook on the reader thread; snapshots of
+        changed books arrive through depth_received once per frame. The line
+        is requested again after a reconnect.
+        
+        Args:
+            symbol: Stock symbol
+            req_id: Request ID for tracking
+            num_rows: Levels per side
+            smart_depth: Aggregate all exchanges (SMART) instead of the primary exchange
+            
+        Returns:
+            Request ID, or -1 if not connected
+        """
+        if not self._client or not self._client._connected:
+            log.warning("Cannot request market depth - not connected")
+            return -1
+            
+        book = DepthBook(req_id, symbol, num_rows, smart_depth)
+        self._depth_books[req_id] = book
+        self._request_depth(book)
+        return req_id
+        
+    def _request_depth(self, book: DepthBook):
+        log.info("Requesting market depth for %s (reqId=%s, %s rows)", book.symbol, book.req_id, book.levels)
+        self._client.reqMktDepth(book.req_id, self._make_contract(book.symbol), book.levels, book.smart_depth, [])
+        
+    @Slot(int)
+    def cancel_market_depth(self, req_id: int):
+        """
+        Cancel a market depth line.
+        
+        Args:
+            req_id: Request ID from request_market_depth
+        """
+        book = self._depth_books.pop(req_id, None)
+        if book is None or not self._client or not self._client._connected:
+            return
+            
+        log.info("Cancelling market depth reqId=%s", req_id)
+        self._client.cancelMktDepth(req_id, book.smart_depth)
+        
+    def depth_book(self, req_id: int) -> Optional[DepthBook]:
+        """Live L2 book of a depth line."""
+        return self._depth_books.get(req_id)
+        
+    @Slot(str, int)
+    def request_tick_by_tick(
+        self,
+        symbol: str,
+        req_id: int,
+        tick_type: str = "AllLast",
+        ignore_size: bool = False,
+    ) -> int:
+        """
+        Subscribe to tick-by-tick data for a symbol.
+        
+        Every tick is appended to a bounded TickRing on the reader thread;
+        ticks older than the ring spill to the on-disk journal. Counts of new
+        ticks arrive through tick_by_tick_received once per frame; consumers
+        read the records through their own ring cursor, so a slow consumer
+        only misses records (counted as overruns) and never holds up the
+        reader thread. The stream is requested again after a reconnect.
         
         Args:
             symbol: Stock symbol
             req_id: Request ID for tracking
+            tick_type: "Last", "AllLast", "BidAsk" or "MidPoint"
+            ignore_size: BidAsk only - skip updates that change sizes only
+            
+        Returns:
+            Request ID, or -1 if not connected
         """
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot request historical data - not connected")
+            log.warning("Cannot request tick-by-tick data - not connected")
+            return -1
+            
+        ring = self._tick_by_tick.open(req_id, symbol, tick_type, ignore_size)
+        self._request_tick_by_tick(ring)
+        return req_id
+        
+    def _request_tick_by_tick(self, ring: TickRing):
+        log.info("Requesting %s tick-by-tick data for %s (reqId=%s)", ring.tick_type, ring.symbol, ring.req_id)
+        self._client.reqTickByTickData(
+            ring.req_id, self._make_contract(ring.symbol), ring.tick_type, 0, ring.ignore_size
+        )
+        
+    @Slot(int)
+    def cancel_tick_by_tick(self, req_id: int):
+        """
+        Cancel a tick-by-tick stream; what is left in its ring goes to the journal.
+        
+        Args:
+            req_id: Request ID from request_tick_by_tick
+        """
+        if self._tick_by_tick.get(req_id) is None:
+            return
+        self._tick_by_tick.close(req_id)
+        if not self._client or not self._client._connected:
             return
             
-        from ibapi.contract import Contract
-        from datetime import datetime
+        log.info("Cancelling tick-by-tick reqId=%s", req_id)
+        self._client.cancelTickByTickData(req_id)
+        
+    def tick_ring(self, req_id: int) -> Optional[TickRing]:
+        """Ring of a tick-by-tick stream (use ring.cursor() to consume it)."""
+        return self._tick_by_tick.get(req_id)
+        
+    @property
+    def tick_by_tick(self) -> TickByTickStore:
+        """All tick-by-tick rings and the journal."""
+        return self._tick_by_tick
+        
+    @property
+    def tick_by_tick_stats(self) -> dict:
+        """Received / evicted / overrun / journal counters of all tick-by-tick streams."""
+        return self._tick_by_tick.stats
+        
+    # Outgoing message throttle
+    @property
+    def throttle(self) -> MessageThrottle:
+        return self._throttle
+        
+    @property
+    def throttle_stats(self) -> dict:
+        """Outgoing message counters: queue depth (per priority), sent, delayed, dropped and queue wait."""
+        return self._throttle.stats
+        
+    def set_message_rate(self, rate: float, burst: Optional[int] = None):
+        """Change the outgoing message rate limit (messages per second, default 45 with a burst of 5)."""
+        self._throttle.set_rate(rate, burst)
+        self._schedule_throttle()
+        
+    def submit_many(self, calls: Iterable[Callable[[], Any]], priority: Optional[int] = None) -> List[Any]:
+        """
+        Make many requests at once, e.g. a basket of orders or a resubscription.
+        
+        Every call (such as `lambda: bridge.place_order(order)`) runs now, in
+        order; the messages they send leave as fast as the throttle allows,
+        ahead of lower-priority traffic.
+        
+        Args:
+            calls: Callables that each make one or more requests
+            priority: MSG_PRIORITY_* for all their messages (default: by message type)
+            
+        Returns:
+            The calls' return values
+        """
+        with self._throttle.priority(priority):
+            results = [call() for call in calls]
+        queued = self._throttle.queued
+        if queued:
+            log.info("%s requests queued, sent within %.1fs", queued, self._throttle.eta())
+        self._schedule_throttle()
+        return results
+        
+    def _drop_queued_messages(self):
+        dropped = self._throttle.clear()
+        if dropped:
+            log.warning("Dropped %s queued requests of a closed connection", dropped)
+            
+    @Slot()
+    def _schedule_throttle(self):
+        """Wake the throttle timer when the next queued message may be sent."""
+        delay = self._throttle.next_delay()
+        if delay is None:
+            return
+        delay_ms = int(delay * 1000) + 1 if delay > 0 else 0
+        if self._throttle_timer.isActive() and self._throttle_timer.remainingTime() <= delay_ms:
+            return
+        self._throttle_timer.start(delay_ms)
+        
+    @Slot()
+    def _drain_throttle(self):
+        try:
+            self._throttle.drain()
+        finally:
+            self._schedule_throttle()
         
-        contract = Contract()
-        contract.symbol = symbol
-        contract.secType = "STK"
-        contract.exchange = "SMART"
-        contract.currency = "USD"
+    @Slot(str, int)
+    def request_historical_data(
+        self,
+        symbol: str,
+        req_id: int = 2001,
+        duration: str = "1 D",
+        bar_size: str = "5 mins",
+        what_to_show: str = "TRADES",
+        end_time: str = "",
+        use_rth: bool = True,
+    ) -> int:
+        """
+        Request historical bar data for a symbol.
         
-        # Request last 1 day of 5-minute bars
-        end_time = datetime.now().strftime("%Y%m%d %H:%M:%S")
+        Bars are collected on the reader thread and delivered through
+        historical_bars_received as BAR_DTYPE arrays: one final batch when the
+        request ends, preceded by chunks of `history_chunk_size` bars for
+        long requests. historical_data_end follows the final batch.
         
-        print(f"[IBKR] Requesting historical data for {symbol}")
+        Args:
+            symbol: Stock symbol
+            req_id: Request ID for tracking
+            duration: IB duration string (e.g. "1 D", "3600 S")
+            bar_size: IB bar size setting (e.g. "5 mins")
+            what_to_show: TRADES, MIDPOINT, BID, ASK, ...
+            end_time: "yyyymmdd hh:mm:ss TZ", or "" for now
+            use_rth: Only bars inside regular trading hours
+            
+        Returns:
+            Request ID, or -1 if not connected
+        """
+        if not self._client or not self._client._connected:
+            log.warning("Cannot request historical data - not connected")
+            return -1
+            
+        contract = self._make_contract(symbol)
+        
+        log.info(
+            "Requesting historical data for %s (%s of %s %s)",
+            symbol, duration, bar_size, what_to_show,
+            extra={"fields": {"reqId": req_id}},
+        )
         self._client.reqHistoricalData(
-            req_id, contract, end_time, "1 D", "5 mins", "TRADES", 1, 1, False, []
+            req_id, contract, end_time, duration, bar_size, what_to_show,
+            int(use_rth), 2, False, []
         )
+        return req_id
+        
+    @Slot(int)
+    def cancel_historical_data(self, req_id: int):
+        """
+        Cancel a pending historical data request.
+        
+        Args:
+            req_id: Request ID from request_historical_data
+        """
+        if not self._client or not self._client._connected:
+            return
+            
+        log.info("Cancelling historical data reqId=%s", req_id)
+        self._client.cancelHistoricalData(req_id)
         
     @Slot()
     def request_positions(self):
         """Request all positions from TWS."""
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot request positions - not connected")
+            log.warning("Cannot request positions - not connected")
             return
             
-        print("[IBKR] Requesting positions...")
+        log.info("Requesting positions...")
         self._client.reqPositions()
         
     @Slot()
     def request_open_orders(self):
         """Request all open orders from TWS."""
         if not self._client or not self._client._connected:
-            print("[IBKR] Cannot request orders - not connected")
+            log.warning("Cannot request orders - not connected")
             return
             
-        print("[IBKR] Requesting open orders...")
+        log.info("Requesting open orders...")
         self._client.reqOpenOrders()
 
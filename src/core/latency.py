@@ -0,0 +1,205 @@
+"""
+Latency Instrumentation.
+
+Optional timestamps along the market data path, recorded into fixed-size
+HDR-style histograms:
+
+    decode    TWS socket read -> IBKRClient.tickPrice()
+    deliver   TWS socket read -> tick batch handed to the GUI thread
+    dispatch  GUI thread handling one tick batch (bridge + widget slots)
+    paint     TWS socket read -> LiveChartWidget redraw showing the price
+
+Off by default (QS_LATENCY=1 turns it on at startup, the diagnostics page at
+runtime). While off, the hot paths only test `tracker.enabled`.
+"""
+import os
+import time
+from queue import Queue
+from typing import Dict, Optional
+
+import numpy as np
+
+now_ns = time.perf_counter_ns
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of durations in nanoseconds.
+
+    Values below 2**sub_bucket_bits are counted exactly; above that every
+    power of two is split into 2**(sub_bucket_bits - 1) equal buckets, so a
+    recorded value is off by less than 1 / 2**(sub_bucket_bits - 1)
+    (under 1% with the default 8 bits). Memory is fixed: a few thousand
+    int64 counters, whatever the number of samples.
+
+    Each histogram expects a single writer thread; readers on other threads
+    may see a count that is one sample behind.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8, max_value_ns: int = 2**40):
+        self._sub_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self._half = self._sub_count >> 1
+        self._max_value = max_value_ns
+        self._counts = np.zeros(self._index(max_value_ns) + 1, dtype=np.int64)
+        self._total = 0
+        self._sum = 0
+        self._min = 0
+        self._max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self._sub_bits
+        return (shift + 1) * self._half + (value >> shift) - self._half
+
+    def _value_at(self, index: int) -> int:
+        """Midpoint of the values counted in a bucket."""
+        if index < self._sub_count:
+            return index
+        shift = index // self._half - 1
+        sub = index % self._half + self._half
+        return (sub << shift) + (1 << shift) // 2
+
+    def record(self, value_ns: int):
+        """Count one duration (clamped to [0, max_value_ns])."""
+        value = min(max(int(value_ns), 0), self._max_value)
+        self._counts[self._index(value)] += 1
+        if self._total == 0 or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+        self._total += 1
+        self._sum += value
+
+    def __len__(self) -> int:
+        return self._total
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    @property
+    def min(self) -> int:
+        return self._min
+
+    @property
+    def max(self) -> int:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._total if self._total else 0.0
+
+    def percentile(self, percent: float) -> int:
+        """Value (ns) at or below which `percent` of the samples fall."""
+        if self._total == 0:
+            return 0
+        rank = max(1, int(np.ceil(self._total * percent / 100.0)))
+        index = int(np.searchsorted(np.cumsum(self._counts), rank))
+        return min(max(self._value_at(index), self._min), self._max)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add the counts of a histogram with the same layout."""
+        if len(other._counts) != len(self._counts):
+            raise ValueError("histogram layouts differ")
+        if other._total == 0:
+            return
+        self._counts += other._counts
+        self._min = other._min if self._total == 0 else min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        self._total += other._total
+        self._sum += other._sum
+
+    def reset(self):
+        self._counts[:] = 0
+        self._total = 0
+        self._sum = 0
+        self._min = 0
+        self._max = 0
+
+    def summary(self) -> dict:
+        """Count and percentiles in milliseconds."""
+        if self._total == 0:
+            return {"count": 0}
+        return {
+            "count": self._total,
+            "mean": self.mean / 1e6,
+            "p50": self.percentile(50) / 1e6,
+            "p90": self.percentile(90) / 1e6,
+            "p99": self.percentile(99) / 1e6,
+            "p999": self.percentile(99.9) / 1e6,
+            "max": self._max / 1e6,
+        }
+
+
+class StampedQueue(Queue):
+    """
+    Message queue between the ibapi EReader thread and EClient.run().
+
+    Remembers when each message was read off the socket (0 while latency
+    tracking is off); `last_stamp` is the stamp of the message most
+    recently taken by get().
+    """
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(maxsize)
+        self.last_stamp = 0
+
+    def _put(self, item):
+        self.queue.append((now_ns() if tracker.enabled else 0, item))
+
+    def _get(self):
+        self.last_stamp, item = self.queue.popleft()
+        return item
+
+
+class LatencyTracker:
+    """Per-stage histograms for the market data path."""
+
+    STAGES = ("decode", "deliver", "dispatch", "paint")
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in self.STAGES}
+        self._frame_stamp = 0  # Oldest socket stamp not yet painted (GUI thread)
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = enabled
+        self._frame_stamp = 0
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        return self._histograms[stage]
+
+    def record(self, stage: str, elapsed_ns: int):
+        """Count one duration for a stage."""
+        self._histograms[stage].record(elapsed_ns)
+
+    def record_since(self, stage: str, stamp: int, now: Optional[int] = None):
+        """Count the time since `stamp` (ignored when the stamp is 0)."""
+        if stamp:
+            self._histograms[stage].record((now_ns() if now is None else now) - stamp)
+
+    def mark_frame(self, stamp: int):
+        """Note a tick that the next chart redraw will show."""
+        if stamp and (not self._frame_stamp or stamp < self._frame_stamp):
+            self._frame_stamp = stamp
+
+    def frame_painted(self):
+        """Count the paint latency of the ticks shown by a redraw."""
+        if self._frame_stamp:
+            self.record_since("paint", self._frame_stamp)
+            self._frame_stamp = 0
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Summary (milliseconds) of every stage."""
+        return {stage: hist.summary() for stage, hist in self._histograms.items()}
+
+    def reset(self):
+        for hist in self._histograms.values():
+            hist.reset()
+        self._frame_stamp = 0
+
+
+# Process-wide tracker used by IBKRClient, IBKRBridge and LiveChartWidget
+tracker = LatencyTracker(enabled=os.environ.get("QS_LATENCY", "0") == "1")
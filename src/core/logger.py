@@ -0,0 +1,237 @@
+"""
+Structured Logging.
+
+Queue-based logging for QS-Gen3.0. Callers (including the TWS reader thread)
+only build a record and enqueue it; formatting and I/O happen on a background
+listener thread.
+
+Categories are child loggers of "qs" (e.g. "qs.ibkr", "qs.ibkr.ticks") and
+can have their own levels, either through setup_logging() or the
+QS_LOG_LEVELS environment variable ("ibkr=DEBUG,nautilus=WARNING").
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Optional
+from PySide6.QtCore import QObject, Signal
+
+ROOT_CATEGORY = "qs"
+DEFAULT_FORMAT = "%(asctime)s.%(msecs)03d [%(levelname)s] %(category)s: %(message)s%(fields)s"
+DEFAULT_DATEFMT = "%H:%M:%S"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def get_logger(category: str) -> logging.Logger:
+    """
+    Get the logger for a category.
+
+    Args:
+        category: Dotted category name relative to "qs" (e.g. "ibkr.ticks")
+    """
+    return logging.getLogger(f"{ROOT_CATEGORY}.{category}")
+
+
+def category_of(record: logging.LogRecord) -> str:
+    """Category name of a record (logger name without the "qs." prefix)."""
+    name = record.name
+    if name.startswith(ROOT_CATEGORY + "."):
+        return name[len(ROOT_CATEGORY) + 1:]
+    return name
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formatter that adds `category` and renders structured `fields`.
+
+    Fields are passed as `extra={"fields": {...}}` and appended as key=value.
+    """
+
+    def format(self, record):
+        record.category = category_of(record)
+        fields = getattr(record, "fields", None)
+        if isinstance(fields, dict) and fields:
+            record.fields = " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        elif not isinstance(fields, str):
+            record.fields = ""
+        return super().format(record)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    category_levels: Optional[Dict[str, int]] = None,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """
+    Install the queue-based logging pipeline (idempotent).
+
+    Args:
+        level: Default level for all categories
+        category_levels: Per-category overrides, e.g. {"ibkr.ticks": logging.DEBUG}
+        stream: Console stream (defaults to stdout)
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener
+
+    with _listener_lock:
+        root = logging.getLogger(ROOT_CATEGORY)
+        root.setLevel(level)
+
+        levels = dict(_levels_from_env())
+        levels.update(category_levels or {})
+        for category, category_level in levels.items():
+            get_logger(category).setLevel(category_level)
+
+        if _listener is not None:
+            return _listener
+
+        log_queue = queue.SimpleQueue()
+        root.handlers = [_DeferredQueueHandler(log_queue)]
+        root.propagate = False
+
+        console = logging.StreamHandler(stream or sys.stdout)
+        console.setFormatter(StructuredFormatter(DEFAULT_FORMAT, DEFAULT_DATEFMT))
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, console, respect_handler_level=True
+        )
+        _listener.start()
+        return _listener
+
+
+def _levels_from_env() -> Dict[str, int]:
+    """Parse QS_LOG_LEVELS ("ibkr=DEBUG,nautilus=WARNING")."""
+    levels = {}
+    spec = os.environ.get("QS_LOG_LEVELS", "")
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        category, level_name = item.split("=", 1)
+        level = logging.getLevelName(level_name.strip().upper())
+        if isinstance(level, int):
+            levels[category.strip()] = level
+    return levels
+
+
+def set_category_level(category: str, level: int):
+    """Change the level of one category at runtime."""
+    get_logger(category).setLevel(level)
+
+
+def add_handler(handler: logging.Handler):
+    """
+    Attach a handler to the background listener.
+
+    Handlers run on the listener thread, never on the logging caller's thread.
+    """
+    if _listener is None:
+        setup_logging()
+    if handler.formatter is None:
+        handler.setFormatter(StructuredFormatter("%(message)s%(fields)s"))
+    _listener.handlers = _listener.handlers + (handler,)
+
+
+def remove_handler(handler: logging.Handler):
+    """Detach a handler added with add_handler()."""
+    if _listener is not None:
+        _listener.handlers = tuple(h for h in _listener.handlers if h is not handler)
+
+
+def shutdown_logging():
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+class ThrottledLogger:
+    """
+    Rate-limited logger for hot paths.
+
+    Each key logs at most once per interval; suppressed records are counted
+    and reported with the next record that gets through. Disabled levels cost
+    one isEnabledFor() check.
+    """
+
+    def __init__(self, logger: logging.Logger, interval: float = 1.0):
+        self._logger = logger
+        self._interval = interval
+        self._next_allowed: Dict[object, float] = {}
+        self._suppressed: Dict[object, int] = {}
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self._logger
+
+    def log(self, level: int, key, msg: str, *args, **kwargs):
+        """
+        Log `msg` unless `key` already logged within the interval.
+
+        Args:
+            level: Logging level
+            key: Throttle key (e.g. ("last", reqId))
+            msg: %-style message, formatted on the listener thread
+        """
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now < self._next_allowed.get(key, 0.0):
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._next_allowed[key] = now + self._interval
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            extra = kwargs.setdefault("extra", {})
+            extra.setdefault("fields", {})["suppressed"] = suppressed
+        self._logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, key, msg: str, *args, **kwargs):
+        self.log(logging.DEBUG, key, msg, *args, **kwargs)
+
+    def info(self, key, msg: str, *args, **kwargs):
+        self.log(logging.INFO, key, msg, *args, **kwargs)
+
+    def warning(self, key, msg: str, *args, **kwargs):
+        self.log(logging.WARNING, key, msg, *args, **kwargs)
+
+
+class _LogEmitter(QObject):
+    record_emitted = Signal(str, str, str)  # level, message, category
+
+
+class QtLogHandler(logging.Handler):
+    """
+    Forwards log records to a Qt signal.
+
+    Runs on the listener thread; connect `record_emitted` to GUI slots and Qt
+    delivers it through a queued connection.
+    """
+
+    def __init__(self, level: int = logging.NOTSET):
+        super().__init__(level)
+        self._emitter = _LogEmitter()
+        self.record_emitted = self._emitter.record_emitted
+
+    def emit(self, record):
+        try:
+            message = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self.record_emitted.emit(record.levelname, message, category_of(record))
@@ -0,0 +1,870 @@
+"""
+Mock TWS Server.
+
+Local stand-in for TWS / IB Gateway that speaks enough of the IB API wire
+protocol to drive IBKRClient: the handshake, nextValidId, managedAccounts,
+reqMktData tick streams, market depth, historical bars, contract details, positions, open
+orders, order status and executions. It makes throughput and latency tests reproducible on a machine
+without TWS or network access.
+
+Message layouts follow server version 157 (the highest version ibapi 9.81
+speaks); newer ibapi clients decode them the same way because every later
+field is gated on a higher server version.
+
+Usage:
+    python -m src.core.mock_tws --port 7497 --ticks-per-second 50
+
+    with MockTWSServer(MockTWSConfig(port=0)) as server:
+        bridge.connect_to_tws("127.0.0.1", server.port)
+"""
+import argparse
+import asyncio
+import math
+import random
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from .bar_store import BAR_SIZE_SECONDS, parse_bar_time
+from .logger import get_logger
+
+log = get_logger("mock_tws")
+
+SERVER_VERSION = 157
+
+# Client -> server message ids
+REQ_MKT_DATA = 1
+CANCEL_MKT_DATA = 2
+PLACE_ORDER = 3
+CANCEL_ORDER = 4
+REQ_OPEN_ORDERS = 5
+REQ_IDS = 8
+REQ_CONTRACT_DATA = 9
+REQ_MKT_DEPTH = 10
+CANCEL_MKT_DEPTH = 11
+REQ_HISTORICAL_DATA = 20
+CANCEL_HISTORICAL_DATA = 25
+REQ_CURRENT_TIME = 49
+REQ_GLOBAL_CANCEL = 58
+REQ_MARKET_DATA_TYPE = 59
+REQ_POSITIONS = 61
+START_API = 71
+REQ_TICK_BY_TICK_DATA = 97
+CANCEL_TICK_BY_TICK_DATA = 98
+
+# Server -> client message ids
+TICK_PRICE = 1
+TICK_SIZE = 2
+ORDER_STATUS = 3
+ERR_MSG = 4
+OPEN_ORDER = 5
+NEXT_VALID_ID = 9
+CONTRACT_DATA = 10
+EXECUTION_DATA = 11
+MARKET_DEPTH = 12
+MARKET_DEPTH_L2 = 13
+MANAGED_ACCTS = 15
+HISTORICAL_DATA = 17
+CURRENT_TIME = 49
+CONTRACT_DATA_END = 52
+OPEN_ORDER_END = 53
+MARKET_DATA_TYPE = 58
+POSITION_DATA = 61
+POSITION_END = 62
+TICK_BY_TICK = 99
+
+# Tick types (live, delayed)
+_LAST_BID_ASK = {False: (4, 1, 2), True: (68, 66, 67)}
+_VOLUME = {False: 8, True: 74}
+
+# reqTickByTickData tick type names -> codes sent back
+_TICK_BY_TICK_TYPES = {"Last": 1, "AllLast": 2, "BidAsk": 3, "MidPoint": 4}
+
+# Number of fields after the message id in an openOrder message at
+# SERVER_VERSION, and the offsets the mock fills in (all others stay empty,
+# which ibapi decodes as defaults).
+_OPEN_ORDER_FIELDS = 119
+_OO_ORDER_ID, _OO_SYMBOL, _OO_SEC_TYPE, _OO_EXCHANGE, _OO_CURRENCY = 0, 2, 3, 8, 9
+_OO_ACTION, _OO_QUANTITY, _OO_ORDER_TYPE, _OO_LMT_PRICE, _OO_AUX_PRICE, _OO_TIF = 12, 13, 14, 15, 16, 17
+_OO_ACCOUNT, _OO_CLIENT_ID, _OO_PERM_ID, _OO_STATUS = 19, 23, 24, 85
+
+_DURATION_UNITS = {"S": 1, "D": 86400, "W": 604800, "M": 2592000, "Y": 31536000}
+
+_PRIMARY_EXCHANGES = ("NASDAQ", "NYSE", "ARCA")
+
+
+@dataclass
+class MockTWSConfig:
+    """Mock server settings."""
+
+    host: str = "127.0.0.1"
+    port: int = 7497                  # 0 picks a free port
+    ticks_per_second: float = 10.0    # tickPrice messages per subscription per second
+    depth_updates_per_second: float = 100.0  # Depth updates per reqMktDepth line per second
+    tick_by_tick_per_second: float = 50.0    # Ticks per reqTickByTickData stream per second
+    tick_batch_ms: int = 5            # Ticks due within one batch are written together
+    delayed_default: bool = False     # Delayed tick types before reqMarketDataType
+    positions: int = 3                # Generated starting positions
+    open_orders: int = 2              # Generated working limit orders
+    fill_delay: float = 0.05          # Seconds until a market order fills
+    historical_delay: float = 0.0     # Seconds before answering reqHistoricalData
+    max_historical_bars: int = 20_000
+    account: str = "DU0000001"
+    seed: int = 7
+    unknown_symbols: tuple = ("INVALID",)  # reqContractDetails answers error 200
+
+
+def _field(value) -> bytes:
+    if value is None:
+        return b""
+    if isinstance(value, bool):
+        return b"1" if value else b"0"
+    return str(value).encode()
+
+
+def encode_message(*fields) -> bytes:
+    """Length-prefixed IB API message of NUL-terminated fields."""
+    payload = b"".join(_field(f) + b"\0" for f in fields)
+    return struct.pack("!I", len(payload)) + payload
+
+
+def base_price(symbol: str) -> float:
+    """Deterministic starting price of a symbol (20-520)."""
+    return 20.0 + (zlib.crc32(symbol.encode()) % 50_000) / 100.0
+
+
+def contract_id(symbol: str) -> int:
+    """Deterministic conId of a symbol."""
+    return zlib.crc32(symbol.encode()) % 1_000_000 + 1
+
+
+def parse_duration(duration: str) -> int:
+    """IB duration string ("3600 S", "2 D") to seconds."""
+    count, unit = duration.split()
+    return int(count) * _DURATION_UNITS[unit.upper()[0]]
+
+
+class _Subscription:
+    __slots__ = ("req_id", "symbol", "price", "due", "turn", "delayed", "volume")
+
+    def __init__(self, req_id: int, symbol: str, price: float, delayed: bool):
+        self.req_id = req_id
+        self.symbol = symbol
+        self.price = price
+        self.due = 0.0      # Fractional ticks owed to this subscription
+        self.turn = 0       # Round-robin over last/bid/ask
+        self.delayed = delayed
+        self.volume = 0     # Session volume (shares)
+
+
+class _DepthLine:
+    """One reqMktDepth subscription and the book the client should hold."""
+
+    __slots__ = ("req_id", "symbol", "rows", "smart", "due", "levels")
+
+    def __init__(self, req_id: int, symbol: str, rows: int, smart: bool, mid: float):
+        self.req_id = req_id
+        self.symbol = symbol
+        self.rows = rows
+        self.smart = smart
+        self.due = 0.0
+        # side (0 = ask, 1 = bid) -> [[price, size], ...] best first
+        self.levels = (
+            [[round(mid + 0.01 * (i + 1), 2), 100 * (i + 1)] for i in range(rows)],
+            [[round(mid - 0.01 * (i + 1), 2), 100 * (i + 1)] for i in range(rows)],
+        )
+
+
+class _TickByTickLine:
+    """One reqTickByTickData stream."""
+
+    __slots__ = ("req_id", "symbol", "kind", "due")
+
+    def __init__(self, req_id: int, symbol: str, kind: int):
+        self.req_id = req_id
+        self.symbol = symbol
+        self.kind = kind
+        self.due = 0.0
+
+
+class _Session:
+    """One connected API client."""
+
+    def __init__(self, server: "MockTWSServer", reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._server = server
+        self._reader = reader
+        self._writer = writer
+        self._config = server.config
+        self._rng = random.Random(self._config.seed)
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._depth_lines: Dict[int, _DepthLine] = {}
+        self._tick_by_tick: Dict[int, _TickByTickLine] = {}
+        self._history_tasks: Dict[int, asyncio.Task] = {}
+        self._delayed = self._config.delayed_default
+        self._client_id = 0
+        self._tick_task: Optional[asyncio.Task] = None
+
+    def close(self):
+        self._writer.close()
+
+    def send(self, *fields):
+        self._writer.write(encode_message(*fields))
+        self._server._messages_out += 1
+
+    async def run(self):
+        peer = self._writer.get_extra_info("peername")
+        try:
+            await self._handshake()
+            log.info("Client connected from %s (clientId=%s)", peer, self._client_id)
+            self._tick_task = asyncio.ensure_future(self._stream_ticks())
+            while True:
+                size = struct.unpack("!I", await self._reader.readexactly(4))[0]
+                fields = (await self._reader.readexactly(size)).split(b"\0")[:-1]
+                self._server._messages_in += 1
+                self._dispatch(fields)
+                await self._writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            log.info("Client %s disconnected", peer)
+            tasks = [t for t in (self._tick_task, *self._history_tasks.values()) if t is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._writer.close()
+
+    async def _handshake(self):
+        prefix = await self._reader.readexactly(4)
+        if prefix != b"API\0":
+            raise ConnectionError(f"unexpected prefix {prefix!r}")
+        size = struct.unpack("!I", await self._reader.readexactly(4))[0]
+        versions = (await self._reader.readexactly(size)).decode()
+        log.debug("Client versions: %s", versions)
+        conn_time = datetime.now(timezone.utc).strftime("%Y%m%d %H:%M:%S")
+        self.send(SERVER_VERSION, f"{conn_time} UTC")
+
+        # startApi
+        size = struct.unpack("!I", await self._reader.readexactly(4))[0]
+        fields = (await self._reader.readexactly(size)).split(b"\0")[:-1]
+        if int(fields[0]) != START_API:
+            raise ConnectionError("expected startApi")
+        self._client_id = int(fields[2])
+        self.send(MANAGED_ACCTS, 1, self._config.account)
+        self.send(NEXT_VALID_ID, 1, self._server._next_order_id)
+        await self._writer.drain()
+
+    def _dispatch(self, fields: List[bytes]):
+        msg_id = int(fields[0])
+        handler = self._handlers.get(msg_id)
+        if handler is None:
+            log.debug("Ignoring message %s", msg_id)
+            return
+        handler(self, fields)
+
+    # Market data
+    def _on_req_market_data_type(self, fields):
+        data_type = int(fields[2])
+        self._delayed = data_type in (3, 4)
+
+    def _on_req_mkt_data(self, fields):
+        req_id = int(fields[2])
+        symbol = fields[4].decode()
+        sub = _Subscription(req_id, symbol, self._server.price(symbol), self._delayed)
+        self._subscriptions[req_id] = sub
+        self.send(MARKET_DATA_TYPE, 1, req_id, 3 if self._delayed else 1)
+        # Initial quote, like TWS sends right after subscribing
+        last, bid, ask = _LAST_BID_ASK[sub.delayed]
+        self.send(TICK_PRICE, 6, req_id, bid, f"{sub.price - 0.01:.2f}", 100, 0)
+        self.send(TICK_PRICE, 6, req_id, ask, f"{sub.price + 0.01:.2f}", 100, 0)
+        self.send(TICK_PRICE, 6, req_id, last, f"{sub.price:.2f}", 100, 0)
+
+    def _on_cancel_mkt_data(self, fields):
+        self._subscriptions.pop(int(fields[2]), None)
+
+    async def _stream_ticks(self):
+        """Emit random-walk ticks for all subscriptions at the configured rate."""
+        batch = self._config.tick_batch_ms / 1000.0
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(batch)
+            now = time.monotonic()
+            elapsed, last = now - last, now
+            if self._depth_lines:
+                self._stream_depth(elapsed)
+            if self._tick_by_tick:
+                self._stream_tick_by_tick(elapsed)
+            rate = self._server.ticks_per_second
+            if not self._subscriptions or rate <= 0:
+                continue
+            chunks = []
+            gauss = self._rng.gauss
+            randint = self._rng.randint
+            extra = 0  # Volume updates, not counted as ticks
+            for sub in list(self._subscriptions.values()):
+                sub.due += rate * elapsed
+                count = int(sub.due)
+                sub.due -= count
+                types = _LAST_BID_ASK[sub.delayed]
+                for _ in range(count):
+                    sub.price = max(0.01, sub.price + gauss(0.0, 0.02))
+                    tick_type = types[sub.turn]
+                    sub.turn = (sub.turn + 1) % 3
+                    size = 100 * randint(1, 5)
+                    price = sub.price if tick_type == types[0] else (
+                        sub.price - 0.01 if tick_type == types[1] else sub.price + 0.01
+                    )
+                    payload = f"1\x006\x00{sub.req_id}\x00{tick_type}\x00{price:.2f}\x00{size}\x000\x00".encode()
+                    chunks.append(struct.pack("!I", len(payload)))
+                    chunks.append(payload)
+                    if tick_type == types[0]:
+                        sub.volume += size
+                        volume_type = _VOLUME[sub.delayed]
+                        payload = f"2\x006\x00{sub.req_id}\x00{volume_type}\x00{sub.volume}\x00".encode()
+                        chunks.append(struct.pack("!I", len(payload)))
+                        chunks.append(payload)
+                        extra += 1
+                self._server._prices[sub.symbol] = sub.price
+            if chunks:
+                self._writer.write(b"".join(chunks))
+                self._server._ticks_sent += len(chunks) // 2 - extra
+                self._server._messages_out += len(chunks) // 2
+                await self._writer.drain()
+
+    # Market depth
+    def _on_req_mkt_depth(self, fields):
+        req_id = int(fields[2])
+        symbol = fields[4].decode()
+        rows = max(1, min(int(fields[15] or 10), 50))
+        smart = fields[16] == b"1"
+        line = _DepthLine(req_id, symbol, rows, smart, self._server.price(symbol))
+        self._depth_lines[req_id] = line
+        for side in (1, 0):
+            for position, (price, size) in enumerate(line.levels[side]):
+                self._send_depth(line, position, 0, side, price, size)
+
+    def _on_cancel_mkt_depth(self, fields):
+        self._depth_lines.pop(int(fields[2]), None)
+
+    def _send_depth(self, line: _DepthLine, position: int, operation: int, side: int, price: float, size: int):
+        if line.smart:
+            self.send(MARKET_DEPTH_L2, 1, line.req_id, position, "SMART", operation, side, price, size, 1)
+        else:
+            self.send(MARKET_DEPTH, 1, line.req_id, position, operation, side, price, size)
+
+    def _stream_depth(self, elapsed: float):
+        """Random depth updates: mostly size changes, sometimes the best level is taken or improved."""
+        rate = self._server.depth_updates_per_second
+        rng = self._rng
+        for line in list(self._depth_lines.values()):
+            line.due += rate * elapsed
+            count = int(line.due)
+            line.due -= count
+            for _ in range(count):
+                side = rng.randrange(2)
+                levels = line.levels[side]
+                step = 0.01 if side == 0 else -0.01  # Away from the spread
+                roll = rng.random()
+                if roll < 0.9:
+                    position = rng.randrange(len(levels))
+                    levels[position][1] = 100 * rng.randint(1, 20)
+                    self._send_depth(line, position, 1, side, *levels[position])
+                elif roll < 0.95 or len(levels) < 2:
+                    # Best level consumed: delete it, append a new deepest level
+                    del levels[0]
+                    self._send_depth(line, 0, 2, side, 0.0, 0)
+                    base = levels[-1][0] if levels else line.levels[1 - side][0][0] - step
+                    level = [round(base + step, 2), 100 * rng.randint(1, 20)]
+                    levels.append(level)
+                    self._send_depth(line, len(levels) - 1, 0, side, *level)
+                else:
+                    # Price improvement: new best level, the deepest one drops off
+                    other = line.levels[1 - side]
+                    price = round(levels[0][0] - step, 2)
+                    if other and (price >= other[0][0] if side == 1 else price <= other[0][0]):
+                        continue  # Would lock or cross the book
+                    del levels[-1]
+                    self._send_depth(line, len(levels), 2, side, 0.0, 0)
+                    levels.insert(0, [price, 100 * rng.randint(1, 20)])
+                    self._send_depth(line, 0, 0, side, *levels[0])
+
+    # Tick-by-tick data
+    def _on_req_tick_by_tick_data(self, fields):
+        req_id = int(fields[1])
+        symbol = fields[3].decode()
+        tick_type = fields[14].decode()
+        kind = _TICK_BY_TICK_TYPES.get(tick_type)
+        if kind is None:
+            self.send(ERR_MSG, 2, req_id, 10189, f"Failed to request tick-by-tick data: unknown tick type {tick_type}")
+            return
+        self._tick_by_tick[req_id] = _TickByTickLine(req_id, symbol, kind)
+
+    def _on_cancel_tick_by_tick_data(self, fields):
+        self._tick_by_tick.pop(int(fields[1]), None)
+
+    def _stream_tick_by_tick(self, elapsed: float):
+        """Random-walk trades and quotes around each symbol's current price."""
+        rate = self._server.tick_by_tick_per_second
+        rng = self._rng
+        now = int(time.time())
+        for line in list(self._tick_by_tick.values()):
+            line.due += rate * elapsed
+            count = int(line.due)
+            line.due -= count
+            for _ in range(count):
+                price = max(0.01, self._server.price(line.symbol) + rng.gauss(0.0, 0.01))
+                self._server._prices[line.symbol] = price
+                if line.kind in (1, 2):
+                    self.send(TICK_BY_TICK, line.req_id, line.kind, now, f"{price:.2f}",
+                              100 * rng.randint(1, 5), 0, "ISLAND", "")
+                elif line.kind == 3:
+                    self.send(TICK_BY_TICK, line.req_id, 3, now, f"{price - 0.01:.2f}", f"{price + 0.01:.2f}",
+                              100 * rng.randint(1, 20), 100 * rng.randint(1, 20), 0)
+                else:
+                    self.send(TICK_BY_TICK, line.req_id, 4, now, f"{price:.3f}")
+
+    # Historical data
+    def _on_req_historical_data(self, fields):
+        req_id = int(fields[1])
+        symbol = fields[3].decode()
+        end_time = fields[15].decode()
+        bar_size = fields[16].decode()
+        duration = fields[17].decode()
+        format_date = int(fields[20] or 1)
+        self._history_tasks[req_id] = asyncio.ensure_future(
+            self._send_history(req_id, symbol, end_time, bar_size, duration, format_date)
+        )
+
+    def _on_cancel_historical_data(self, fields):
+        req_id = int(fields[2])
+        task = self._history_tasks.pop(req_id, None)
+        if task is not None:
+            task.cancel()
+            self.send(
+                ERR_MSG, 2, req_id, 162,
+                f"Historical Market Data Service error message:API historical data query cancelled: {req_id}",
+            )
+
+    async def _send_history(self, req_id, symbol, end_time, bar_size, duration, format_date):
+        if self._config.historical_delay:
+            await asyncio.sleep(self._config.historical_delay)
+        self._history_tasks.pop(req_id, None)
+        try:
+            bar_seconds = BAR_SIZE_SECONDS[bar_size]
+            seconds = parse_duration(duration)
+            end = parse_bar_time(end_time) if end_time else int(time.time())
+        except (KeyError, ValueError) as e:
+            self.send(ERR_MSG, 2, req_id, 321, f"Error validating request: {e}")
+            return
+        count = max(1, min(seconds // bar_seconds, self._config.max_historical_bars))
+        first = (end // bar_seconds - count + 1) * bar_seconds
+
+        # Deterministic per symbol and bar start, so repeated requests agree
+        rng = random.Random(zlib.crc32(f"{symbol}:{bar_size}".encode()) ^ first)
+        price = base_price(symbol)
+        fields = [HISTORICAL_DATA, req_id, _ib_time(first), _ib_time(end), count]
+        for i in range(count):
+            start = first + i * bar_seconds
+            open_ = price
+            close = max(0.01, open_ + rng.gauss(0.0, 0.1 * math.sqrt(bar_seconds / 60)))
+            high = max(open_, close) + abs(rng.gauss(0.0, 0.05))
+            low = max(0.01, min(open_, close) - abs(rng.gauss(0.0, 0.05)))
+            price = close
+            if format_date == 2 and bar_seconds < 86400:
+                date = str(start)
+            elif bar_seconds >= 86400:
+                date = datetime.fromtimestamp(start, timezone.utc).strftime("%Y%m%d")
+            else:
+                date = _ib_time(start)
+            fields += [
+                date, f"{open_:.2f}", f"{high:.2f}", f"{low:.2f}", f"{close:.2f}",
+                rng.randint(100, 10_000), f"{(open_ + close) / 2:.4f}", rng.randint(1, 200),
+            ]
+        self.send(*fields)
+        await self._writer.drain()
+
+    # Contract details
+    def _on_req_contract_data(self, fields):
+        req_id = int(fields[2])
+        symbol = fields[4].decode().upper()
+        if symbol in self._config.unknown_symbols:
+            self.send(ERR_MSG, 2, req_id, 200, "No security definition has been found for the request")
+            return
+        currency = fields[12].decode() or "USD"
+        con_id = contract_id(symbol)
+        primary = _PRIMARY_EXCHANGES[con_id % len(_PRIMARY_EXCHANGES)]
+        today = datetime.now(timezone.utc).date()
+        days = [(today + timedelta(days=i)).strftime("%Y%m%d") for i in range(3)]
+        trading_hours = ";".join(f"{d}:0400-{d}:2000" for d in days)
+        liquid_hours = ";".join(f"{d}:0930-{d}:1600" for d in days)
+        self.send(
+            CONTRACT_DATA, 8, req_id, symbol, "STK", "", 0.0, "", "SMART", currency,
+            symbol, "NMS", symbol, con_id, 0.01, 100, "",
+            "ACTIVETIM,LMT,MKT,STP,TRAIL", "SMART,AMEX,NYSE,ARCA,NASDAQ,ISLAND", 1, 0,
+            f"{symbol} Inc", primary, "", "Technology", "Computers", "Software",
+            "US/Eastern", trading_hours, liquid_hours, "", "",
+            0,                  # secIdList count
+            1, "", "", "26", "", "COMMON",
+        )
+        self.send(CONTRACT_DATA_END, 1, req_id)
+
+    # Account data
+    def _on_req_positions(self, fields):
+        for symbol, (quantity, avg_cost) in list(self._server._positions.items()):
+            self.send(
+                POSITION_DATA, 3, self._config.account,
+                contract_id(symbol), symbol, "STK", "", 0.0, "", "",
+                "SMART", "USD", symbol, symbol, quantity, avg_cost,
+            )
+        self.send(POSITION_END, 1)
+
+    def _on_req_open_orders(self, fields):
+        for order in list(self._server._orders.values()):
+            if order["status"] in ("PreSubmitted", "Submitted"):
+                self._send_open_order(order)
+        self.send(OPEN_ORDER_END, 1)
+
+    def _on_req_ids(self, fields):
+        self.send(NEXT_VALID_ID, 1, self._server._next_order_id)
+
+    def _on_req_current_time(self, fields):
+        self.send(CURRENT_TIME, 1, int(time.time()))
+
+    # Orders
+    def _on_place_order(self, fields):
+        order_id = int(fields[1])
+        order = {
+            "orderId": order_id,
+            "symbol": fields[3].decode(),
+            "secType": fields[4].decode() or "STK",
+            "exchange": fields[9].decode() or "SMART",
+            "currency": fields[11].decode() or "USD",
+            "action": fields[16].decode(),
+            "quantity": float(fields[17] or 0),
+            "orderType": fields[18].decode(),
+            "lmtPrice": fields[19].decode(),
+            "auxPrice": fields[20].decode(),
+            "tif": fields[21].decode() or "DAY",
+            "status": "Submitted",
+            "filled": 0.0,
+            "avgFillPrice": 0.0,
+            "clientId": self._client_id,
+        }
+        self._server._orders[order_id] = order
+        self._server._next_order_id = max(self._server._next_order_id, order_id + 1)
+        self._send_open_order(order)
+        self._send_order_status(order)
+        if order["orderType"] == "MKT":
+            asyncio.get_running_loop().call_later(self._config.fill_delay, self._fill, order_id)
+
+    def _on_cancel_order(self, fields):
+        self._cancel(int(fields[2]))
+
+    def _on_req_global_cancel(self, fields):
+        for order_id in list(self._server._orders):
+            self._cancel(order_id)
+
+    def _cancel(self, order_id: int):
+        order = self._server._orders.get(order_id)
+        if order is None or order["status"] not in ("PreSubmitted", "Submitted"):
+            return
+        order["status"] = "Cancelled"
+        self._send_order_status(order)
+
+    def _fill(self, order_id: int):
+        order = self._server._orders.get(order_id)
+        if order is None or order["status"] != "Submitted" or self._writer.is_closing():
+            return
+        price = self._server.price(order["symbol"])
+        order["status"] = "Filled"
+        order["filled"] = order["quantity"]
+        order["avgFillPrice"] = price
+        self._server._apply_fill(order["symbol"], order["action"], order["quantity"], price)
+        self._send_open_order(order)
+        self._send_order_status(order)
+        self._send_execution(order, price)
+
+    def _send_open_order(self, order: dict):
+        fields = [""] * _OPEN_ORDER_FIELDS
+        fields[_OO_ORDER_ID] = order["orderId"]
+        fields[_OO_SYMBOL] = order["symbol"]
+        fields[_OO_SEC_TYPE] = order["secType"]
+        fields[_OO_EXCHANGE] = order["exchange"]
+        fields[_OO_CURRENCY] = order["currency"]
+        fields[_OO_ACTION] = order["action"]
+        fields[_OO_QUANTITY] = order["quantity"]
+        fields[_OO_ORDER_TYPE] = order["orderType"]
+        fields[_OO_LMT_PRICE] = order["lmtPrice"]
+        fields[_OO_AUX_PRICE] = order["auxPrice"]
+        fields[_OO_TIF] = order["tif"]
+        fields[_OO_ACCOUNT] = self._config.account
+        fields[_OO_CLIENT_ID] = order["clientId"]
+        fields[_OO_PERM_ID] = order["orderId"] + 1_000_000
+        fields[_OO_STATUS] = order["status"]
+        self.send(OPEN_ORDER, *fields)
+
+    def _send_order_status(self, order: dict):
+        self.send(
+            ORDER_STATUS, order["orderId"], order["status"], order["filled"],
+            order["quantity"] - order["filled"], order["avgFillPrice"],
+            order["orderId"] + 1_000_000, 0, order["avgFillPrice"], order["clientId"], "", 0.0,
+        )
+
+    def _send_execution(self, order: dict, price: float):
+        symbol = order["symbol"]
+        self.send(
+            EXECUTION_DATA, -1, order["orderId"],
+            contract_id(symbol), symbol, order["secType"], "", 0.0, "", "",
+            order["exchange"], order["currency"], symbol, symbol,
+            f"{order['orderId']:08x}.01", datetime.now().strftime("%Y%m%d  %H:%M:%S"),
+            self._config.account, "ISLAND", "BOT" if order["action"] == "BUY" else "SLD",
+            order["quantity"], price, order["orderId"] + 1_000_000, order["clientId"], 0,
+            order["quantity"], price, "", "", "", "", 0,
+        )
+
+    _handlers = {
+        REQ_MARKET_DATA_TYPE: _on_req_market_data_type,
+        REQ_MKT_DATA: _on_req_mkt_data,
+        CANCEL_MKT_DATA: _on_cancel_mkt_data,
+        REQ_MKT_DEPTH: _on_req_mkt_depth,
+        CANCEL_MKT_DEPTH: _on_cancel_mkt_depth,
+        REQ_TICK_BY_TICK_DATA: _on_req_tick_by_tick_data,
+        CANCEL_TICK_BY_TICK_DATA: _on_cancel_tick_by_tick_data,
+        REQ_HISTORICAL_DATA: _on_req_historical_data,
+        CANCEL_HISTORICAL_DATA: _on_cancel_historical_data,
+        REQ_POSITIONS: _on_req_positions,
+        REQ_OPEN_ORDERS: _on_req_open_orders,
+        REQ_IDS: _on_req_ids,
+        REQ_CONTRACT_DATA: _on_req_contract_data,
+        REQ_CURRENT_TIME: _on_req_current_time,
+        PLACE_ORDER: _on_place_order,
+        CANCEL_ORDER: _on_cancel_order,
+        REQ_GLOBAL_CANCEL: _on_req_global_cancel,
+    }
+
+
+def _ib_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y%m%d  %H:%M:%S")
+
+
+class MockTWSServer:
+    """
+    Mock TWS listening on a local TCP port.
+
+    Runs an asyncio server either on a background thread (start()/stop(),
+    or as a context manager) or in the foreground (serve_forever()). Order
+    and position state is shared by all connected clients.
+    """
+
+    def __init__(self, config: Optional[MockTWSConfig] = None):
+        self.config = config or MockTWSConfig()
+        self.ticks_per_second = self.config.ticks_per_second
+        self.depth_updates_per_second = self.config.depth_updates_per_second
+        self.tick_by_tick_per_second = self.config.tick_by_tick_per_second
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sessions: Dict[asyncio.Task, _Session] = {}
+        self._port = self.config.port
+        self._rng = random.Random(self.config.seed)
+
+        self._prices: Dict[str, float] = {}
+        self._positions: Dict[str, tuple] = {}  # symbol -> (quantity, avg cost)
+        self._orders: Dict[int, dict] = {}
+        self._next_order_id = 1
+        self._seed_account()
+
+        # Counters
+        self._connections = 0
+        self._messages_in = 0
+        self._messages_out = 0
+        self._ticks_sent = 0
+
+    def _seed_account(self):
+        symbols = ["SPY", "QQQ", "AAPL", "MSFT", "NVDA", "AMZN", "META", "TSLA"]
+        symbols += [f"SYM{i:04d}" for i in range(max(0, self.config.positions + self.config.open_orders - len(symbols)))]
+        for symbol in symbols[:self.config.positions]:
+            quantity = self._rng.choice([10, 25, 50, 100, -20])
+            self._positions[symbol] = (float(quantity), round(base_price(symbol) * 0.98, 2))
+        for i in range(self.config.open_orders):
+            symbol = symbols[i % len(symbols)]
+            order_id = self._next_order_id
+            self._next_order_id += 1
+            self._orders[order_id] = {
+                "orderId": order_id, "symbol": symbol, "secType": "STK", "exchange": "SMART",
+                "currency": "USD", "action": "BUY", "quantity": 10.0, "orderType": "LMT",
+                "lmtPrice": f"{base_price(symbol) * 0.9:.2f}", "auxPrice": "", "tif": "GTC",
+                "status": "Submitted", "filled": 0.0, "avgFillPrice": 0.0, "clientId": 0,
+            }
+
+    @property
+    def port(self) -> int:
+        """Bound port (resolved after start() when config.port is 0)."""
+        return self._port
+
+    @property
+    def address(self) -> tuple:
+        return (self.config.host, self._port)
+
+    def price(self, symbol: str) -> float:
+        """Current mid price of a symbol."""
+        return self._prices.setdefault(symbol, base_price(symbol))
+
+    def set_tick_rate(self, ticks_per_second: float):
+        """Change the per-subscription tick rate of all clients."""
+        self.ticks_per_second = ticks_per_second
+
+    def set_depth_rate(self, updates_per_second: float):
+        """Change the per-line market depth update rate of all clients."""
+        self.depth_updates_per_second = updates_per_second
+
+    def set_tick_by_tick_rate(self, ticks_per_second: float):
+        """Change the per-stream tick-by-tick rate of all clients."""
+        self.tick_by_tick_per_second = ticks_per_second
+
+    @property
+    def stats(self) -> dict:
+        """Server counters."""
+        return {
+            "connections": self._connections,
+            "messages_in": self._messages_in,
+            "messages_out": self._messages_out,
+            "ticks_sent": self._ticks_sent,
+        }
+
+    def _apply_fill(self, symbol: str, action: str, quantity: float, price: float):
+        held, avg_cost = self._positions.get(symbol, (0.0, 0.0))
+        signed = quantity if action == "BUY" else -quantity
+        total = held + signed
+        if total == 0:
+            self._positions.pop(symbol, None)
+            return
+        if held == 0 or (held > 0) == (signed > 0):
+            avg_cost = (held * avg_cost + signed * price) / total
+        self._positions[symbol] = (total, avg_cost)
+
+    async def _on_client(self, reader, writer):
+        self._connections += 1
+        task = asyncio.current_task()
+        session = self._sessions[task] = _Session(self, reader, writer)
+        try:
+            await session.run()
+        finally:
+            self._sessions.pop(task, None)
+
+    async def _open(self):
+        self._server = await asyncio.start_server(self._on_client, self.config.host, self.config.port)
+        self._port = self._server.sockets[0].getsockname()[1]
+        log.info("Mock TWS listening on %s:%s (server version %s)", self.config.host, self._port, SERVER_VERSION)
+
+    async def _close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Closing the sockets ends each session's read loop
+        for session in list(self._sessions.values()):
+            session.close()
+        await asyncio.gather(*self._sessions, return_exceptions=True)
+
+    def start(self) -> "MockTWSServer":
+        """Start serving on a background thread."""
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._open())
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="MockTWS", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            self._thread = None
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Stop the background server and disconnect all clients."""
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        async def main():
+            await self._open()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await self._close()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    from .logger import setup_logging
+    import logging
+
+    parser = argparse.ArgumentParser(description="Mock TWS server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7497)
+    parser.add_argument("--ticks-per-second", type=float, default=10.0,
+                        help="tickPrice messages per subscription per second")
+    parser.add_argument("--depth-updates-per-second", type=float, default=100.0,
+                        help="Market depth updates per reqMktDepth line per second")
+    parser.add_argument("--tick-by-tick-per-second", type=float, default=50.0,
+                        help="Ticks per reqTickByTickData stream per second")
+    parser.add_argument("--positions", type=int, default=3)
+    parser.add_argument("--open-orders", type=int, default=2)
+    parser.add_argument("--fill-delay", type=float, default=0.05)
+    parser.add_argument("--historical-delay", type=float, default=0.0)
+    parser.add_argument("--delayed", action="store_true", help="Send delayed tick types by default")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    config = MockTWSConfig(
+        host=args.host,
+        port=args.port,
+        ticks_per_second=args.ticks_per_second,
+        depth_updates_per_second=args.depth_updates_per_second,
+        tick_by_tick_per_second=args.tick_by_tick_per_second,
+        delayed_default=args.delayed,
+        positions=args.positions,
+        open_orders=args.open_orders,
+        fill_delay=args.fill_delay,
+        historical_delay=args.historical_delay,
+        seed=args.seed,
+    )
+    MockTWSServer(config).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
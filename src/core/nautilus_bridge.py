@@ -9,6 +9,14 @@ import threading
 from typing import Optional, Any
 from PySide6.QtCore import QObject, Signal, Slot, Qt
 
+from .logger import get_logger
+
+log = get_logger("nautilus")
+
+# Error code of requests this bridge cannot serve yet; they fail through
+# request_error / order_error instead of waiting forever
+UNSUPPORTED_ERROR = -1
+
 
 class NautilusBridge(QObject):
     """
@@ -28,20 +36,25 @@ class NautilusBridge(QObject):
     quote_received = Signal(object)  # Quote data
     trade_received = Signal(object)  # Trade data
     price_received = Signal(str, float)  # symbol, price
+    ticks_received = Signal(object)  # reqId -> TickEvent (IBKRBridge compatibility)
+    quotes_received = Signal(object)  # reqId -> QuoteEvent (IBKRBridge compatibility)
+    depth_received = Signal(object)  # reqId -> DepthEvent (IBKRBridge compatibility)
+    tick_by_tick_received = Signal(object)  # reqId -> records appended (IBKRBridge compatibility)
     
     # Order signals
     order_submitted = Signal(object)  # OrderEvent
     order_filled = Signal(object)  # OrderFilled
     order_canceled = Signal(object)  # OrderCanceled
     order_rejected = Signal(object)  # OrderRejected
-    order_received = Signal(dict)
-    order_status_received = Signal(dict)
+    order_received = Signal(object)  # OrderEvent
+    order_status_received = Signal(object)  # OrderStatusEvent
+    execution_received = Signal(object)  # ExecutionEvent
     
     # Position signals
     position_opened = Signal(object)  # Position
     position_changed = Signal(object)  # Position
     position_closed = Signal(object)  # Position
-    position_received = Signal(dict)
+    position_received = Signal(object)  # PositionEvent
     positions_complete = Signal()
     
     # Account signals
@@ -53,14 +66,23 @@ class NautilusBridge(QObject):
     
     # Error signal
     error_occurred = Signal(int, str)
+    request_error = Signal(int, int, str)
+    order_error = Signal(int, int, str)
     
     # Historical data signals
-    historical_bar_received = Signal(int, object)
+    historical_bars_received = Signal(int, object, bool)
+    historical_data_end = Signal(int, str, str)
+    
+    # Contract signals (IBKRBridge compatibility)
+    contract_details_received = Signal(int, object)
+    contract_details_end = Signal(int)
     
     # Internal signals for thread safety
     _internal_connected = Signal()
     _internal_disconnected = Signal()
     _internal_error = Signal(int, str)
+    _internal_request_error = Signal(int, int, str)
+    _internal_order_error = Signal(int, int, str)
     
     def __init__(self, parent: Optional[QObject] = None):
         super().__init__(parent)
@@ -77,6 +99,9 @@ class NautilusBridge(QObject):
         self._internal_connected.connect(self._on_internal_connected, Qt.QueuedConnection)
         self._internal_disconnected.connect(self._on_internal_disconnected, Qt.QueuedConnection)
         self._internal_error.connect(self._on_internal_error, Qt.QueuedConnection)
+        # Queued: the caller records a request before its error arrives
+        self._internal_request_error.connect(self.request_error, Qt.QueuedConnection)
+        self._internal_order_error.connect(self.order_error, Qt.QueuedConnection)
         
     def _on_internal_connected(self):
         self._is_connected = True
@@ -91,6 +116,13 @@ class NautilusBridge(QObject):
     def _on_internal_error(self, code, msg):
         self.error_occurred.emit(code, msg)
         
+    def _unsupported(self, signal, req_id: int, what: str) -> int:
+        """Fail a request this bridge cannot serve yet through `signal` (request or order error)."""
+        msg = f"{what} is not supported with USE_NAUTILUS=1"
+        log.warning("%s (reqId=%s)", msg, req_id)
+        signal.emit(req_id, UNSUPPORTED_ERROR, msg)
+        return req_id
+        
     @property
     def is_connected(self) -> bool:
         return self._is_connected
@@ -99,11 +131,11 @@ class NautilusBridge(QObject):
     def connect_to_tws(self):
         """Connect to the Dockerized IB Gateway via Nautilus."""
         if self._is_connected:
-            print("[Nautilus] Already connected")
+            log.info("Already connected")
             return
             
         self.connection_status_changed.emit("connecting")
-        print(f"[Nautilus] Connecting to IB Gateway at {self._gateway_host}:{self._gateway_port}...")
+        log.info("Connecting to IB Gateway at %s:%s...", self._gateway_host, self._gateway_port)
         
         # Start async event loop in background thread
         self._thread = threading.Thread(target=self._run_node, daemon=True)
@@ -116,7 +148,7 @@ class NautilusBridge(QObject):
             asyncio.set_event_loop(self._loop)
             self._loop.run_until_complete(self._connect_async())
         except Exception as e:
-            print(f"[Nautilus] Error: {e}")
+            log.error("Error: %s", e)
             self._internal_error.emit(0, str(e))
             self._internal_disconnected.emit()
             
@@ -179,18 +211,18 @@ class NautilusBridge(QObject):
             # Subscribe to events
             self._subscribe_to_events()
             
-            print("[Nautilus] Node built successfully")
+            log.info("Node built successfully")
             self._internal_connected.emit()
             
             # Run the node
             await self._trading_node.run_async()
             
         except ImportError as e:
-            print(f"[Nautilus] Import error: {e}")
+            log.error("Import error: %s", e)
             self._internal_error.emit(1, f"Import error: {e}")
             self._internal_disconnected.emit()
         except Exception as e:
-            print(f"[Nautilus] Connection error: {e}")
+            log.error("Connection error: %s", e)
             self._internal_error.emit(2, str(e))
             self._internal_disconnected.emit()
             
@@ -204,20 +236,20 @@ class NautilusBridge(QObject):
         
         # Subscribe to various events
         # TODO: Add specific event subscriptions
-        print("[Nautilus] Event subscriptions configured")
+        log.info("Event subscriptions configured")
         
     @Slot()
     def disconnect_from_tws(self):
         """Disconnect from Nautilus/IB Gateway."""
         if self._trading_node:
-            print("[Nautilus] Stopping node...")
+            log.info("Stopping node...")
             try:
                 if self._loop and self._loop.is_running():
                     asyncio.run_coroutine_threadsafe(
                         self._trading_node.stop_async(), self._loop
                     )
             except Exception as e:
-                print(f"[Nautilus] Stop error: {e}")
+                log.error("Stop error: %s", e)
         
         self._is_connected = False
         self._internal_disconnected.emit()
@@ -225,35 +257,80 @@ class NautilusBridge(QObject):
     @Slot()
     def reconnect(self):
         """Reconnect to IB Gateway."""
-        print("[Nautilus] Reconnecting...")
+        log.info("Reconnecting...")
         self.disconnect_from_tws()
         self.connect_to_tws()
         
     # Compatibility methods with IBKRBridge interface
     def subscribe_market_data(self, symbol: str, req_id: int = 1001):
         """Subscribe to market data (compatibility)."""
-        print(f"[Nautilus] Market data subscription for {symbol} - TODO")
+        log.debug("Market data subscription for %s - TODO", symbol)
+        
+    def quote(self, req_id: int):
+        """Current L1 quote (compatibility)."""
+        return None
         
     def unsubscribe_market_data(self, req_id: int):
         """Unsubscribe from market data (compatibility)."""
-        print(f"[Nautilus] Unsubscribe reqId={req_id} - TODO")
+        log.debug("Unsubscribe reqId=%s - TODO", req_id)
+        
+    def request_market_depth(self, symbol: str, req_id: int, *args, **kwargs) -> int:
+        """Request market depth (compatibility; fails with request_error)."""
+        return self._unsupported(self._internal_request_error, req_id, f"Market depth for {symbol}")
+        
+    def cancel_market_depth(self, req_id: int):
+        """Cancel market depth (compatibility; depth requests fail, so nothing is open)."""
+        
+    def request_tick_by_tick(self, symbol: str, req_id: int, *args, **kwargs) -> int:
+        """Request tick-by-tick data (compatibility; fails with request_error)."""
+        return self._unsupported(self._internal_request_error, req_id, f"Tick-by-tick data for {symbol}")
         
-    def request_historical_data(self, symbol: str, req_id: int = 2001):
-        """Request historical data (compatibility)."""
-        print(f"[Nautilus] Historical data for {symbol} - TODO")
+    def cancel_tick_by_tick(self, req_id: int):
+        """Cancel tick-by-tick data (compatibility; tick-by-tick requests fail, so nothing is open)."""
+        
+    def tick_ring(self, req_id: int):
+        """Ring of a tick-by-tick stream (compatibility)."""
+        return None
+        
+    def request_historical_data(self, symbol: str, req_id: int = 2001, *args, **kwargs) -> int:
+        """Request historical data (compatibility; fails with request_error)."""
+        return self._unsupported(self._internal_request_error, req_id, f"Historical data for {symbol}")
+        
+    def cancel_historical_data(self, req_id: int):
+        """Cancel historical data (compatibility; history requests fail, so nothing is open)."""
+        
+    def request_contract_details(self, symbol: str, req_id: int) -> int:
+        """Request contract details (compatibility; fails with request_error)."""
+        return self._unsupported(self._internal_request_error, req_id, f"Contract details for {symbol}")
+        
+    def set_contract_cache(self, cache):
+        """Contracts are resolved by Nautilus' instrument provider (compatibility)."""
+        pass
         
     def request_positions(self):
         """Request positions (compatibility)."""
-        print("[Nautilus] Requesting positions - TODO")
+        log.debug("Requesting positions - TODO")
         
     def request_open_orders(self):
         """Request open orders (compatibility)."""
-        print("[Nautilus] Requesting orders - TODO")
+        log.debug("Requesting orders - TODO")
         
     def place_order(self, symbol, action, quantity, order_type, limit_price=None):
         """Place order (compatibility)."""
-        print(f"[Nautilus] Place order {action} {quantity} {symbol} - TODO")
+        log.debug("Place order %s %s %s - TODO", action, quantity, symbol)
+        
+    def allocate_order_ids(self, count: int = 1) -> int:
+        """Reserve order IDs (compatibility; Nautilus assigns its own)."""
+        return -1
+        
+    def cancel_order(self, order_id: int):
+        """Cancel one order (compatibility; fails with order_error)."""
+        self._unsupported(self._internal_order_error, order_id, f"Cancelling order {order_id}")
         
     def cancel_all_orders(self):
         """Cancel all orders (compatibility)."""
-        print("[Nautilus] Cancel all orders - TODO")
+        log.debug("Cancel all orders - TODO")
+        
+    def submit_many(self, calls, priority=None):
+        """Make many requests at once (compatibility; no message throttle)."""
+        return [call() for call in calls]
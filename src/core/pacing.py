@@ -0,0 +1,388 @@
+"""
+IB Pacing Rules.
+
+Request budget for TWS historical data, which rejects requests with a
+"pacing violation" when any of these is exceeded:
+
+* more than 60 requests within any 10 minute period
+* an identical request within 15 seconds
+* 6 or more requests for the same contract/exchange/tick type within 2 seconds
+
+and the outgoing message throttle for the API connection as a whole, which
+TWS closes when a client sends more than 50 messages per second.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+from ibapi.message import OUT
+
+from .latency import LatencyHistogram
+
+# Outgoing message priorities (lower is sent first)
+MSG_PRIORITY_HIGH = 0     # Orders and order cancels
+MSG_PRIORITY_NORMAL = 10  # Session, account and other requests
+MSG_PRIORITY_LOW = 20     # Market data requests and their cancels
+
+# Outgoing message id -> priority (others are MSG_PRIORITY_NORMAL). A data
+# request and its cancel share a priority, so they can never swap places.
+MESSAGE_PRIORITIES = {
+    OUT.PLACE_ORDER: MSG_PRIORITY_HIGH,
+    OUT.CANCEL_ORDER: MSG_PRIORITY_HIGH,
+    OUT.REQ_GLOBAL_CANCEL: MSG_PRIORITY_HIGH,
+    OUT.EXERCISE_OPTIONS: MSG_PRIORITY_HIGH,
+    OUT.REQ_MKT_DATA: MSG_PRIORITY_LOW,
+    OUT.CANCEL_MKT_DATA: MSG_PRIORITY_LOW,
+    OUT.REQ_MKT_DEPTH: MSG_PRIORITY_LOW,
+    OUT.CANCEL_MKT_DEPTH: MSG_PRIORITY_LOW,
+    OUT.REQ_TICK_BY_TICK_DATA: MSG_PRIORITY_LOW,
+    OUT.CANCEL_TICK_BY_TICK_DATA: MSG_PRIORITY_LOW,
+    OUT.REQ_HISTORICAL_DATA: MSG_PRIORITY_LOW,
+    OUT.CANCEL_HISTORICAL_DATA: MSG_PRIORITY_LOW,
+    OUT.REQ_HISTORICAL_TICKS: MSG_PRIORITY_LOW,
+    OUT.REQ_HEAD_TIMESTAMP: MSG_PRIORITY_LOW,
+    OUT.CANCEL_HEAD_TIMESTAMP: MSG_PRIORITY_LOW,
+    OUT.REQ_REAL_TIME_BARS: MSG_PRIORITY_LOW,
+    OUT.CANCEL_REAL_TIME_BARS: MSG_PRIORITY_LOW,
+    OUT.REQ_CONTRACT_DATA: MSG_PRIORITY_LOW,
+    OUT.REQ_SCANNER_SUBSCRIPTION: MSG_PRIORITY_LOW,
+    OUT.CANCEL_SCANNER_SUBSCRIPTION: MSG_PRIORITY_LOW,
+}
+
+
+def message_priority(msg) -> int:
+    """Priority of an encoded outgoing message (its first field is the message id)."""
+    head = msg.split("\0", 1)[0] if isinstance(msg, str) else msg.split(b"\0", 1)[0]
+    try:
+        return MESSAGE_PRIORITIES.get(int(head), MSG_PRIORITY_NORMAL)
+    except ValueError:
+        return MSG_PRIORITY_NORMAL
+
+
+class PacingLimiter:
+    """
+    Token bucket for IB's historical data pacing rules.
+
+    Each token comes back exactly `window` seconds after it was spent, which
+    makes the bucket a sliding window. A bucket that refills continuously
+    (60 tokens / 600 s) would let a full burst plus the refill through in the
+    first window, i.e. up to twice what IB accepts.
+    """
+
+    def __init__(
+        self,
+        max_requests: int = 60,
+        window: float = 600.0,
+        identical_interval: float = 15.0,
+        burst_requests: int = 5,
+        burst_window: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._max_requests = max_requests
+        self._window = window
+        self._identical_interval = identical_interval
+        self._burst_requests = burst_requests
+        self._burst_window = burst_window
+        self._clock = clock
+
+        self._sent: Deque[float] = deque()                    # Send times, oldest first
+        self._last_identical: Dict[Hashable, float] = {}      # Request key -> last send
+        self._per_contract: Dict[Hashable, Deque[float]] = {}  # Contract key -> send times
+        self._blocked_until = 0.0
+
+    @property
+    def max_requests(self) -> int:
+        return self._max_requests
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    def now(self) -> float:
+        return self._clock()
+
+    def available(self, now: Optional[float] = None) -> int:
+        """Tokens left in the current window."""
+        now = self._clock() if now is None else now
+        self._expire(now)
+        return self._max_requests - len(self._sent)
+
+    def delay(self, key: Hashable = None, contract_key: Hashable = None, now: Optional[float] = None) -> float:
+        """
+        Seconds until a request may be sent (0 if it may be sent now).
+
+        Args:
+            key: Identity of the request (identical-request rule)
+            contract_key: Contract/exchange/tick type of the request (burst rule)
+        """
+        now = self._clock() if now is None else now
+        self._expire(now)
+        wait = max(0.0, self._blocked_until - now)
+        if len(self._sent) >= self._max_requests:
+            wait = max(wait, self._sent[0] + self._window - now)
+        if key is not None and key in self._last_identical:
+            wait = max(wait, self._last_identical[key] + self._identical_interval - now)
+        sends = self._per_contract.get(contract_key) if contract_key is not None else None
+        if sends and len(sends) >= self._burst_requests:
+            wait = max(wait, sends[-self._burst_requests] + self._burst_window - now)
+        return wait
+
+    def record(self, key: Hashable = None, contract_key: Hashable = None, now: Optional[float] = None):
+        """Spend a token for a request that was just sent."""
+        now = self._clock() if now is None else now
+        self._sent.append(now)
+        if key is not None:
+            self._last_identical[key] = now
+        if contract_key is not None:
+            sends = self._per_contract.setdefault(contract_key, deque(maxlen=self._burst_requests))
+            sends.append(now)
+
+    def block(self, seconds: float, now: Optional[float] = None):
+        """Stop all requests for a while (e.g. after a pacing violation)."""
+        now = self._clock() if now is None else now
+        self._blocked_until = max(self._blocked_until, now + seconds)
+
+    def reset(self):
+        """Forget all sent requests."""
+        self._sent.clear()
+        self._last_identical.clear()
+        self._per_contract.clear()
+        self._blocked_until = 0.0
+
+    def _expire(self, now: float):
+        sent = self._sent
+        while sent and sent[0] <= now - self._window:
+            sent.popleft()
+        if len(self._last_identical) > 4 * self._max_requests:
+            cutoff = now - self._identical_interval
+            self._last_identical = {k: t for k, t in self._last_identical.items() if t > cutoff}
+        if len(self._per_contract) > 4 * self._max_requests:
+            cutoff = now - self._burst_window
+            self._per_contract = {k: d for k, d in self._per_contract.items() if d[-1] > cutoff}
+
+
+class MessageThrottle:
+    """
+    Token bucket for all messages sent on the API connection.
+
+    Tokens refill continuously at `rate` per second up to `burst`, so no
+    one-second window carries more than `rate + burst` messages; the
+    defaults keep that at IB's limit of 50. A message that finds no token
+    waits in a queue per priority and is sent by drain(), orders before
+    other requests before market data requests, first in first out within
+    a priority. While nothing is queued, messages go out immediately.
+
+    Thread-safe: messages may be submitted from any thread. The owner calls
+    drain() once next_delay() has passed (IBKRBridge uses a timer). Messages
+    are taken off the queue under the lock and sent outside it, one sender
+    at a time so they keep their order; if a send raises, that message is
+    counted as failed, the rest of its batch goes back to the front of the
+    queue and the exception propagates.
+    """
+
+    DEFAULT_RATE = 45.0
+    DEFAULT_BURST = 5
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self._rate = float(rate)
+        self._burst = int(burst)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._send_lock = threading.RLock()  # Serializes sending; never taken inside _lock
+        self._tokens = float(burst)
+        self._refilled = clock()
+        # Priority -> (enqueued at, message, send) in submission order
+        self._queues: Dict[int, Deque[tuple]] = {}
+        self._queued = 0
+        self._override = threading.local()  # Priority forced by priority()
+
+        # Counters
+        self._sent = 0
+        self._delayed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._max_queued = 0
+        self._wait = LatencyHistogram()  # Queue wait of delayed messages
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def burst(self) -> int:
+        return self._burst
+
+    @property
+    def queued(self) -> int:
+        """Messages waiting for a token."""
+        return self._queued
+
+    def set_rate(self, rate: float, burst: Optional[int] = None):
+        """Change the sustained rate (messages per second) and optionally the burst."""
+        if rate <= 0 or (burst is not None and burst < 1):
+            raise ValueError("rate must be positive and burst at least 1")
+        with self._lock:
+            self._refill(self._clock())
+            self._rate = float(rate)
+            if burst is not None:
+                self._burst = int(burst)
+                self._tokens = min(self._tokens, self._burst)
+
+    @contextmanager
+    def priority(self, priority: Optional[int]):
+        """Send every message submitted by this thread inside the block at `priority` (None = by type)."""
+        previous = getattr(self._override, "priority", None)
+        self._override.priority = priority
+        try:
+            yield
+        finally:
+            self._override.priority = previous
+
+    def submit(self, msg, send: Callable, priority: Optional[int] = None) -> bool:
+        """
+        Send `msg` through `send(msg)` as soon as the rate allows.
+
+        Args:
+            msg: Encoded message
+            send: Transport of the connection the message belongs to
+            priority: MSG_PRIORITY_* (default: by message type, see MESSAGE_PRIORITIES)
+
+        Returns:
+            True if the message was sent now, False if it was queued
+        """
+        if priority is None:
+            priority = getattr(self._override, "priority", None)
+            if priority is None:
+                priority = message_priority(msg)
+        with self._send_lock:
+            with self._lock:
+                now = self._clock()
+                queue = self._queues.get(priority)
+                if queue is None:
+                    queue = self._queues[priority] = deque()
+                    self._queues = dict(sorted(self._queues.items()))
+                entry = (now, msg, send)
+                queue.append(entry)
+                self._queued += 1
+                if self._queued > self._max_queued:
+                    self._max_queued = self._queued
+                batch = self._take(now)
+            self._send(batch)
+            return any(taken is entry for taken, _ in batch)
+
+    def drain(self) -> int:
+        """Send the queued messages that have tokens now. Returns the number sent."""
+        with self._send_lock:
+            with self._lock:
+                batch = self._take(self._clock())
+            return self._send(batch)
+
+    def next_delay(self) -> Optional[float]:
+        """Seconds until the next queued message can be sent (None if nothing is queued)."""
+        with self._lock:
+            if not self._queued:
+                return None
+            self._refill(self._clock())
+            return max(0.0, (1.0 - self._tokens) / self._rate)
+
+    def eta(self) -> float:
+        """Seconds until everything queued now has been sent."""
+        with self._lock:
+            self._refill(self._clock())
+            return max(0.0, (self._queued - self._tokens) / self._rate)
+
+    def clear(self) -> int:
+        """Drop all queued messages (e.g. their connection closed). Returns how many."""
+        with self._lock:
+            dropped = self._queued
+            self._queues.clear()
+            self._queued = 0
+            self._dropped += dropped
+            return dropped
+
+    def reset_stats(self):
+        with self._lock:
+            self._sent = self._delayed = self._dropped = self._failed = 0
+            self._max_queued = self._queued
+            self._wait.reset()
+
+    @property
+    def stats(self) -> dict:
+        """Throttle counters; `wait_ms` summarizes how long delayed messages queued."""
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                "rate": self._rate,
+                "burst": self._burst,
+                "tokens": round(self._tokens, 2),
+                "queued": self._queued,
+                "queued_by_priority": {p: len(q) for p, q in self._queues.items() if q},
+                "max_queued": self._max_queued,
+                "sent": self._sent,
+                "delayed": self._delayed,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "wait_ms": self._wait.summary(),
+            }
+
+    def _refill(self, now: float):
+        if now > self._refilled:
+            self._tokens = min(float(self._burst), self._tokens + (now - self._refilled) * self._rate)
+        self._refilled = now
+
+    def _take(self, now: float) -> List[tuple]:
+        """Dequeue the messages that have tokens, highest priority first (lock held)."""
+        self._refill(now)
+        batch = []
+        for priority, queue in self._queues.items():
+            while queue and self._tokens >= 1.0:
+                batch.append((queue.popleft(), priority))
+                self._tokens -= 1.0
+                self._queued -= 1
+            if self._tokens < 1.0:
+                break
+        return batch
+
+    def _send(self, batch: List[tuple]) -> int:
+        """Send a batch from _take() in order (send lock held, state lock not)."""
+        now = self._clock()
+        for i, ((_, msg, send), _) in enumerate(batch):
+            try:
+                send(msg)
+            except BaseException:
+                with self._lock:
+                    self._failed += 1
+                    self._count_sent(batch[:i], now)
+                    self._restore(batch[i + 1:])
+                raise
+        with self._lock:
+            self._count_sent(batch, now)
+        return len(batch)
+
+    def _count_sent(self, sent: List[tuple], now: float):
+        """Sent and delayed counters and queue waits (lock held)."""
+        self._sent += len(sent)
+        for (enqueued, _, _), _ in sent:
+            if now > enqueued:
+                self._delayed += 1
+                self._wait.record(int((now - enqueued) * 1e9))
+
+    def _restore(self, unsent: List[tuple]):
+        """Put the rest of a failed batch back at the front and give back its tokens (lock held)."""
+        for entry, priority in reversed(unsent):
+            queue = self._queues.get(priority)
+            if queue is None:
+                queue = self._queues[priority] = deque()
+                self._queues = dict(sorted(self._queues.items()))
+            queue.appendleft(entry)
+        self._queued += len(unsent)
+        self._tokens = min(float(self._burst), self._tokens + len(unsent))
@@ -0,0 +1,24 @@
+"""
+Local Data Paths.
+
+Location of QS-Gen3.0's on-disk caches. Defaults to ~/.qs_gen3 and can be
+moved with the QS_DATA_DIR environment variable.
+"""
+import os
+from pathlib import Path
+
+DEFAULT_DATA_DIR = Path.home() / ".qs_gen3"
+
+
+def data_dir(*parts: str) -> Path:
+    """
+    Get (and create) a directory under the local data root.
+
+    Args:
+        *parts: Sub-directory names, e.g. data_dir("bars")
+    """
+    root = os.environ.get("QS_DATA_DIR")
+    path = Path(root).expanduser() if root else DEFAULT_DATA_DIR
+    path = path.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,184 @@
+"""
+Quote Book.
+
+Level 1 state of every market data line (best bid/ask with sizes, last trade,
+session volume and OHLC) in preallocated columns that the TWS reader thread
+updates in place. The GUI thread takes consistent QuoteEvent snapshots of the
+lines that changed, once per frame.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from .events import QuoteEvent
+
+# Column order matches the QuoteEvent fields after req_id
+COLUMNS = (
+    "bid", "ask", "last", "bid_size", "ask_size", "last_size", "volume",
+    "open", "high", "low", "close", "last_time", "updated", "halted",
+)
+
+# Tick type -> column (live and delayed tick types)
+PRICE_TICKS = {
+    1: "bid", 2: "ask", 4: "last", 6: "high", 7: "low", 9: "close", 14: "open",
+    66: "bid", 67: "ask", 68: "last", 72: "high", 73: "low", 75: "close", 76: "open",
+}
+SIZE_TICKS = {
+    0: "bid_size", 3: "ask_size", 5: "last_size", 8: "volume",
+    69: "bid_size", 70: "ask_size", 71: "last_size", 74: "volume",
+}
+LAST_TIMESTAMP_TICKS = (45, 88)  # tickString: last trade time, epoch seconds
+HALTED_TICK = 49                 # tickGeneric: 0 = trading, 1/2 = halted
+
+
+class QuoteBook:
+    """
+    Columnar L1 book keyed by market data reqId.
+
+    Every column is a float64 array with one row per line; rows are handed
+    out on the first tick of a reqId and reused after remove(). Writers and
+    readers share one lock, so a snapshot never mixes two updates of a line.
+    Thread-safe.
+    """
+
+    def __init__(self, capacity: int = 128):
+        self._lock = threading.Lock()
+        self._capacity = max(1, capacity)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.full(self._capacity, np.nan) for name in COLUMNS
+        }
+        self._updated = self._columns["updated"]
+        self._rows: Dict[int, int] = {}  # reqId -> row
+        self._free: List[int] = []       # Rows of removed reqIds
+        self._dirty: Set[int] = set()    # reqIds changed since the last publish()
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, req_id: int) -> bool:
+        return req_id in self._rows
+
+    def _row(self, req_id: int) -> int:
+        """Row of a reqId, allocated on first use (lock held)."""
+        row = self._rows.get(req_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._rows)
+                if row == self._capacity:
+                    self._grow()
+            self._rows[req_id] = row
+        return row
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan)
+            grown[:self._capacity] = column
+            self._columns[name] = grown
+        self._updated = self._columns["updated"]
+        self._capacity = capacity
+
+    def _set(self, req_id: int, column: str, value: float, now: float):
+        with self._lock:
+            row = self._row(req_id)
+            self._columns[column][row] = value
+            if column == "last":
+                self._columns["last_time"][row] = now
+            self._updated[row] = now
+            self._dirty.add(req_id)
+            self._updates += 1
+
+    def update_price(self, req_id: int, tick_type: int, price: float) -> bool:
+        """Apply a tickPrice. Returns False for tick types the book ignores."""
+        column = PRICE_TICKS.get(tick_type)
+        if column is None or price < 0:  # -1 = no quote (e.g. market closed)
+            return False
+        self._set(req_id, column, price, time.time())
+        return True
+
+    def update_size(self, req_id: int, tick_type: int, size: float) -> bool:
+        """Apply a tickSize. Returns False for tick types the book ignores."""
+        column = SIZE_TICKS.get(tick_type)
+        if column is None:
+            return False
+        self._set(req_id, column, float(size), time.time())
+        return True
+
+    def update_generic(self, req_id: int, tick_type: int, value: float) -> bool:
+        """Apply a tickGeneric (trading halts)."""
+        if tick_type != HALTED_TICK:
+            return False
+        self._set(req_id, "halted", 1.0 if value > 0 else 0.0, time.time())
+        return True
+
+    def update_string(self, req_id: int, tick_type: int, value: str) -> bool:
+        """Apply a tickString (exchange time of the last trade)."""
+        if tick_type not in LAST_TIMESTAMP_TICKS:
+            return False
+        try:
+            last_time = float(value)
+        except ValueError:
+            return False
+        with self._lock:
+            self._columns["last_time"][self._row(req_id)] = last_time
+        return True
+
+    def _snapshot(self, req_id: int, row: int) -> QuoteEvent:
+        """Lock held."""
+        values = [float(self._columns[name][row]) for name in COLUMNS]
+        values[-1] = values[-1] > 0  # halted (NaN -> False)
+        return QuoteEvent(req_id, *values)
+
+    def quote(self, req_id: int) -> Optional[QuoteEvent]:
+        """Current quote of a line, or None if it has no ticks."""
+        with self._lock:
+            row = self._rows.get(req_id)
+            return None if row is None else self._snapshot(req_id, row)
+
+    def publish(self) -> Dict[int, QuoteEvent]:
+        """Snapshots of the lines changed since the last call (reqId -> QuoteEvent)."""
+        with self._lock:
+            if not self._dirty:
+                return {}
+            dirty, self._dirty = self._dirty, set()
+            return {
+                req_id: self._snapshot(req_id, self._rows[req_id])
+                for req_id in dirty if req_id in self._rows
+            }
+
+    def column(self, name: str, req_ids: List[int]) -> np.ndarray:
+        """One column for several lines (NaN for unknown reqIds), e.g. all bids."""
+        with self._lock:
+            source = self._columns[name]
+            return np.array(
+                [source[self._rows[req_id]] if req_id in self._rows else np.nan for req_id in req_ids]
+            )
+
+    def remove(self, req_id: int):
+        """Forget a line (e.g. after cancelMktData) and free its row."""
+        with self._lock:
+            row = self._rows.pop(req_id, None)
+            if row is None:
+                return
+            for column in self._columns.values():
+                column[row] = np.nan
+            self._free.append(row)
+            self._dirty.discard(req_id)
+
+    def clear(self):
+        with self._lock:
+            for column in self._columns.values():
+                column[:] = np.nan
+            self._rows.clear()
+            self._free.clear()
+            self._dirty.clear()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {"lines": len(self._rows), "capacity": self._capacity, "updates": self._updates}
@@ -0,0 +1,56 @@
+"""
+Request IDs.
+
+TWS reports the errors of every request and order through one callback
+keyed by reqId / orderId, so IDs must never overlap: each component that
+makes requests draws reqIds from its own fixed range, and order IDs start
+above all of them (see IBKRClient.nextValidId).
+
+    1_000 -   9_999   SubscriptionManager (market data lines)
+   10_000 -  29_999   Free for direct bridge callers (depth, tick-by-tick, tools)
+   30_000 -  49_999   ContractCache
+   50_000 -  99_999   HistoryScheduler
+  100_000 -           Order IDs
+"""
+from typing import Container
+
+SUBSCRIPTION_REQ_IDS = (1_000, 9_000)   # (first, count)
+CONTRACT_REQ_IDS = (30_000, 20_000)
+HISTORY_REQ_IDS = (50_000, 50_000)
+ORDER_ID_FLOOR = 100_000
+
+
+class ReqIdRange:
+    """
+    Fixed range of reqIds handed out round robin.
+
+    next() wraps around at the end of the range and skips IDs that are
+    still in use, so a long session never leaves its range.
+    """
+
+    def __init__(self, first: int, count: int):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self._first = first
+        self._count = count
+        self._offset = 0
+
+    @property
+    def first(self) -> int:
+        return self._first
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def __contains__(self, req_id: int) -> bool:
+        return self._first <= req_id < self._first + self._count
+
+    def next(self, live: Container[int] = ()) -> int:
+        """Next reqId of the range that is not in `live`."""
+        for _ in range(self._count):
+            req_id = self._first + self._offset
+            self._offset = (self._offset + 1) % self._count
+            if req_id not in live:
+                return req_id
+        raise RuntimeError(f"all {self._count} reqIds from {self._first} are in use")
@@ -0,0 +1,95 @@
+"""
+Numpy Ring Buffer.
+
+Fixed-capacity, preallocated ring buffer for numeric series.
+"""
+import numpy as np
+
+
+class NumpyRingBuffer:
+    """
+    Preallocated ring buffer backed by a numpy array.
+
+    Every value is written twice (at i and i + capacity), so the buffered
+    values are always available oldest-first as one contiguous view.
+    Appending never allocates and reading never copies.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._capacity = int(capacity)
+        self._data = np.zeros(self._capacity * 2, dtype=dtype)
+        self._head = 0  # Next write position in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of buffered values."""
+        return self._capacity
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._data.dtype
+
+    @property
+    def is_full(self) -> bool:
+        return self._size == self._capacity
+
+    def append(self, value):
+        """Append a value, overwriting the oldest one when full."""
+        head = self._head
+        self._data[head] = value
+        self._data[head + self._capacity] = value
+        head += 1
+        self._head = 0 if head == self._capacity else head
+        if self._size < self._capacity:
+            self._size += 1
+
+    def extend(self, values):
+        """Append many values at once."""
+        values = np.asarray(values, dtype=self._data.dtype)
+        if len(values) >= self._capacity:
+            values = values[-self._capacity:]
+        count = len(values)
+        if count == 0:
+            return
+
+        cap = self._capacity
+        head = self._head
+        first = min(count, cap - head)
+        self._data[head:head + first] = values[:first]
+        self._data[head + cap:head + cap + first] = values[:first]
+        rest = count - first
+        if rest:
+            self._data[:rest] = values[first:]
+            self._data[cap:cap + rest] = values[first:]
+        self._head = (head + count) % cap
+        self._size = min(self._size + count, cap)
+
+    def view(self) -> np.ndarray:
+        """
+        Get the buffered values, oldest first.
+
+        Returns:
+            Read-only contiguous view into the buffer (no copy). The view is
+            only valid until the next append.
+        """
+        end = self._head + self._capacity if self._size == self._capacity else self._head
+        view = self._data[end - self._size:end]
+        view.flags.writeable = False
+        return view
+
+    def last(self):
+        """Get the most recently appended value."""
+        if not self._size:
+            raise IndexError("last() on empty ring buffer")
+        return self._data[self._head - 1 + self._capacity]
+
+    def clear(self):
+        """Drop all values (storage is kept)."""
+        self._head = 0
+        self._size = 0
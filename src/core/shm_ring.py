@@ -0,0 +1,169 @@
+"""
+Shared Memory Ring.
+
+Single-producer ring buffer of fixed-size records in a
+multiprocessing.shared_memory block, used to hand market data and order
+events from the feed process to the GUI process without pickling or
+copying.
+"""
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Fixed 128-byte record shared by all event kinds (see feed_process for the field use per kind)
+FEED_DTYPE = np.dtype([
+    ("kind", "u1"),
+    ("flags", "u1"),
+    ("code", "<i2"),      # Tick type, depth position, client id, ...
+    ("req_id", "<i8"),    # reqId / orderId
+    ("num", "<i8"),       # Integer payload (exchange time, bar count, permId, ...)
+    ("values", "<f8", (6,)),
+    ("text", "S60"),
+])
+
+_MAGIC = 0x51534645454431  # "QSFEED1"
+_HEADER_WORDS = 8  # magic, capacity, record size, write sequence, reserved
+_MAGIC_AT, _CAPACITY_AT, _RECORD_SIZE_AT, _WRITE_AT = 0, 1, 2, 3
+_HEADER_BYTES = _HEADER_WORDS * 8
+_NO_VALUES = (0.0,) * 6
+_TEXT_BYTES = FEED_DTYPE["text"].itemsize
+
+
+def _encode_text(text: str) -> bytes:
+    """UTF-8 bytes of `text`, cut to the text field on a character boundary."""
+    data = text.encode()
+    if len(data) > _TEXT_BYTES:
+        data = data[:_TEXT_BYTES].decode("utf-8", "ignore").encode()
+    return data
+
+
+class ShmRing:
+    """
+    Fixed-size record ring in shared memory.
+
+    One process writes with write(); readers in any process attach by name
+    and call read(), which returns a read-only view of the new records
+    without copying. The writer never waits: a reader more than `capacity`
+    records behind skips ahead and counts the skipped records as lost. A
+    returned view stays valid until the writer laps it, so read often
+    enough (every frame) and size the ring for the worst burst.
+
+    The creating process owns the block and unlinks it in close().
+    """
+
+    DEFAULT_CAPACITY = 1 << 16  # 8 MiB of 128-byte records
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._header = np.ndarray((_HEADER_WORDS,), dtype="<u8", buffer=shm.buf)
+        if self._header[_MAGIC_AT] != _MAGIC or self._header[_RECORD_SIZE_AT] != FEED_DTYPE.itemsize:
+            raise ValueError(f"shared memory block {shm.name!r} is not a feed ring")
+        self._capacity = int(self._header[_CAPACITY_AT])
+        self._records = np.ndarray((self._capacity,), dtype=FEED_DTYPE, buffer=shm.buf, offset=_HEADER_BYTES)
+        self._write = int(self._header[_WRITE_AT])  # Writer: next sequence number
+        self._next = self._write                    # Reader: next sequence number to read
+        self._last_start = self._next               # Reader: start of the last returned view
+        self._lost = 0
+        self._torn = 0
+
+    @classmethod
+    def create(cls, capacity: int = DEFAULT_CAPACITY, name: Optional[str] = None) -> "ShmRing":
+        """Allocate a new ring (this process owns it)."""
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        size = _HEADER_BYTES + capacity * FEED_DTYPE.itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_WORDS,), dtype="<u8", buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY_AT] = capacity
+        header[_RECORD_SIZE_AT] = FEED_DTYPE.itemsize
+        header[_MAGIC_AT] = _MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "ShmRing":
+        """Open a ring created by another process."""
+        # Child processes share the creator's resource tracker, which unlinks
+        # the block only if the owner dies without close()
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def written(self) -> int:
+        """Total records written so far."""
+        return int(self._header[_WRITE_AT])
+
+    # Writer
+    def write(self, kind: int, req_id: int = 0, code: int = 0, flags: int = 0, num: int = 0,
+              values: tuple = (), text: str = ""):
+        """Append one record (`values` up to 6 floats, `text` up to 60 UTF-8 bytes)."""
+        seq = self._write
+        if len(values) < 6:
+            values = tuple(values) + _NO_VALUES[len(values):]
+        self._records[seq % self._capacity] = (kind, flags, code, req_id, num, values, _encode_text(text))
+        self._write = seq + 1
+        self._header[_WRITE_AT] = seq + 1  # Publish after the record is complete
+
+    # Reader
+    def read(self, max_records: Optional[int] = None) -> np.ndarray:
+        """
+        New records, oldest first, as a read-only view into shared memory.
+
+        At most one contiguous run is returned per call (a wrap-around takes
+        two calls); an empty array means the reader has caught up.
+        """
+        write = int(self._header[_WRITE_AT])
+        oldest = write - self._capacity
+        if self._last_start < oldest:
+            # The previous view was (partly) overwritten while it was in use
+            self._torn += min(oldest, self._next) - self._last_start
+        if self._next < oldest:
+            self._lost += oldest - self._next
+            self._next = oldest
+        start = self._next
+        first = start % self._capacity
+        count = min(write - start, self._capacity - first)
+        if max_records is not None:
+            count = min(count, max_records)
+        view = self._records[first:first + count]
+        view.flags.writeable = False
+        self._last_start = start
+        self._next = start + count
+        return view
+
+    @property
+    def lag(self) -> int:
+        """Records written but not read yet."""
+        return int(self._header[_WRITE_AT]) - self._next
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "capacity": self._capacity,
+            "written": self.written,
+            "read": self._next,
+            "lag": self.lag,
+            "lost": self._lost,
+            "torn": self._torn,
+        }
+
+    def close(self):
+        """Detach (and free the block if this process created it)."""
+        self._records = self._header = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
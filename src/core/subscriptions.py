@@ -0,0 +1,307 @@
+"""
+Market Data Subscriptions.
+
+Shares one TWS market data line per symbol between all widgets and
+strategies that want quotes for it, and keeps the number of open lines
+within the account's market data line limit.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from .events import QuoteEvent, TickEvent
+from .logger import get_logger
+from .req_ids import SUBSCRIPTION_REQ_IDS, ReqIdRange
+
+log = get_logger("subscriptions")
+
+# Receives (symbol, tick) for every tick batch of the symbol
+QuoteCallback = Callable[[str, TickEvent], None]
+
+# Subscription states
+ACTIVE = "active"      # Line open at TWS
+WAITING = "waiting"    # Not connected yet, or no free line
+
+# Market data error codes that are warnings; the line stays open and data
+# flows. Every other code (e.g. 10168, not subscribed and no delayed data)
+# fails the subscription.
+MARKET_DATA_WARNING_CODES = frozenset({
+    2103, 2105, 2157,  # Data farm connection broken (TWS reconnects it)
+    2104, 2106, 2158,  # Data farm connection is OK
+    2107, 2108,        # Data farm inactive, available on demand
+    2119,              # Data farm connecting
+    10090,             # Part of the requested data is not subscribed
+    10091,             # Part of the requested data needs an API subscription
+    10167,             # Not subscribed: delayed data is shown instead
+})
+
+
+class Subscription:
+    """One symbol's market data line and its consumers."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.req_id: Optional[int] = None
+        self.state = WAITING
+        self.consumers: Dict[QuoteCallback, int] = {}  # callback -> reference count
+        self.last_used = time.monotonic()              # Last time it had consumers
+        self.ticks = 0
+
+    @property
+    def ref_count(self) -> int:
+        return sum(self.consumers.values())
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.consumers
+
+    def __repr__(self):
+        return f"Subscription({self.symbol}, {self.state}, reqId={self.req_id}, refs={self.ref_count})"
+
+
+class SubscriptionManager(QObject):
+    """
+    Reference-counted market data subscriptions on top of IBKRBridge.
+
+    Every symbol gets at most one reqMktData line, with a reqId allocated
+    here, and ticks from IBKRBridge.ticks_received are routed only to that
+    symbol's consumers. When the last consumer unsubscribes, the line stays
+    open as an idle subscription so a quick re-subscribe costs nothing. Idle
+    lines are closed least recently used first once `max_lines` is reached.
+    A symbol that finds no line waits until one frees up.
+
+    Lines are reopened (with new reqIds) after a reconnect. Runs on the GUI
+    thread.
+    """
+
+    # Signals
+    subscription_started = Signal(str, int)       # symbol, reqId
+    subscription_stopped = Signal(str)            # symbol
+    subscription_failed = Signal(str, int, str)   # symbol, error code, message
+
+    DEFAULT_MAX_LINES = 100   # IB's default allowance; more with quote booster packs
+    DEFAULT_FIRST_REQ_ID, DEFAULT_REQ_ID_COUNT = SUBSCRIPTION_REQ_IDS
+
+    def __init__(
+        self,
+        bridge,
+        parent=None,
+        max_lines: int = DEFAULT_MAX_LINES,
+        first_req_id: int = DEFAULT_FIRST_REQ_ID,
+        req_id_count: int = DEFAULT_REQ_ID_COUNT,
+    ):
+        super().__init__(parent)
+        self._bridge = bridge
+        self._max_lines = max_lines
+        self._req_ids = ReqIdRange(first_req_id, req_id_count)
+
+        self._subs: Dict[str, Subscription] = {}                  # symbol -> subscription
+        self._by_req_id: Dict[int, Subscription] = {}             # reqId -> active subscription
+        self._idle: "OrderedDict[str, Subscription]" = OrderedDict()  # Idle active lines, LRU first
+        self._waiting: "OrderedDict[str, Subscription]" = OrderedDict()  # Waiting for a line, FIFO
+
+        # Counters
+        self._opened = 0
+        self._evicted = 0
+        self._routed = 0
+
+        bridge.ticks_received.connect(self._on_ticks)
+        bridge.request_error.connect(self._on_request_error)
+        bridge.connected.connect(self._on_connected)
+        bridge.disconnected.connect(self._on_disconnected)
+
+    @property
+    def max_lines(self) -> int:
+        return self._max_lines
+
+    def set_max_lines(self, max_lines: int):
+        """Change the line budget; surplus idle lines are closed right away."""
+        self._max_lines = max(1, int(max_lines))
+        while len(self._by_req_id) > self._max_lines and self._idle:
+            self._evict_idle()
+        self._open_waiting()
+
+    @property
+    def lines_used(self) -> int:
+        return len(self._by_req_id)
+
+    def subscribe(self, symbol: str, callback: QuoteCallback) -> Subscription:
+        """
+        Start receiving quotes for a symbol.
+
+        Subscribing the same callback twice needs two unsubscribe() calls.
+
+        Args:
+            symbol: Stock symbol
+            callback: Called with (symbol, TickEvent) for every tick batch of the symbol
+
+        Returns:
+            The shared subscription (state WAITING until a line is open)
+        """
+        symbol = symbol.upper()
+        sub = self._subs.get(symbol)
+        if sub is None:
+            sub = self._subs[symbol] = Subscription(symbol)
+        sub.consumers[callback] = sub.consumers.get(callback, 0) + 1
+        sub.last_used = time.monotonic()
+        self._idle.pop(symbol, None)
+
+        if sub.state == WAITING and symbol not in self._waiting:
+            self._waiting[symbol] = sub
+            self._open_waiting()
+        return sub
+
+    def unsubscribe(self, symbol: str, callback: QuoteCallback):
+        """Drop one reference of `callback` to a symbol."""
+        symbol = symbol.upper()
+        sub = self._subs.get(symbol)
+        if sub is None or callback not in sub.consumers:
+            return
+        sub.consumers[callback] -= 1
+        if sub.consumers[callback] <= 0:
+            del sub.consumers[callback]
+        if not sub.is_idle:
+            return
+
+        sub.last_used = time.monotonic()
+        if sub.state == ACTIVE:
+            self._idle[symbol] = sub  # Keep the line until it is needed elsewhere
+            self._open_waiting()
+        else:
+            self._waiting.pop(symbol, None)
+            del self._subs[symbol]
+
+    def unsubscribe_all(self, callback: QuoteCallback):
+        """Drop every subscription of a consumer (e.g. a closing widget)."""
+        for sub in list(self._subs.values()):
+            while callback in sub.consumers:
+                self.unsubscribe(sub.symbol, callback)
+
+    def release_idle(self):
+        """Close all idle lines now."""
+        while self._idle:
+            self._evict_idle()
+
+    def subscription(self, symbol: str) -> Optional[Subscription]:
+        return self._subs.get(symbol.upper())
+
+    def req_id_for(self, symbol: str) -> Optional[int]:
+        """reqId of a symbol's open line (None if not streaming)."""
+        sub = self._subs.get(symbol.upper())
+        return sub.req_id if sub is not None and sub.state == ACTIVE else None
+
+    def symbol_for(self, req_id: int) -> Optional[str]:
+        sub = self._by_req_id.get(req_id)
+        return sub.symbol if sub is not None else None
+
+    def quote(self, symbol: str) -> Optional[QuoteEvent]:
+        """Current L1 quote of a streaming symbol (bid/ask/last with sizes, volume, ...)."""
+        req_id = self.req_id_for(symbol)
+        return None if req_id is None else self._bridge.quote(req_id)
+
+    def active_symbols(self) -> List[str]:
+        """Symbols with an open line."""
+        return [sub.symbol for sub in self._by_req_id.values()]
+
+    @property
+    def stats(self) -> dict:
+        """Line usage and counters."""
+        return {
+            "lines_used": len(self._by_req_id),
+            "max_lines": self._max_lines,
+            "symbols": len(self._subs),
+            "idle": len(self._idle),
+            "waiting": len(self._waiting),
+            "opened": self._opened,
+            "evicted": self._evicted,
+            "ticks_routed": self._routed,
+        }
+
+    def _open_waiting(self):
+        """Give free (or idle) lines to waiting symbols, oldest request first."""
+        if not self._bridge.is_connected:
+            return
+        while self._waiting:
+            if len(self._by_req_id) >= self._max_lines:
+                if not self._idle:
+                    symbol = next(iter(self._waiting))
+                    log.warning(
+                        "Market data line budget (%s) exhausted; %s waits for a free line",
+                        self._max_lines, symbol,
+                    )
+                    return
+                self._evict_idle()
+            symbol, sub = next(iter(self._waiting.items()))
+            if not self._open(sub):
+                return
+            del self._waiting[symbol]
+
+    def _open(self, sub: Subscription) -> bool:
+        req_id = self._req_ids.next(self._by_req_id)
+        if self._bridge.subscribe_market_data(sub.symbol, req_id) == -1:
+            return False  # Not connected after all; stays waiting
+        sub.req_id = req_id
+        sub.state = ACTIVE
+        self._by_req_id[req_id] = sub
+        self._opened += 1
+        self.subscription_started.emit(sub.symbol, req_id)
+        return True
+
+    def _close(self, sub: Subscription):
+        if sub.req_id is not None:
+            self._by_req_id.pop(sub.req_id, None)
+            self._bridge.unsubscribe_market_data(sub.req_id)
+        sub.req_id = None
+        sub.state = WAITING
+        self.subscription_stopped.emit(sub.symbol)
+
+    def _evict_idle(self):
+        symbol, sub = self._idle.popitem(last=False)
+        log.debug("Closing idle market data line for %s (reqId=%s)", symbol, sub.req_id)
+        self._close(sub)
+        del self._subs[symbol]
+        self._evicted += 1
+
+    @Slot(object)
+    def _on_ticks(self, batch: dict):
+        for req_id, tick in batch.items():
+            sub = self._by_req_id.get(req_id)
+            if sub is None or not sub.consumers:
+                continue
+            sub.ticks += 1
+            self._routed += 1
+            for callback in list(sub.consumers):
+                callback(sub.symbol, tick)
+
+    @Slot(int, int, str)
+    def _on_request_error(self, req_id: int, code: int, msg: str):
+        sub = self._by_req_id.get(req_id)
+        if sub is None or code in MARKET_DATA_WARNING_CODES:
+            return
+        log.warning("Market data for %s failed: %s %s", sub.symbol, code, msg)
+        self._by_req_id.pop(req_id, None)
+        sub.req_id = None
+        sub.state = WAITING
+        self._idle.pop(sub.symbol, None)
+        del self._subs[sub.symbol]  # Consumers must subscribe again
+        self.subscription_failed.emit(sub.symbol, code, msg)
+        self._open_waiting()
+
+    @Slot()
+    def _on_connected(self):
+        self._open_waiting()
+
+    @Slot()
+    def _on_disconnected(self):
+        """Lines are gone with the connection: drop idle ones, requeue the rest."""
+        for symbol in list(self._idle):
+            del self._subs[symbol]
+        self._idle.clear()
+        self._by_req_id.clear()
+        for sub in self._subs.values():
+            if sub.state == ACTIVE:
+                sub.req_id = None
+                sub.state = WAITING
+                self._waiting[sub.symbol] = sub
@@ -0,0 +1,457 @@
+"""
+Tick-by-Tick Store.
+
+Bounded in-memory rings of reqTickByTickData records, one per stream, with
+records leaving a ring spilled to an append-only journal on disk by a
+background writer thread.
+
+The TWS reader thread only ever appends to a ring and hands spilled chunks
+to the journal without waiting: when a consumer or the disk falls behind,
+data is dropped by policy and counted, never queued without bound.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Deque, Dict, IO, List, Optional, Tuple
+
+import numpy as np
+
+from .logger import get_logger
+from .paths import data_dir
+
+log = get_logger("tick_by_tick")
+
+# One record per tick; unused price/size fields are NaN
+TICK_DTYPE = np.dtype([
+    ("time", "<i8"),       # Exchange time, epoch seconds
+    ("kind", "u1"),        # LAST, ALL_LAST, BID_ASK or MIDPOINT
+    ("flags", "u1"),       # Attribute mask as sent by TWS (past limit, unreported, ...)
+    ("price", "<f8"),      # Trade price or midpoint
+    ("size", "<f8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("bid_size", "<f8"),
+    ("ask_size", "<f8"),
+])
+
+# Record kinds (the tick type codes TWS sends back)
+LAST, ALL_LAST, BID_ASK, MIDPOINT = 1, 2, 3, 4
+TICK_TYPES = {"Last": LAST, "AllLast": ALL_LAST, "BidAsk": BID_ASK, "MidPoint": MIDPOINT}
+
+# What the journal does with a spilled chunk when its queue is full
+DROP_OLDEST = "drop_oldest"  # Discard the oldest queued chunk (keep recent data)
+DROP_NEWEST = "drop_newest"  # Discard the chunk being spilled (keep the queue as is)
+
+StreamKey = Tuple[str, str]  # (symbol, tick type)
+
+
+class TickJournal:
+    """
+    Append-only on-disk journal of tick records.
+
+    Chunks are queued by submit() (never blocks) and appended by a writer
+    thread to `<root>/<SYMBOL>/<YYYYMMDD>-<tick type>.ticks`, raw TICK_DTYPE
+    records split by UTC day; read them back with read(). At most
+    `max_pending` chunks wait in memory; beyond that `policy` decides which
+    chunk is dropped.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_pending: int = 64,
+        policy: str = DROP_OLDEST,
+    ):
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"unknown drop policy {policy!r}")
+        self._root = Path(root) if root else data_dir("ticks")
+        self._max_pending = max(1, max_pending)
+        self._policy = policy
+
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[StreamKey, np.ndarray]] = deque()
+        self._busy = False  # Writer holds a chunk outside the queue
+        self._stopping = False
+        self._files: Dict[Path, IO[bytes]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters (records unless noted)
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._bytes = 0
+        self._errors = 0
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    def path(self, symbol: str, tick_type: str, day: str) -> Path:
+        """Journal file of one stream and UTC day ("YYYYMMDD")."""
+        return self._root / symbol.upper() / f"{day}-{tick_type}.ticks"
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="tick-journal", daemon=True)
+        self._thread.start()
+
+    def submit(self, key: StreamKey, records: np.ndarray) -> bool:
+        """
+        Queue records for writing (any thread, never blocks).
+
+        Returns:
+            False if they were dropped because the queue is full
+        """
+        with self._cond:
+            self._submitted += len(records)
+            if len(self._pending) >= self._max_pending:
+                if self._policy == DROP_NEWEST:
+                    self._dropped += len(records)
+                    return False
+                _, oldest = self._pending.popleft()
+                self._dropped += len(oldest)
+            self._pending.append((key, records))
+            self._cond.notify()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued chunk is on disk. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        """Write what is queued, close the files and end the writer thread."""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def read(self, symbol: str, tick_type: str, day: str) -> np.ndarray:
+        """Journaled records of one stream and UTC day (empty if none)."""
+        path = self.path(symbol, tick_type, day)
+        if not path.exists():
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.fromfile(path, dtype=TICK_DTYPE)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._sync()
+                    self._cond.notify_all()  # Wake flush() waiters
+                    self._cond.wait()
+                if not self._pending:
+                    break
+                key, records = self._pending.popleft()
+                self._busy = True
+            try:
+                self._write(key, records)
+            except OSError as e:
+                self._errors += 1
+                log.error("Tick journal write failed for %s: %s", key, e)
+            with self._cond:
+                self._busy = False
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _write(self, key: StreamKey, records: np.ndarray):
+        symbol, tick_type = key
+        days = records["time"] // 86400
+        # Chunks are time ordered, so each day is one contiguous run
+        starts = np.flatnonzero(np.diff(days)) + 1
+        for run in np.split(records, starts):
+            day = datetime.fromtimestamp(int(run["time"][0]), timezone.utc).strftime("%Y%m%d")
+            path = self.path(symbol, tick_type, day)
+            f = self._files.get(path)
+            if f is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                f = self._files[path] = open(path, "ab")
+            run.tofile(f)
+            self._bytes += run.nbytes
+        self._written += len(records)
+
+    def _sync(self):
+        """Flush open files (lock held, writer thread)."""
+        for f in self._files.values():
+            try:
+                f.flush()
+            except OSError:
+                self._errors += 1
+
+    @property
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "submitted": self._submitted,
+                "written": self._written,
+                "dropped": self._dropped,
+                "pending_chunks": len(self._pending),
+                "bytes": self._bytes,
+                "errors": self._errors,
+                "policy": self._policy,
+            }
+
+
+class TickRing:
+    """
+    Bounded ring of one tick-by-tick stream.
+
+    The reader thread appends; any thread reads through cursors or
+    latest(). Each record has a sequence number (0, 1, ...). Records are
+    handed to the journal in chunks of `spill_chunk` just before they would
+    be overwritten, so ring + journal hold the full stream unless the
+    journal dropped chunks.
+    """
+
+    def __init__(
+        self,
+        req_id: int,
+        symbol: str,
+        tick_type: str,
+        capacity: int = 65_536,
+        journal: Optional[TickJournal] = None,
+        spill_chunk: Optional[int] = None,
+        ignore_size: bool = False,
+    ):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.req_id = req_id
+        self.symbol = symbol.upper()
+        self.tick_type = tick_type
+        self.kind = TICK_TYPES[tick_type]
+        self.ignore_size = ignore_size  # BidAsk: skip size-only changes (request option)
+        self._capacity = int(capacity)
+        self._buffer = np.zeros(self._capacity, dtype=TICK_DTYPE)
+        self._journal = journal
+        self._spill_chunk = max(1, min(spill_chunk or self._capacity // 4, self._capacity))
+        self._lock = threading.Lock()
+        self._written = 0   # Sequence number of the next record
+        self._spilled = 0   # Records before this were handed to the journal (or dropped)
+        self._evicted = 0   # Records dropped without a journal
+        self._overruns = 0  # Records cursors skipped because they fell behind
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def written(self) -> int:
+        """Total records appended (sequence number of the next one)."""
+        return self._written
+
+    def __len__(self) -> int:
+        return min(self._written, self._capacity)
+
+    def append(self, t: int, price: float = np.nan, size: float = np.nan, bid: float = np.nan,
+               ask: float = np.nan, bid_size: float = np.nan, ask_size: float = np.nan, flags: int = 0):
+        """Append one tick (reader thread)."""
+        with self._lock:
+            if self._written - self._spilled >= self._capacity:
+                self._spill(self._spill_chunk)
+            self._buffer[self._written % self._capacity] = (
+                t, self.kind, flags, price, size, bid, ask, bid_size, ask_size
+            )
+            self._written += 1
+
+    def _range(self, start: int, stop: int) -> np.ndarray:
+        """Copy of records [start, stop) by sequence number (lock held)."""
+        cap = self._capacity
+        first, last = start % cap, stop % cap
+        if stop - start == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+        if first < last:
+            return self._buffer[first:last].copy()
+        return np.concatenate((self._buffer[first:], self._buffer[:last]))
+
+    def _spill(self, count: int):
+        """Hand the oldest unspilled records to the journal (lock held)."""
+        count = min(count, self._written - self._spilled)
+        if count <= 0:
+            return
+        if self._journal is not None:
+            self._journal.submit((self.symbol, self.tick_type), self._range(self._spilled, self._spilled + count))
+        else:
+            self._evicted += count
+        self._spilled += count
+
+    def flush(self):
+        """Hand every record not journaled yet to the journal (they stay readable)."""
+        with self._lock:
+            self._spill(self._written - self._spilled)
+
+    def latest(self, count: Optional[int] = None) -> np.ndarray:
+        """Copy of the newest `count` records (default all buffered), oldest first."""
+        with self._lock:
+            available = min(self._written, self._capacity)
+            count = available if count is None else min(count, available)
+            return self._range(self._written - count, self._written)
+
+    def cursor(self, from_start: bool = False) -> "TickCursor":
+        """Reader that returns each record once (starting now, or at the oldest buffered)."""
+        with self._lock:
+            start = max(0, self._written - self._capacity) if from_start else self._written
+        return TickCursor(self, start)
+
+    def _read(self, cursor: "TickCursor", max_records: Optional[int]) -> np.ndarray:
+        with self._lock:
+            oldest = max(0, self._written - self._capacity)
+            if cursor._next < oldest:
+                missed = oldest - cursor._next
+                cursor.missed += missed
+                self._overruns += missed
+                cursor._next = oldest
+            stop = self._written
+            if max_records is not None:
+                stop = min(stop, cursor._next + max_records)
+            records = self._range(cursor._next, stop)
+            cursor._next = stop
+            return records
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "symbol": self.symbol,
+                "tick_type": self.tick_type,
+                "received": self._written,
+                "buffered": min(self._written, self._capacity),
+                "spilled": self._spilled - self._evicted,
+                "evicted": self._evicted,
+                "overruns": self._overruns,
+            }
+
+
+class TickCursor:
+    """Position of one consumer in a TickRing."""
+
+    def __init__(self, ring: TickRing, start: int):
+        self._ring = ring
+        self._next = start
+        self.missed = 0  # Records overwritten before this cursor read them
+
+    @property
+    def position(self) -> int:
+        """Sequence number of the next record to read."""
+        return self._next
+
+    @property
+    def lag(self) -> int:
+        """Records appended but not read yet (may exceed the ring capacity)."""
+        return self._ring.written - self._next
+
+    def read(self, max_records: Optional[int] = None) -> np.ndarray:
+        """New records since the last read, oldest first (a copy)."""
+        return self._ring._read(self, max_records)
+
+
+class TickByTickStore:
+    """
+    Rings of all tick-by-tick streams, keyed by reqId, sharing one journal.
+
+    The journal writer thread starts with the first stream. Pass
+    journal=False to keep data in memory only (evicted records are counted
+    and dropped).
+    """
+
+    DEFAULT_CAPACITY = 65_536
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        journal: bool = True,
+        root: Optional[Path] = None,
+        max_pending: int = 64,
+        policy: str = DROP_OLDEST,
+    ):
+        self._capacity = capacity
+        self._journal = TickJournal(root, max_pending, policy) if journal else None
+        self._rings: Dict[int, TickRing] = {}
+        self._published: Dict[int, int] = {}  # reqId -> records written at the last publish()
+        self._closed = {"received": 0, "evicted": 0, "overruns": 0}  # Totals of closed streams
+
+    @property
+    def journal(self) -> Optional[TickJournal]:
+        return self._journal
+
+    def open(self, req_id: int, symbol: str, tick_type: str, ignore_size: bool = False) -> TickRing:
+        """Ring for a new stream (replaces one with the same reqId)."""
+        if tick_type not in TICK_TYPES:
+            raise ValueError(f"unknown tick-by-tick type {tick_type!r} (expected one of {list(TICK_TYPES)})")
+        self.close(req_id)
+        if self._journal is not None:
+            self._journal.start()
+        ring = TickRing(req_id, symbol, tick_type, self._capacity, self._journal, ignore_size=ignore_size)
+        self._rings[req_id] = ring
+        self._published[req_id] = 0
+        return ring
+
+    def get(self, req_id: int) -> Optional[TickRing]:
+        return self._rings.get(req_id)
+
+    def rings(self) -> List[TickRing]:
+        return list(self._rings.values())
+
+    def close(self, req_id: int):
+        """Journal what is left of a stream and forget it."""
+        ring = self._rings.pop(req_id, None)
+        self._published.pop(req_id, None)
+        if ring is not None:
+            ring.flush()
+            stats = ring.stats
+            for name in self._closed:
+                self._closed[name] += stats[name]
+
+    def publish(self) -> Dict[int, int]:
+        """Records appended per stream since the last call (reqId -> count, changed streams only)."""
+        appended = {}
+        for req_id, ring in list(self._rings.items()):
+            written = ring.written
+            count = written - self._published.get(req_id, 0)
+            if count:
+                appended[req_id] = count
+                self._published[req_id] = written
+        return appended
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Journal everything buffered and wait for the writer (timeout=0: don't wait)."""
+        for ring in self.rings():
+            ring.flush()
+        return self._journal.flush(timeout) if self._journal is not None else True
+
+    def shutdown(self, timeout: float = 5.0):
+        """Flush and stop the journal writer (rings stay readable)."""
+        for ring in self.rings():
+            ring.flush()
+        if self._journal is not None:
+            self._journal.stop(timeout)
+
+    @property
+    def stats(self) -> dict:
+        """Totals over all streams (closed ones included) plus journal and per-stream counters."""
+        streams = [ring.stats for ring in self.rings()]
+        totals = {name: total + sum(s[name] for s in streams) for name, total in self._closed.items()}
+        return {
+            "streams": len(streams),
+            **totals,
+            "journal": self._journal.stats if self._journal is not None else None,
+            "per_stream": streams,
+        }
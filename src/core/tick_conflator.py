@@ -0,0 +1,153 @@
+"""
+Tick Conflator.
+
+Coalesces price ticks from the IBKR reader thread and delivers them to the
+GUI thread as one batched signal per frame interval.
+"""
+import threading
+from typing import Dict, List, Optional
+from PySide6.QtCore import QObject, QTimer, Signal, Slot, Qt
+
+from .events import TickEvent
+
+# Position of each tick field in a pending [bid, ask, last] entry
+_FIELDS = {"bid": 0, "ask": 1, "last": 2}
+
+
+class TickConflator(QObject):
+    """
+    Keeps only the latest bid/ask/last per reqId between flushes.
+
+    `update()` may be called from any thread (normally the TWS reader thread).
+    Pending values are flushed on the thread that owns the conflator through a
+    single `ticks_flushed` signal, at most once per interval.
+    """
+
+    # Signals
+    ticks_flushed = Signal(object)  # reqId -> TickEvent
+
+    # Internal thread-safe signal: first tick after an idle period
+    _internal_wake = Signal()
+
+    def __init__(self, interval_ms: int = 50, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending: Dict[int, List[Optional[float]]] = {}  # reqId -> [bid, ask, last]
+        self._stamps: Dict[int, int] = {}        # reqId -> socket stamp of its oldest pending tick
+        self._batch_stamps: Dict[int, int] = {}  # Stamps of the batch being delivered
+        self._touched = False                    # A flush is due without pending prices
+
+        # Coalescing counters
+        self._ticks_in = 0
+        self._ticks_out = 0
+        self._coalesced = 0
+        self._batches = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+        self._internal_wake.connect(self._on_wake, Qt.QueuedConnection)
+
+    @property
+    def interval_ms(self) -> int:
+        """Flush interval in milliseconds."""
+        return self._timer.interval()
+
+    def set_interval(self, interval_ms: int):
+        """
+        Set the flush interval.
+
+        Args:
+            interval_ms: Frame interval in milliseconds (e.g. 16-100)
+        """
+        self._timer.setInterval(max(1, int(interval_ms)))
+
+    def update(self, req_id: int, field: str, price: float, stamp: int = 0):
+        """
+        Record a tick (thread-safe).
+
+        Args:
+            req_id: Market data request ID
+            field: "bid", "ask" or "last"
+            price: Tick price
+            stamp: Socket read time (perf_counter_ns) when latency tracking is on
+        """
+        index = _FIELDS[field]
+        with self._lock:
+            self._ticks_in += 1
+            prices = self._pending.get(req_id)
+            if prices is None:
+                wake = not self._pending
+                prices = self._pending[req_id] = [None, None, None]
+                if stamp:
+                    self._stamps[req_id] = stamp
+            else:
+                wake = False
+                if prices[index] is not None:
+                    self._coalesced += 1
+            prices[index] = price
+
+        if wake:
+            self._internal_wake.emit()
+
+    def touch(self):
+        """
+        Schedule a flush without a price (thread-safe), e.g. after a size
+        tick, so listeners of ticks_flushed see other state that changed.
+        """
+        with self._lock:
+            if self._pending or self._touched:
+                return
+            self._touched = True
+        self._internal_wake.emit()
+
+    @Slot()
+    def _on_wake(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    @Slot()
+    def flush(self):
+        """Deliver all pending ticks in one batch (empty after touch() alone)."""
+        with self._lock:
+            if not self._pending and not self._touched:
+                return
+            self._touched = False
+            pending, self._pending = self._pending, {}
+            self._batch_stamps, self._stamps = self._stamps, {}
+            if pending:
+                self._batches += 1
+                self._ticks_out += sum(3 - prices.count(None) for prices in pending.values())
+
+        batch = {req_id: TickEvent(req_id, *prices) for req_id, prices in pending.items()}
+        self.ticks_flushed.emit(batch)
+
+    @property
+    def batch_stamps(self) -> Dict[int, int]:
+        """
+        Socket read times (reqId -> perf_counter_ns) of the oldest tick per
+        reqId in the batch being delivered. Empty unless latency tracking is on.
+        """
+        return self._batch_stamps
+
+    @property
+    def stats(self) -> dict:
+        """Coalescing counters."""
+        with self._lock:
+            return {
+                "ticks_in": self._ticks_in,
+                "ticks_out": self._ticks_out,
+                "coalesced": self._coalesced,
+                "batches": self._batches,
+                "pending": len(self._pending),
+            }
+
+    def reset_stats(self):
+        """Reset coalescing counters."""
+        with self._lock:
+            self._ticks_in = 0
+            self._ticks_out = 0
+            self._coalesced = 0
+            self._batches = 0
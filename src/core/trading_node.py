@@ -8,6 +8,10 @@ from typing import Optional
 from pathlib import Path
 import os
 
+from .logger import get_logger
+
+log = get_logger("node")
+
 
 def create_ibkr_node_config(
     host: str = "127.0.0.1",
@@ -117,7 +121,7 @@ async def connect_ibkr_async(node) -> bool:
         await node.start_async()
         return True
     except Exception as e:
-        print(f"Failed to connect to IBKR: {e}")
+        log.error("Failed to connect to IBKR: %s", e)
         return False
 
 
@@ -11,6 +11,10 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QColor
 
+from src.core.logger import get_logger
+
+log = get_logger("order")
+
 
 class OrderEntryDialog(QDialog):
     """
@@ -180,7 +184,7 @@ class OrderEntryDialog(QDialog):
         if not order["symbol"]:
             return
             
-        print(f"[Order] Submitting: {order}")
+        log.info("Submitting: %s", order)
         self.order_submitted.emit(order)
         self.accept()
         
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, 
     QSystemTrayIcon, QMenu
 )
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QTimer
 from PySide6.QtGui import QIcon, QColor, QAction
 from qfluentwidgets import (
     FluentWindow, NavigationItemPosition, FluentIcon,
@@ -18,18 +18,54 @@ from src.gui.widgets.strategy_control import StrategyControl
 from src.gui.widgets.log_viewer import LogViewer
 from src.gui.widgets.backtest_runner import BacktestRunner
 from src.gui.widgets.tearsheet_viewer import TearsheetViewer
+from src.gui.widgets.diagnostics_panel import DiagnosticsPanel
 from src.core.ibkr_bridge import IBKRBridge
 from src.core.nautilus_bridge import NautilusBridge
+from src.core.feed_process import FeedProcessBridge
+from src.core.async_ibkr import AsyncIBKRBridge
+from src.core.bar_store import BarStore, BAR_SIZE_SECONDS
+from src.core.bar_aggregator import BarAggregator
+from src.core.basket import BasketSubmitter
+from src.core.history_scheduler import HistoryScheduler, HistoryRequest, PRIORITY_HIGH
+from src.core.subscriptions import SubscriptionManager
+from src.core.contract_cache import ContractCache
+from src.core.events import TickEvent, PositionEvent, OrderStatusEvent
+from src.gui.update_scheduler import UpdateScheduler
+from src.gui.watchdog import EventLoopWatchdog
+from src.core.logger import get_logger, add_handler, shutdown_logging, QtLogHandler
 import os
 
+log = get_logger("app")
+dashboard_log = get_logger("dashboard")
+
 
 class DashboardInterface(QWidget):
     """Dashboard page with connection status and overview."""
     
-    def __init__(self, bridge: IBKRBridge, parent=None):
+    # Chart history series (cached on disk by BarStore)
+    CHART_BAR_SIZE = "5 mins"
+    CHART_WHAT_TO_SHOW = "TRADES"
+    CHART_DURATION = "1 D"  # Window requested when nothing is cached
+    CHART_TIMEFRAME = "5m"  # Live bars (BarAggregator timeframe) continuing the history
+    
+    def __init__(
+        self,
+        bridge: IBKRBridge,
+        parent=None,
+        scheduler: UpdateScheduler = None,
+        history: HistoryScheduler = None,
+        subscriptions: SubscriptionManager = None,
+        bars: BarAggregator = None,
+    ):
         super().__init__(parent)
         self.setObjectName("dashboardInterface")
         self._bridge = bridge
+        self._scheduler = scheduler
+        self._history = history or HistoryScheduler(bridge, self, store=BarStore())
+        self._bar_store = self._history.store
+        self._subscriptions = subscriptions or SubscriptionManager(bridge, self)
+        self._bars = bars or BarAggregator(self._subscriptions, self)
+        self._chart_symbol = None  # Symbol the chart is subscribed to
         self._setup_ui()
         self._connect_signals()
         
@@ -109,6 +145,7 @@ class DashboardInterface(QWidget):
         
         # Top: Live Chart
         self._chart_widget = LiveChartWidget()
+        self._chart_widget.set_update_scheduler(self._scheduler)
         main_splitter.addWidget(self._chart_widget)
         
         # Bottom: Horizontal splitter for Positions, Orders, and Strategy
@@ -125,10 +162,12 @@ class DashboardInterface(QWidget):
         
         # Left: Positions
         self._position_panel = PositionPanel()
+        self._position_panel.set_update_scheduler(self._scheduler)
         bottom_splitter.addWidget(self._position_panel)
         
         # Center: Orders
         self._order_table = OrderTable()
+        self._order_table.set_update_scheduler(self._scheduler)
         bottom_splitter.addWidget(self._order_table)
         
         # Right: Strategy Control
@@ -169,17 +208,18 @@ class DashboardInterface(QWidget):
             self._bridge.reconnect
         )
         
-        # Connect price signal to chart
-        self._bridge.price_received.connect(self._on_price_received)
-        
-        # Auto-subscribe to market data when connected
+        # Request chart history when connected (quotes resume on their own)
         self._bridge.connected.connect(self._subscribe_default_symbol)
         
         # Handle chart symbol change
         self._chart_widget.symbol_changed.connect(self._on_chart_symbol_changed)
+        self._subscriptions.subscription_failed.connect(self._on_subscription_failed)
         
         # Connect historical data signal
-        self._bridge.historical_bar_received.connect(self._on_historical_bar)
+        self._history.request_finished.connect(self._on_history_finished)
+        
+        # Live bars extend the chart history
+        self._bars.bars_updated.connect(self._on_live_bars)
         
         # Connect position signals
         self._bridge.position_received.connect(self._position_panel.add_position)
@@ -195,36 +235,79 @@ class DashboardInterface(QWidget):
         # Connect cancel all button
         self._order_table.cancel_all_requested.connect(self._bridge.cancel_all_orders)
         
-    def _on_price_received(self, req_id: int, price: float):
-        """Handle price update from bridge."""
-        self._chart_widget.update_price(price)
+    def _on_chart_quote(self, symbol: str, tick: TickEvent):
+        """Handle a quote batch for the chart symbol."""
+        if tick.last is not None:
+            self._chart_widget.update_price(tick.last)
+            
+    def _on_live_bars(self, symbol: str, bars: dict):
+        """Update the chart's last candle from the aggregated live bar."""
+        bar = bars.get(self.CHART_TIMEFRAME)
+        if bar is not None and symbol == self._chart_symbol:
+            self._chart_widget.update_live_bar(bar)
+        
+    def _subscribe_chart_symbol(self, symbol: str):
+        """Move the chart's quote subscription to `symbol`."""
+        if self._chart_symbol == symbol:
+            return
+        if self._chart_symbol is not None:
+            self._subscriptions.unsubscribe(self._chart_symbol, self._on_chart_quote)
+            self._bars.untrack(self._chart_symbol)
+        self._chart_symbol = symbol
+        self._subscriptions.subscribe(symbol, self._on_chart_quote)
+        self._bars.track(symbol)
+        
+    def _on_subscription_failed(self, symbol: str, code: int, msg: str):
+        """Forget a failed chart subscription so reconnecting or reselecting the symbol subscribes again."""
+        if self._chart_symbol is None or self._chart_symbol.upper() != symbol:
+            return
+        dashboard_log.warning("Chart quotes for %s failed (%s): %s", symbol, code, msg)
+        self._bars.untrack(self._chart_symbol)
+        self._chart_symbol = None
         
     def _subscribe_default_symbol(self):
         """Subscribe to default symbol on connect."""
         symbol = self._chart_widget.current_symbol
-        self._current_req_id = 1001
-        self._bridge.subscribe_market_data(symbol, self._current_req_id)
+        self._subscribe_chart_symbol(symbol)
         # Also request historical data
         self._request_chart_history(symbol)
         
     def _on_chart_symbol_changed(self, symbol: str):
         """Handle symbol change from chart."""
-        if hasattr(self, '_current_req_id'):
-            self._bridge.unsubscribe_market_data(self._current_req_id)
-        self._current_req_id = 1001
-        self._bridge.subscribe_market_data(symbol, self._current_req_id)
+        self._subscribe_chart_symbol(symbol)
         # Also request historical data for new symbol
         self._request_chart_history(symbol)
         
     def _request_chart_history(self, symbol: str):
-        """Request historical data for chart."""
+        """Show cached history for the chart and request only the missing tail."""
         self._chart_widget.clear_data()
-        self._bridge.request_historical_data(symbol, req_id=2001)
+        series = (symbol, self.CHART_BAR_SIZE, self.CHART_WHAT_TO_SHOW)
+        cached = self._bar_store.load(*series)
+        if len(cached):
+            self._chart_widget.set_bars(cached)
+            self._bars.seed(symbol, cached, BAR_SIZE_SECONDS[self.CHART_BAR_SIZE])
+            
+        duration = self._bar_store.missing_duration(*series, default=self.CHART_DURATION)
+        if duration is None:
+            dashboard_log.debug("History for %s is up to date (%s cached bars)", symbol, len(cached))
+            return
+            
+        self._history.submit(
+            HistoryRequest(symbol, duration, self.CHART_BAR_SIZE, self.CHART_WHAT_TO_SHOW),
+            PRIORITY_HIGH,
+        )
         
-    def _on_historical_bar(self, req_id: int, bar):
-        """Handle historical bar data."""
-        if req_id == 2001:  # Chart history request
-            self._chart_widget.add_bar(bar)
+    def _on_history_finished(self, job):
+        """Redraw the chart once its series has been merged into the cache."""
+        request = job.request
+        if (
+            request.symbol == self._chart_widget.current_symbol
+            and request.bar_size == self.CHART_BAR_SIZE
+            and request.what_to_show == self.CHART_WHAT_TO_SHOW
+        ):
+            bars = self._bar_store.load(request.symbol, request.bar_size, request.what_to_show)
+            self._chart_widget.set_bars(bars)
+            self._bars.seed(request.symbol, bars, BAR_SIZE_SECONDS[request.bar_size])
         
     def _request_tws_data(self):
         """Request positions and orders from TWS."""
@@ -235,7 +318,7 @@ class DashboardInterface(QWidget):
         
     def _on_positions_complete(self):
         """Called when all positions have been received."""
-        print("[Dashboard] Positions sync complete")
+        dashboard_log.info("Positions sync complete")
 
 
 class TradingMainWindow(FluentWindow):
@@ -246,19 +329,58 @@ class TradingMainWindow(FluentWindow):
     See: docs/devlog/003-glassmorphism-research-results.md
     """
     
+    # Redraw cap for all dashboard widgets
+    UI_FPS = 30
+    
     def __init__(self):
         super().__init__()
         
+        # Single frame-rate-capped redraw scheduler shared by all widgets
+        self._update_scheduler = UpdateScheduler(self.UI_FPS, self)
+        
+        # Catch GUI thread stalls (shown on the Diagnostics page)
+        self._watchdog = EventLoopWatchdog(self)
+        # Start once the event loop runs, so window construction is not counted as a stall
+        QTimer.singleShot(0, self._watchdog.start)
+        
         # Select bridge based on environment variable
         # USE_NAUTILUS=1 for Nautilus+Docker, otherwise use direct ibapi
+        # (USE_FEED_PROCESS=1 runs the ibapi connection in a separate process,
+        # USE_ASYNC_IB=1 reads it with asyncio on the GUI thread's event loop)
         use_nautilus = os.environ.get("USE_NAUTILUS", "0") == "1"
+        use_feed_process = os.environ.get("USE_FEED_PROCESS", "0") == "1"
+        use_async_ib = os.environ.get("USE_ASYNC_IB", "0") == "1"
         
         if use_nautilus:
-            print("[App] Using NautilusBridge (Docker IB Gateway)")
+            log.info("Using NautilusBridge (Docker IB Gateway)")
             self._bridge = NautilusBridge(self)
+        elif use_feed_process:
+            log.info("Using FeedProcessBridge (ibapi in a feed process)")
+            self._bridge = FeedProcessBridge(self)
+        elif use_async_ib:
+            log.info("Using AsyncIBKRBridge (ibapi on the asyncio event loop)")
+            self._bridge = AsyncIBKRBridge(self)
         else:
-            print("[App] Using IBKRBridge (direct ibapi)")
+            log.info("Using IBKRBridge (direct ibapi)")
             self._bridge = IBKRBridge(self)
+            
+        # Historical requests from all pages share one pacing budget and bar cache
+        self._history = HistoryScheduler(self._bridge, self, store=BarStore())
+        
+        # Market data lines are shared by all pages and kept within IB's line limit
+        self._subscriptions = SubscriptionManager(self._bridge, self)
+        
+        # Live bars are aggregated once per symbol for the charts and strategies
+        self._bar_aggregator = BarAggregator(self._subscriptions, self)
+        
+        # Multi-order baskets (rebalances) with acknowledgement tracking
+        self._baskets = BasketSubmitter(self._bridge, self)
+        
+        # Contract details are resolved once and reused across sessions
+        self._contracts = ContractCache(self._bridge, self)
+        self._bridge.set_contract_cache(self._contracts)
+        self._bridge.connected.connect(self._warm_contracts)
+        self._bridge.position_received.connect(self._on_position_contract)
         
         self.initWindow()
         self.initNavigation()
@@ -277,7 +399,10 @@ class TradingMainWindow(FluentWindow):
         
     def initNavigation(self):
         # Dashboard (Home) - with real dashboard interface
-        self.dashboardInterface = DashboardInterface(self._bridge, self)
+        self.dashboardInterface = DashboardInterface(
+            self._bridge, self, self._update_scheduler, self._history, self._subscriptions,
+            self._bar_aggregator,
+        )
         self.addSubInterface(
             self.dashboardInterface,
             FluentIcon.HOME,
@@ -287,6 +412,7 @@ class TradingMainWindow(FluentWindow):
         
         # Live Chart
         self.chartInterface = LiveChartWidget(self)
+        self.chartInterface.set_update_scheduler(self._update_scheduler)
         self.chartInterface.setObjectName("chartInterface")
         self.addSubInterface(
             self.chartInterface,
@@ -297,6 +423,7 @@ class TradingMainWindow(FluentWindow):
         
         # Positions
         self.positionsInterface = PositionPanel(self)
+        self.positionsInterface.set_update_scheduler(self._update_scheduler)
         self.positionsInterface.setObjectName("positionsInterface")
         self.addSubInterface(
             self.positionsInterface,
@@ -307,6 +434,7 @@ class TradingMainWindow(FluentWindow):
         
         # Orders
         self.ordersInterface = OrderTable(self)
+        self.ordersInterface.set_update_scheduler(self._update_scheduler)
         self.ordersInterface.setObjectName("ordersInterface")
         self.addSubInterface(
             self.ordersInterface,
@@ -347,6 +475,12 @@ class TradingMainWindow(FluentWindow):
         
         # Logs
         self.logsInterface = LogViewer(self)
+        self.logsInterface.set_update_scheduler(self._update_scheduler)
+        
+        # Route application logs (all categories) into the log viewer
+        self._log_handler = QtLogHandler()
+        self._log_handler.record_emitted.connect(self.logsInterface.add_log)
+        add_handler(self._log_handler)
         self.logsInterface.setObjectName("logsInterface")
         self.addSubInterface(
             self.logsInterface,
@@ -354,12 +488,55 @@ class TradingMainWindow(FluentWindow):
             "Logs",
             NavigationItemPosition.BOTTOM
         )
+        
+        # Diagnostics (data path latency, GUI stalls)
+        self.diagnosticsInterface = DiagnosticsPanel(self, watchdog=self._watchdog)
+        self.addSubInterface(
+            self.diagnosticsInterface,
+            FluentIcon.SPEED_HIGH,
+            "Diagnostics",
+            NavigationItemPosition.BOTTOM
+        )
     
     @property
     def bridge(self) -> IBKRBridge:
         """Get the IBKR bridge instance."""
         return self._bridge
         
+    @property
+    def subscriptions(self) -> SubscriptionManager:
+        """Shared market data subscriptions."""
+        return self._subscriptions
+        
+    @property
+    def bar_aggregator(self) -> BarAggregator:
+        """Shared live bar aggregation (1s/1m/5m/1h)."""
+        return self._bar_aggregator
+        
+    @property
+    def baskets(self) -> BasketSubmitter:
+        """Basket order submission and tracking."""
+        return self._baskets
+        
+    @property
+    def contracts(self) -> ContractCache:
+        """Shared contract details cache."""
+        return self._contracts
+        
+    def _watchlist(self) -> list:
+        """Symbols the charts offer."""
+        symbols = self.dashboardInterface._chart_widget.symbols + self.chartInterface.symbols
+        return list(dict.fromkeys(symbols))
+        
+    def _warm_contracts(self):
+        """Resolve the watchlist's contracts ahead of the first order."""
+        self._contracts.warm(self._watchlist())
+        
+    def _on_position_contract(self, position: PositionEvent):
+        """Resolve held symbols too, so closing orders go out by conId."""
+        if position.sec_type == "STK":
+            self._contracts.resolve(position.symbol)
+        
     def initSystemTray(self):
         """Initialize system tray icon and menu."""
         self._tray_icon = QSystemTrayIcon(self)
@@ -445,11 +622,11 @@ class TradingMainWindow(FluentWindow):
             5000
         )
         
-    def _notify_order_status(self, status: dict):
+    def _notify_order_status(self, status: OrderStatusEvent):
         """Show notification for order status changes."""
-        order_id = status["orderId"]
-        order_status = status["status"]
-        filled = status.get("filled", 0)
+        order_id = status.order_id
+        order_status = status.status
+        filled = status.filled
         
         # Only notify for important status changes
         if order_status == "Filled":
@@ -474,18 +651,23 @@ class TradingMainWindow(FluentWindow):
         import os
         import signal
         
-        print("[App] Starting clean exit...")
+        log.info("Starting clean exit...")
         
         # 1. Hide tray icon
         self._tray_icon.hide()
+        self._watchdog.stop()
+        self._contracts.save()
         
         # 2. Disconnect from TWS
         if self._bridge.is_connected:
-            print("[App] Disconnecting from TWS...")
+            log.info("Disconnecting from TWS...")
             self._bridge.disconnect_from_tws()
         
-        # 3. Wait a bit for threads to finish
-        from PySide6.QtCore import QTimer
+        # 3. Write the tick journal out and stop its writer
+        if not isinstance(self._bridge, NautilusBridge):
+            self._bridge.tick_by_tick.shutdown()
+        
+        # 4. Wait a bit for threads to finish
         QTimer.singleShot(500, self._force_exit)
         
     def _force_exit(self):
@@ -493,7 +675,10 @@ class TradingMainWindow(FluentWindow):
         import os
         import sys
         
-        print("[App] Forcing exit...")
+        log.info("Forcing exit...")
+        if isinstance(self._bridge, FeedProcessBridge):
+            self._bridge.close()
+        shutdown_logging()
         
         # Force quit the application
         QApplication.quit()
@@ -0,0 +1,95 @@
+"""
+UI Update Scheduler.
+
+Frame-rate-capped redraw scheduler shared by the dashboard widgets.
+"""
+import time
+from typing import Callable, Dict, Optional
+from PySide6.QtCore import QObject, QTimer, Slot
+
+
+def _frame_interval_ms(fps: float) -> int:
+    if fps <= 0:
+        raise ValueError("fps must be positive")
+    return max(1, int(1000 / fps))
+
+
+class UpdateScheduler(QObject):
+    """
+    Flushes dirty widgets on a fixed cadence.
+
+    Widgets mark themselves dirty instead of repainting on every incoming
+    signal. A single QTimer then calls each registered flush callback at most
+    once per frame, which bounds GUI work under bursty traffic. The timer only
+    runs while something is dirty.
+    """
+
+    def __init__(self, fps: int = 30, parent=None):
+        super().__init__(parent)
+        self._dirty: Dict[Callable[[], None], None] = {}
+        self._interval_ms = _frame_interval_ms(fps)
+        self._last_frame = 0.0
+
+        # Counters
+        self._marks = 0
+        self._flushes = 0
+        self._frames = 0
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._on_frame)
+
+    @property
+    def fps(self) -> float:
+        return 1000.0 / self._interval_ms
+
+    def set_fps(self, fps: int):
+        """Change the frame rate cap."""
+        self._interval_ms = _frame_interval_ms(fps)
+
+    def mark_dirty(self, flush: Callable[[], None]):
+        """
+        Request a flush on the next frame.
+
+        Args:
+            flush: Callback that applies the widget's pending updates.
+                   Marking the same callback again before the frame is a no-op.
+        """
+        self._marks += 1
+        self._dirty[flush] = None
+        if not self._timer.isActive():
+            elapsed_ms = (time.monotonic() - self._last_frame) * 1000.0
+            self._timer.start(max(0, int(self._interval_ms - elapsed_ms)))
+
+    @Slot()
+    def _on_frame(self):
+        self._last_frame = time.monotonic()
+        self._frames += 1
+        dirty, self._dirty = self._dirty, {}
+        for flush in dirty:
+            flush()
+            self._flushes += 1
+
+    @property
+    def stats(self) -> dict:
+        """Scheduler counters (marks, flushes, frames, pending)."""
+        return {
+            "marks": self._marks,
+            "flushes": self._flushes,
+            "frames": self._frames,
+            "pending": len(self._dirty),
+        }
+
+
+def schedule_flush(scheduler: Optional[UpdateScheduler], flush: Callable[[], None]):
+    """
+    Mark `flush` dirty on `scheduler`, or run it now if there is no scheduler.
+
+    Args:
+        scheduler: Shared UpdateScheduler (None when a widget is used standalone)
+        flush: Widget callback that applies its pending updates
+    """
+    if scheduler is not None:
+        scheduler.mark_dirty(flush)
+    else:
+        flush()
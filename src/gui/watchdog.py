@@ -0,0 +1,237 @@
+"""
+GUI Event-Loop Watchdog.
+
+Detects stalls of the Qt GUI thread and attributes them to the Python code
+that was running.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from PySide6.QtCore import QObject, QTimer, Qt, Signal, Slot
+
+from src.core.latency import LatencyHistogram
+from src.core.logger import get_logger
+
+log = get_logger("watchdog")
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+Frame = Tuple[str, str, int]  # (file, qualified function name, line)
+
+
+def is_market_hours(epoch: Optional[float] = None) -> bool:
+    """True during US equity regular trading hours (Mon-Fri 9:30-16:00 ET)."""
+    from zoneinfo import ZoneInfo
+    now = datetime.fromtimestamp(time.time() if epoch is None else epoch, ZoneInfo("America/New_York"))
+    minutes = now.hour * 60 + now.minute
+    return now.weekday() < 5 and 9 * 60 + 30 <= minutes < 16 * 60
+
+
+def _stack_of(frame, limit: int = 64) -> List[Frame]:
+    """Frames of a (foreign) thread's stack, innermost first."""
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append((code.co_filename, getattr(code, "co_qualname", code.co_name), frame.f_lineno))
+        frame = frame.f_back
+    return stack
+
+
+def _culprit(stack: List[Frame]) -> str:
+    """Innermost application frame of a stack, e.g. "OrderTable._refresh_table"."""
+    for filename, name, _ in stack:
+        path = os.path.abspath(filename)
+        if path.startswith(_SRC_DIR) and path != _THIS_FILE and not path.endswith("main.py"):
+            return name
+    if stack and not stack[0][0].endswith("main.py"):
+        filename, name, _ = stack[0]
+        return f"{name} ({os.path.basename(filename)})"  # Library code called from Qt
+    # Only app.exec() on the stack: Qt is busy in native code (layout, paint, ...)
+    return "Qt (native)"
+
+
+@dataclass
+class StallRecord:
+    """One GUI thread stall."""
+
+    started: float                 # Epoch seconds
+    duration_ms: float
+    culprit: str                   # Innermost application frame while stalled
+    samples: int                   # Stack samples taken during the stall
+    market_hours: bool
+    stack: List[Frame] = field(default_factory=list)  # Innermost first
+
+    def format_stack(self) -> str:
+        return "\n".join(
+            f'  File "{filename}", line {line}, in {name}'
+            for filename, name, line in reversed(self.stack)
+        )
+
+
+class EventLoopWatchdog(QObject):
+    """
+    Measures GUI event-loop latency and catches stalls.
+
+    A precise heartbeat timer on the GUI thread records how late it fires.
+    A sampling thread watches the heartbeat; once it is more than
+    `threshold_ms` overdue it samples the GUI thread's Python stack every
+    `sample_ms` until the loop recovers. The stall is then recorded with the
+    application function seen most often in the samples as its culprit.
+    """
+
+    # Signals
+    stall_detected = Signal(object)  # StallRecord
+
+    DEFAULT_INTERVAL_MS = 10
+    DEFAULT_THRESHOLD_MS = 100
+    DEFAULT_SAMPLE_MS = 5
+    MAX_SAMPLES_PER_STALL = 200
+
+    def __init__(
+        self,
+        parent=None,
+        interval_ms: int = DEFAULT_INTERVAL_MS,
+        threshold_ms: int = DEFAULT_THRESHOLD_MS,
+        sample_ms: int = DEFAULT_SAMPLE_MS,
+        history: int = 200,
+    ):
+        super().__init__(parent)
+        self._interval = interval_ms / 1000.0
+        self._threshold = threshold_ms / 1000.0
+        self._sample_interval = sample_ms / 1000.0
+        self._gui_thread_id = threading.get_ident()
+
+        self._lag = LatencyHistogram()
+        self._stalls: Deque[StallRecord] = deque(maxlen=history)
+        self._culprits: Dict[str, List[float]] = {}  # culprit -> [count, total ms, max ms]
+        self._stall_count = 0
+        self._market_hours_stalls = 0
+
+        self._lock = threading.Lock()
+        self._samples: List[List[Frame]] = []  # Stacks sampled during the current stall
+        self._last_beat = time.perf_counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._on_heartbeat)
+
+    @property
+    def threshold_ms(self) -> float:
+        return self._threshold * 1000.0
+
+    def set_threshold(self, threshold_ms: float):
+        """Minimum event-loop delay reported as a stall."""
+        self._threshold = threshold_ms / 1000.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._timer.isActive()
+
+    def start(self):
+        """Start the heartbeat and the sampling thread (call on the GUI thread)."""
+        if self.is_running:
+            return
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._timer.start()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="gui-watchdog", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+            self._sampler = None
+
+    def _sample_loop(self):
+        """Sampling thread: capture the GUI stack while the heartbeat is overdue."""
+        while not self._stop.wait(self._sample_interval):
+            beat = self._last_beat
+            if time.perf_counter() - beat < self._threshold:
+                continue
+            frame = sys._current_frames().get(self._gui_thread_id)
+            if frame is None:
+                continue
+            stack = _stack_of(frame)
+            del frame
+            with self._lock:
+                # Drop the sample if the loop recovered while it was taken
+                if self._last_beat == beat and len(self._samples) < self.MAX_SAMPLES_PER_STALL:
+                    self._samples.append(stack)
+
+    @Slot()
+    def _on_heartbeat(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_beat
+        self._last_beat = now
+        self._lag.record(int(max(0.0, elapsed - self._interval) * 1e9))
+
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if elapsed >= self._threshold:
+            self._record_stall(elapsed, samples)
+
+    def _record_stall(self, elapsed: float, samples: List[List[Frame]]):
+        duration_ms = elapsed * 1000.0
+        started = time.time() - elapsed
+        if samples:
+            culprits = Counter(_culprit(stack) for stack in samples)
+            culprit = culprits.most_common(1)[0][0]
+            stack = next(stack for stack in samples if _culprit(stack) == culprit)
+        else:
+            culprit, stack = "unknown", []  # Shorter than one sampling period
+
+        record = StallRecord(started, duration_ms, culprit, len(samples), is_market_hours(started), stack)
+        self._stalls.append(record)
+        self._stall_count += 1
+        if record.market_hours:
+            self._market_hours_stalls += 1
+        totals = self._culprits.setdefault(culprit, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += duration_ms
+        totals[2] = max(totals[2], duration_ms)
+
+        log.warning(
+            "GUI thread stalled for %.0f ms in %s", duration_ms, culprit,
+            extra={"fields": {"samples": len(samples), "market_hours": record.market_hours}},
+        )
+        self.stall_detected.emit(record)
+
+    def recent_stalls(self) -> List[StallRecord]:
+        """Recorded stalls, oldest first."""
+        return list(self._stalls)
+
+    def culprits(self) -> List[dict]:
+        """Stall totals per culprit, worst (total time) first."""
+        rows = [
+            {"culprit": name, "count": int(count), "total_ms": total, "max_ms": worst}
+            for name, (count, total, worst) in self._culprits.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    @property
+    def stats(self) -> dict:
+        """Event-loop lag (ms) and stall counters."""
+        return {
+            "lag": self._lag.summary(),
+            "stalls": self._stall_count,
+            "market_hours_stalls": self._market_hours_stalls,
+        }
+
+    def reset(self):
+        self._lag.reset()
+        self._stalls.clear()
+        self._culprits.clear()
+        self._stall_count = 0
+        self._market_hours_stalls = 0
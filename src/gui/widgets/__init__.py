@@ -11,6 +11,7 @@ from .strategy_control import StrategyControl
 from .log_viewer import LogViewer
 from .backtest_runner import BacktestRunner
 from .tearsheet_viewer import TearsheetViewer
+from .diagnostics_panel import DiagnosticsPanel
 
 __all__ = [
     "ConnectionWidget",
@@ -21,4 +22,5 @@ __all__ = [
     "LogViewer",
     "BacktestRunner",
     "TearsheetViewer",
+    "DiagnosticsPanel",
 ]
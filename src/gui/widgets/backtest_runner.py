@@ -11,6 +11,10 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, Slot, QDate
 from datetime import datetime, timedelta
 
+from src.core.logger import get_logger
+
+log = get_logger("backtest")
+
 
 class BacktestRunner(QWidget):
     """
@@ -210,7 +214,7 @@ class BacktestRunner(QWidget):
             "initial_capital": self._capital_spin.value(),
         }
         
-        print(f"[Backtest] Starting: {config}")
+        log.info("Starting: %s", config)
         
         self._is_running = True
         self._run_btn.setEnabled(False)
@@ -222,7 +226,7 @@ class BacktestRunner(QWidget):
         
     def _stop_backtest(self):
         """Stop the backtest."""
-        print("[Backtest] Stopped by user")
+        log.info("Stopped by user")
         
         self._is_running = False
         self._run_btn.setEnabled(True)
@@ -0,0 +1,256 @@
+"""
+Diagnostics Panel Widget.
+
+Shows the market data latency histograms recorded by src.core.latency and
+the GUI stalls caught by the EventLoopWatchdog.
+"""
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QHeaderView, QLabel, QPushButton, QCheckBox
+)
+from PySide6.QtCore import Qt, Slot, QTimer
+from datetime import datetime
+
+from src.core.latency import LatencyTracker, tracker as default_tracker
+from src.gui.watchdog import EventLoopWatchdog
+
+
+_BUTTON_STYLE = """
+    QPushButton {
+        background: rgba(255, 255, 255, 20);
+        color: #aaa;
+        border: 1px solid rgba(255, 255, 255, 40);
+        border-radius: 4px;
+        padding: 5px 12px;
+        font-size: 12px;
+    }
+    QPushButton:hover {
+        background: rgba(255, 255, 255, 40);
+        color: white;
+    }
+"""
+
+_TABLE_STYLE = """
+    QTableWidget {
+        background: rgba(30, 30, 46, 200);
+        color: #ddd;
+        border: 1px solid rgba(255, 255, 255, 20);
+        border-radius: 4px;
+        gridline-color: rgba(255, 255, 255, 30);
+    }
+    QTableWidget::item {
+        padding: 5px;
+    }
+    QHeaderView::section {
+        background: rgba(255, 255, 255, 10);
+        color: #aaa;
+        padding: 8px;
+        border: none;
+        font-weight: bold;
+    }
+"""
+
+
+class DiagnosticsPanel(QWidget):
+    """
+    Diagnostics page.
+
+    Turns latency tracking on and off and shows per-stage percentiles of
+    the market data path, plus GUI event-loop lag and the slots that stalled
+    it. Refreshes once per second while visible.
+    """
+
+    COLUMNS = ["Stage", "Samples", "p50 (ms)", "p90 (ms)", "p99 (ms)", "p99.9 (ms)", "Max (ms)"]
+    STALL_COLUMNS = ["Time", "Duration (ms)", "Culprit", "Market Hours"]
+    CULPRIT_COLUMNS = ["Culprit", "Stalls", "Total (ms)", "Worst (ms)"]
+    MAX_STALL_ROWS = 50
+    STAGE_HINTS = {
+        "decode": "TWS socket read -> IBKRClient.tickPrice()",
+        "deliver": "TWS socket read -> tick batch on the GUI thread",
+        "dispatch": "Handling one tick batch on the GUI thread",
+        "paint": "TWS socket read -> chart redraw",
+    }
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None, tracker: LatencyTracker = None, watchdog: EventLoopWatchdog = None):
+        super().__init__(parent)
+        self.setObjectName("diagnosticsPanel")
+        self._tracker = tracker or default_tracker
+        self._watchdog = watchdog
+        self._setup_ui()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def _setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(10)
+
+        # Header
+        header = QHBoxLayout()
+        title = QLabel("Market Data Latency")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #ddd;")
+        header.addWidget(title)
+        header.addStretch()
+
+        self._enable_check = QCheckBox("Record latency")
+        self._enable_check.setStyleSheet("color: #aaa; font-size: 12px;")
+        self._enable_check.setChecked(self._tracker.enabled)
+        self._enable_check.toggled.connect(self._on_enable_toggled)
+        header.addWidget(self._enable_check)
+
+        self._reset_btn = QPushButton("Reset")
+        self._reset_btn.setStyleSheet(_BUTTON_STYLE)
+        self._reset_btn.clicked.connect(self._on_reset)
+        header.addWidget(self._reset_btn)
+        layout.addLayout(header)
+
+        # Latency table (one row per stage)
+        self._table = QTableWidget(len(self._tracker.STAGES), len(self.COLUMNS))
+        self._table.setHorizontalHeaderLabels(self.COLUMNS)
+        self._table.setStyleSheet(_TABLE_STYLE)
+        self._table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self._table.verticalHeader().setVisible(False)
+        self._table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self._table.setSelectionMode(QTableWidget.NoSelection)
+        for row, stage in enumerate(self._tracker.STAGES):
+            item = QTableWidgetItem(stage)
+            item.setToolTip(self.STAGE_HINTS.get(stage, ""))
+            self._table.setItem(row, 0, item)
+        layout.addWidget(self._table)
+
+        self._hint_label = QLabel()
+        self._hint_label.setStyleSheet("color: #666; font-size: 11px;")
+        layout.addWidget(self._hint_label)
+
+        # GUI event loop (watchdog)
+        loop_header = QHBoxLayout()
+        loop_title = QLabel("GUI Event Loop")
+        loop_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #ddd;")
+        loop_header.addWidget(loop_title)
+        loop_header.addStretch()
+        self._clear_stalls_btn = QPushButton("Clear")
+        self._clear_stalls_btn.setStyleSheet(_BUTTON_STYLE)
+        self._clear_stalls_btn.clicked.connect(self._on_clear_stalls)
+        loop_header.addWidget(self._clear_stalls_btn)
+        layout.addLayout(loop_header)
+
+        self._loop_label = QLabel("Watchdog not running")
+        self._loop_label.setStyleSheet("color: #aaa; font-size: 12px;")
+        layout.addWidget(self._loop_label)
+
+        tables = QHBoxLayout()
+        self._culprit_table = self._make_table(self.CULPRIT_COLUMNS)
+        tables.addWidget(self._culprit_table, 1)
+        self._stall_table = self._make_table(self.STALL_COLUMNS)
+        self._stall_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self._stall_table.setSelectionMode(QTableWidget.SingleSelection)
+        tables.addWidget(self._stall_table, 1)
+        layout.addLayout(tables, 1)
+
+    def _make_table(self, columns) -> QTableWidget:
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setStyleSheet(_TABLE_STYLE)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionMode(QTableWidget.NoSelection)
+        return table
+
+    def set_watchdog(self, watchdog: EventLoopWatchdog):
+        """Show stalls caught by `watchdog`."""
+        self._watchdog = watchdog
+        self.refresh()
+
+    @Slot()
+    def refresh(self):
+        """Update the tables from the tracker and the watchdog."""
+        snapshot = self._tracker.snapshot()
+        for row, stage in enumerate(self._tracker.STAGES):
+            summary = snapshot[stage]
+            count = summary["count"]
+            values = [str(count)] + [
+                f"{summary[key]:.3f}" if count else "-"
+                for key in ("p50", "p90", "p99", "p999", "max")
+            ]
+            for column, text in enumerate(values, start=1):
+                item = self._table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    self._table.setItem(row, column, item)
+                item.setText(text)
+
+        if self._tracker.enabled:
+            self._hint_label.setText("Recording. Hover a stage for what it measures.")
+        else:
+            self._hint_label.setText("Latency tracking is off (or start with QS_LATENCY=1).")
+
+        if self._watchdog is not None:
+            self._refresh_watchdog()
+
+    def _refresh_watchdog(self):
+        stats = self._watchdog.stats
+        lag = stats["lag"]
+        if lag["count"]:
+            lag_text = f"lag p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.0f} ms"
+        else:
+            lag_text = "no samples yet"
+        self._loop_label.setText(
+            f"Event loop {lag_text}  |  "
+            f"{stats['stalls']} stalls over {self._watchdog.threshold_ms:.0f} ms "
+            f"({stats['market_hours_stalls']} during market hours)"
+        )
+
+        culprits = self._watchdog.culprits()
+        self._culprit_table.setRowCount(len(culprits))
+        for row, entry in enumerate(culprits):
+            values = [
+                entry["culprit"], str(entry["count"]),
+                f"{entry['total_ms']:.0f}", f"{entry['max_ms']:.0f}",
+            ]
+            for column, text in enumerate(values):
+                self._culprit_table.setItem(row, column, QTableWidgetItem(text))
+
+        stalls = self._watchdog.recent_stalls()[-self.MAX_STALL_ROWS:][::-1]  # Newest first
+        self._stall_table.setRowCount(len(stalls))
+        for row, stall in enumerate(stalls):
+            values = [
+                datetime.fromtimestamp(stall.started).strftime("%H:%M:%S.%f")[:-3],
+                f"{stall.duration_ms:.0f}",
+                stall.culprit,
+                "Yes" if stall.market_hours else "",
+            ]
+            stack = stall.format_stack() or "No stack sample (stall shorter than the sampling period)"
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                item.setToolTip(stack)
+                self._stall_table.setItem(row, column, item)
+
+    @Slot(bool)
+    def _on_enable_toggled(self, enabled: bool):
+        self._tracker.set_enabled(enabled)
+        self.refresh()
+
+    @Slot()
+    def _on_reset(self):
+        self._tracker.reset()
+        self.refresh()
+
+    @Slot()
+    def _on_clear_stalls(self):
+        if self._watchdog is not None:
+            self._watchdog.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
@@ -9,77 +9,181 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboB
 from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtGui import QColor
 import numpy as np
+import time
 from datetime import datetime
 from typing import List, Optional
 
+from src.core.latency import tracker as latency
+from src.core.ring_buffer import NumpyRingBuffer
+from src.gui.update_scheduler import schedule_flush
+
 
 class CandlestickItem(pg.GraphicsObject):
-    """Custom candlestick chart item for PyQtGraph."""
+    """
+    Custom candlestick chart item for PyQtGraph.
+    
+    Renders incrementally: completed candles are baked into fixed-size
+    QPicture chunks that are never redrawn, the remaining completed candles
+    share one small tail picture, and the last (live) candle is painted
+    directly so updating it in place costs O(1) regardless of history size.
+    """
+    
+    CHUNK_SIZE = 256  # Candles per baked picture
+    BODY_WIDTH = 0.35
     
     def __init__(self, data=None):
         pg.GraphicsObject.__init__(self)
-        self.data = data or []  # List of (time, open, high, low, close)
-        self.generatePicture()
+        self._bull_pen = pg.mkPen('#26a69a', width=1)
+        self._bull_brush = pg.mkBrush('#26a69a')
+        self._bear_pen = pg.mkPen('#ef5350', width=1)
+        self._bear_brush = pg.mkBrush('#ef5350')
+        self.setData(data or [])
         
-    def generatePicture(self):
-        """Generate the candlestick picture."""
-        self.picture = pg.QtGui.QPicture()
-        p = pg.QtGui.QPainter(self.picture)
+    def _draw_candle(self, p, candle):
+        """Draw a single candle with the given painter."""
+        t, o, h, l, c = candle
         
-        if not self.data:
-            p.end()
-            return
-            
-        width = 0.35
+        if c >= o:  # Bullish (green)
+            p.setPen(self._bull_pen)
+            p.setBrush(self._bull_brush)
+        else:  # Bearish (red)
+            p.setPen(self._bear_pen)
+            p.setBrush(self._bear_brush)
         
-        for candle in self.data:
-            t, o, h, l, c = candle
-            
-            if c >= o:  # Bullish (green)
-                p.setPen(pg.mkPen('#26a69a', width=1))
-                p.setBrush(pg.mkBrush('#26a69a'))
-            else:  # Bearish (red)
-                p.setPen(pg.mkPen('#ef5350', width=1))
-                p.setBrush(pg.mkBrush('#ef5350'))
-            
-            # Draw wick
-            p.drawLine(pg.QtCore.QPointF(t, l), pg.QtCore.QPointF(t, h))
-            
-            # Draw body
-            p.drawRect(pg.QtCore.QRectF(t - width, o, width * 2, c - o))
-            
+        # Draw wick
+        p.drawLine(pg.QtCore.QPointF(t, l), pg.QtCore.QPointF(t, h))
+        
+        # Draw body
+        width = self.BODY_WIDTH
+        p.drawRect(pg.QtCore.QRectF(t - width, o, width * 2, c - o))
+        
+    def _record(self, candles) -> 'pg.QtGui.QPicture':
+        """Record candles into a new QPicture."""
+        picture = pg.QtGui.QPicture()
+        p = pg.QtGui.QPainter(picture)
+        for candle in candles:
+            self._draw_candle(p, candle)
         p.end()
+        return picture
+        
+    def _bake_chunks(self):
+        """Move full chunks of completed candles out of the tail."""
+        completed = len(self.data) - 1  # Last candle stays live
+        while completed - self._baked >= self.CHUNK_SIZE:
+            chunk = self.data[self._baked:self._baked + self.CHUNK_SIZE]
+            self._chunks.append(self._record(chunk))
+            self._baked += self.CHUNK_SIZE
+            self._tail_dirty = True
+            
+    def _candle_rect(self, candle) -> 'pg.QtCore.QRectF':
+        """Bounding rectangle of a single candle."""
+        t, o, h, l, c = candle
+        low, high = min(l, o, c), max(h, o, c)
+        return pg.QtCore.QRectF(t - self.BODY_WIDTH, low, self.BODY_WIDTH * 2, high - low)
+        
+    def _extend_bounds(self, candle):
+        """Grow the bounding box to include a candle."""
+        rect = self._candle_rect(candle)
+        if self._bounds.isNull():
+            new_bounds = rect
+        else:
+            new_bounds = self._bounds.united(rect)
+        if new_bounds != self._bounds:
+            self.prepareGeometryChange()
+            self._bounds = new_bounds
+            self.informViewBoundsChanged()
         
     def paint(self, p, *args):
-        p.drawPicture(0, 0, self.picture)
+        for picture in self._chunks:
+            p.drawPicture(0, 0, picture)
+        
+        if self._tail_dirty:
+            self._tail = self._record(self.data[self._baked:len(self.data) - 1])
+            self._tail_dirty = False
+        p.drawPicture(0, 0, self._tail)
+        
+        if self.data:
+            self._draw_candle(p, self.data[-1])
         
     def boundingRect(self):
-        return pg.QtCore.QRectF(self.picture.boundingRect())
+        return pg.QtCore.QRectF(self._bounds)
         
     def setData(self, data):
-        """Update chart data."""
-        self.data = data
-        self.generatePicture()
+        """Replace all chart data."""
+        self.prepareGeometryChange()
+        self.data = list(data)
+        self._chunks = []
+        self._baked = 0
+        self._tail = pg.QtGui.QPicture()
+        self._tail_dirty = True
+        self._bounds = pg.QtCore.QRectF()
+        for candle in self.data:
+            rect = self._candle_rect(candle)
+            self._bounds = rect if self._bounds.isNull() else self._bounds.united(rect)
+        
+        self._bake_chunks()
         self.informViewBoundsChanged()
+        self.update()
+        
+    def appendCandle(self, candle):
+        """
+        Append a candle. Only the tail picture is re-recorded.
+        
+        Args:
+            candle: (time, open, high, low, close) tuple
+        """
+        self.data.append(candle)
+        self._tail_dirty = True
+        self._bake_chunks()
+        self._extend_bounds(candle)
+        self.update()
+        
+    def updateLastCandle(self, candle):
+        """
+        Replace the last (live) candle in place without re-recording anything.
+        
+        Args:
+            candle: (time, open, high, low, close) tuple
+        """
+        if not self.data:
+            self.appendCandle(candle)
+            return
+        self.data[-1] = candle
+        self._extend_bounds(candle)
+        self.update()
 
 
 class LiveChartWidget(QWidget):
     """
     Live price chart widget with candlestick visualization.
     
-    Displays real-time price data from IBKR.
+    Displays real-time price data from IBKR. Live ticks are kept in
+    preallocated ring buffers so a full session fits without per-tick
+    allocation.
     """
     
     # Signals
     symbol_changed = Signal(str)  # Emitted when symbol changes
     
-    def __init__(self, parent=None):
+    DEFAULT_TICK_CAPACITY = 100_000
+    
+    def __init__(self, parent=None, tick_capacity: int = DEFAULT_TICK_CAPACITY):
         super().__init__(parent)
         self.setObjectName("liveChartWidget")
         self._current_symbol = "SPY"
         self._last_price = 0.0
-        self._prices = []  # Store recent prices for line chart
+        # Live tick series (timestamp, price) for the line chart
+        self._tick_times = NumpyRingBuffer(tick_capacity)
+        self._tick_prices = NumpyRingBuffer(tick_capacity)
+        self._tick_x = np.arange(tick_capacity, dtype=np.float64)
         self._bars = []    # Store historical bars for candlestick
+        self._last_bar_time: Optional[int] = None  # Start (epoch seconds) of the last candle, if known
+        
+        # Deferred redraw state (flushed once per frame by the UpdateScheduler)
+        self._scheduler = None
+        self._ticks_dirty = False
+        self._bars_dirty = False
+        self._shown_price: Optional[float] = None
         self._setup_ui()
         
     def _setup_ui(self):
@@ -144,6 +248,8 @@ class LiveChartWidget(QWidget):
             pen=pg.mkPen('#26a69a', width=2),
             name='Price'
         )
+        self._price_line.setClipToView(True)
+        self._price_line.setDownsampling(auto=True, method='peak')
         
         layout.addWidget(self._chart)
         
@@ -151,8 +257,13 @@ class LiveChartWidget(QWidget):
     def _on_symbol_changed(self, symbol: str):
         """Handle symbol change."""
         self._current_symbol = symbol
-        self._prices = []
+        self._tick_times.clear()
+        self._tick_prices.clear()
         self._bars = []
+        self._last_bar_time = None
+        self._ticks_dirty = False
+        self._bars_dirty = False
+        self._shown_price = None
         self._candles.setData([])
         self._price_line.setData([], [])
         self._live_indicator.setVisible(False)
@@ -160,30 +271,53 @@ class LiveChartWidget(QWidget):
         self._status_label.setText("Loading...")
         self.symbol_changed.emit(symbol)
         
+    def set_update_scheduler(self, scheduler):
+        """
+        Defer redraws to a shared UpdateScheduler.
+        
+        Args:
+            scheduler: UpdateScheduler instance, or None to redraw immediately
+        """
+        self._scheduler = scheduler
+        
+    def _flush_updates(self):
+        """Apply pending bar and tick updates to the widgets."""
+        if self._bars_dirty:
+            self._bars_dirty = False
+            if self._bars and self._bars[-1][4] > 0:
+                self._price_label.setText(f"${self._bars[-1][4]:.2f}")
+                self._status_label.setText(f"{len(self._bars)} bars loaded")
+                
+        if self._ticks_dirty:
+            self._ticks_dirty = False
+            price = self._last_price
+            self._live_indicator.setVisible(True)
+            self._status_label.setText("")
+            
+            # Update price label with color based on change
+            if self._shown_price is not None:
+                if price > self._shown_price:
+                    self._price_label.setStyleSheet("color: #26a69a; font-size: 18px; font-weight: bold;")
+                elif price < self._shown_price:
+                    self._price_label.setStyleSheet("color: #ef5350; font-size: 18px; font-weight: bold;")
+            self._price_label.setText(f"${price:.2f}")
+            self._shown_price = price
+            
+            # Update the price line chart (views into the ring buffers, no copies)
+            count = len(self._tick_prices)
+            if count > 1:
+                self._price_line.setData(self._tick_x[:count], self._tick_prices.view())
+            if latency.enabled:
+                latency.frame_painted()
+        
     @Slot(float)
     def update_price(self, price: float):
         """Update chart with new price."""
         self._last_price = price
-        self._live_indicator.setVisible(True)
-        self._status_label.setText("")
-        
-        # Update price label with color based on change
-        if self._prices and price > self._prices[-1]:
-            self._price_label.setStyleSheet("color: #26a69a; font-size: 18px; font-weight: bold;")
-        elif self._prices and price < self._prices[-1]:
-            self._price_label.setStyleSheet("color: #ef5350; font-size: 18px; font-weight: bold;")
-            
-        self._price_label.setText(f"${price:.2f}")
-        self._prices.append(price)
-        
-        # Keep only last 100 prices
-        if len(self._prices) > 100:
-            self._prices = self._prices[-100:]
-            
-        # Update the price line chart
-        if len(self._prices) > 1:
-            x_data = list(range(len(self._prices)))
-            self._price_line.setData(x_data, self._prices)
+        self._tick_times.append(time.time())
+        self._tick_prices.append(price)
+        self._ticks_dirty = True
+        schedule_flush(self._scheduler, self._flush_updates)
             
     @Slot(object)
     def add_bar(self, bar):
@@ -191,19 +325,72 @@ class LiveChartWidget(QWidget):
         Add a historical bar to the chart.
         
         Args:
-            bar: ibapi BarData object
+            bar: ibapi BarData or BarEvent
         """
         # Convert bar to tuple format (index, open, high, low, close)
         bar_index = len(self._bars)
-        self._bars.append((bar_index, bar.open, bar.high, bar.low, bar.close))
+        candle = (bar_index, bar.open, bar.high, bar.low, bar.close)
+        self._bars.append(candle)
+        self._last_bar_time = getattr(bar, "time", None)
+        
+        # Update candlesticks (incremental)
+        self._candles.appendCandle(candle)
         
-        # Update candlesticks
+        # Price/status labels follow the latest bar on the next frame
+        self._bars_dirty = True
+        schedule_flush(self._scheduler, self._flush_updates)
+        
+    @Slot(object)
+    def update_last_bar(self, bar):
+        """
+        Update the most recent bar in place (e.g. a live, still-forming bar).
+        
+        Args:
+            bar: ibapi BarData or BarEvent
+        """
+        if not self._bars:
+            self.add_bar(bar)
+            return
+        bar_index = self._bars[-1][0]
+        candle = (bar_index, bar.open, bar.high, bar.low, bar.close)
+        self._bars[-1] = candle
+        self._candles.updateLastCandle(candle)
+        
+        self._bars_dirty = True
+        schedule_flush(self._scheduler, self._flush_updates)
+        
+    def set_bars(self, bars: np.ndarray):
+        """
+        Replace the candles with a series of bars.
+        
+        Args:
+            bars: Structured array with open/high/low/close fields
+                  (e.g. BAR_DTYPE from BarStore), oldest first
+        """
+        self._bars = list(zip(
+            range(len(bars)),
+            bars["open"].tolist(), bars["high"].tolist(),
+            bars["low"].tolist(), bars["close"].tolist(),
+        ))
         self._candles.setData(self._bars)
+        self._last_bar_time = int(bars["time"][-1]) if len(bars) and "time" in bars.dtype.names else None
         
-        # Update price label if this is the latest bar
-        if bar.close > 0:
-            self._price_label.setText(f"${bar.close:.2f}")
-            self._status_label.setText(f"{len(self._bars)} bars loaded")
+        self._bars_dirty = True
+        schedule_flush(self._scheduler, self._flush_updates)
+        
+    @Slot(object)
+    def update_live_bar(self, bar):
+        """
+        Show a live bar: update the last candle while its period lasts,
+        append a new candle once the next period starts.
+        
+        Args:
+            bar: BarEvent from the BarAggregator (same timeframe as the candles)
+        """
+        if self._last_bar_time is None or bar.time > self._last_bar_time:
+            self.add_bar(bar)
+        elif bar.time == self._last_bar_time:
+            self.update_last_bar(bar)
         
     @Slot(list)
     def update_data(self, candles: List[tuple]):
@@ -217,7 +404,12 @@ class LiveChartWidget(QWidget):
     def clear_data(self):
         """Clear all chart data."""
         self._bars = []
-        self._prices = []
+        self._last_bar_time = None
+        self._tick_times.clear()
+        self._tick_prices.clear()
+        self._ticks_dirty = False
+        self._bars_dirty = False
+        self._shown_price = None
         self._candles.setData([])
         self._price_line.setData([], [])
         self._price_label.setText("--")
@@ -227,3 +419,13 @@ class LiveChartWidget(QWidget):
     def current_symbol(self) -> str:
         """Get current symbol."""
         return self._current_symbol
+        
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols offered in the symbol selector."""
+        return [self._symbol_combo.itemText(i) for i in range(self._symbol_combo.count())]
+        
+    @property
+    def tick_series(self):
+        """Get live ticks as (timestamps, prices) views, oldest first."""
+        return self._tick_times.view(), self._tick_prices.view()
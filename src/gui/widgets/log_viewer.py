@@ -4,28 +4,201 @@ Log Viewer Widget.
 Displays application logs in real-time with filtering.
 """
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTextEdit,
-    QLabel, QComboBox, QPushButton, QLineEdit
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QHeaderView,
+    QLabel, QComboBox, QPushButton, QLineEdit, QAbstractItemView
 )
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QTextCharFormat, QColor, QFont
+from PySide6.QtCore import Qt, Signal, Slot, QAbstractListModel, QModelIndex, QTimer
+from PySide6.QtGui import QColor, QFont
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+
+from src.gui.update_scheduler import schedule_flush
+
+
+class LogStore:
+    """
+    Fixed-capacity ring of log entries addressed by sequence number.
+    
+    Sequence numbers grow forever; once the store is full every append
+    evicts the oldest entry.
+    """
+    
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        self._entries: List[Optional[dict]] = [None] * capacity
+        self._first_seq = 0
+        self._next_seq = 0
+        
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+        
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+        
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest stored entry."""
+        return self._first_seq
+        
+    @property
+    def next_seq(self) -> int:
+        """Sequence number the next entry will get."""
+        return self._next_seq
+        
+    def append(self, entry: dict) -> int:
+        """Store an entry and return its sequence number."""
+        seq = self._next_seq
+        self._entries[seq % self._capacity] = entry
+        self._next_seq = seq + 1
+        if self._next_seq - self._first_seq > self._capacity:
+            self._first_seq += 1
+        return seq
+        
+    def get(self, seq: int) -> dict:
+        """Get a stored entry by sequence number."""
+        return self._entries[seq % self._capacity]
+        
+    def clear(self):
+        self._entries = [None] * self._capacity
+        self._first_seq = self._next_seq
+
+
+class LogListModel(QAbstractListModel):
+    """
+    Filtered list model over a LogStore.
+    
+    Keeps the sequence numbers of the entries that pass the current level and
+    text filter. New entries are tested once when they arrive, evicted entries
+    are dropped from the front, and narrowing the search only re-tests the
+    rows that are currently visible.
+    """
+    
+    LEVEL_COLORS = {
+        "DEBUG": QColor("#888888"),
+        "INFO": QColor("#26a69a"),
+        "WARNING": QColor("#ffb74d"),
+        "ERROR": QColor("#ef5350"),
+    }
+    DEFAULT_COLOR = QColor("#dddddd")
+    
+    def __init__(self, capacity: int, parent=None):
+        super().__init__(parent)
+        self._store = LogStore(capacity)
+        self._visible: List[int] = []  # Sequence numbers passing the filter
+        self._offset = 0               # Index of the first live item in _visible
+        self._level = "ALL"
+        self._text = ""
+        
+    @property
+    def store(self) -> LogStore:
+        return self._store
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._visible) - self._offset
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._store.get(self._visible[self._offset + index.row()])
+        if role == Qt.DisplayRole:
+            return entry["text"]
+        if role == Qt.ForegroundRole:
+            return self.LEVEL_COLORS.get(entry["level"], self.DEFAULT_COLOR)
+        return None
+        
+    def _accepts(self, entry: dict) -> bool:
+        if self._level != "ALL" and entry["level"] != self._level:
+            return False
+        if self._text and self._text not in entry["message_lower"]:
+            return False
+        return True
+        
+    def append_entries(self, entries: List[dict]):
+        """Store a batch of entries and show the ones passing the filter."""
+        if not entries:
+            return
+        seqs = [self._store.append(entry) for entry in entries]
+        
+        # Drop rows whose entries were evicted from the store
+        first_seq = self._store.first_seq
+        end = self._offset
+        while end < len(self._visible) and self._visible[end] < first_seq:
+            end += 1
+        if end > self._offset:
+            self.beginRemoveRows(QModelIndex(), 0, end - self._offset - 1)
+            self._offset = end
+            self.endRemoveRows()
+            if self._offset > len(self._visible) // 2:
+                del self._visible[:self._offset]
+                self._offset = 0
+                
+        # Filter only the new entries
+        accepted = [
+            seq for seq in seqs
+            if seq >= first_seq and self._accepts(self._store.get(seq))
+        ]
+        if accepted:
+            row = self.rowCount()
+            self.beginInsertRows(QModelIndex(), row, row + len(accepted) - 1)
+            self._visible.extend(accepted)
+            self.endInsertRows()
+            
+    def set_filter(self, level: str, text: str):
+        """
+        Apply a level and search filter.
+        
+        Args:
+            level: "ALL" or a log level
+            text: Case-insensitive substring of the message
+        """
+        text = text.lower()
+        if level == self._level and text == self._text:
+            return
+        narrowing = (self._level in ("ALL", level)) and self._text in text
+        self._level = level
+        self._text = text
+        
+        if narrowing:
+            candidates = self._visible[self._offset:]
+        else:
+            candidates = range(self._store.first_seq, self._store.next_seq)
+            
+        self.beginResetModel()
+        self._visible = [seq for seq in candidates if self._accepts(self._store.get(seq))]
+        self._offset = 0
+        self.endResetModel()
+        
+    def clear(self):
+        self.beginResetModel()
+        self._store.clear()
+        self._visible = []
+        self._offset = 0
+        self.endResetModel()
 
 
 class LogViewer(QWidget):
     """
     Widget for viewing application logs.
     
-    Supports filtering by log level and search.
+    Supports filtering by log level and search. Application logs arrive
+    through a QtLogHandler attached to the logging listener. Entries live in
+    a bounded ring (`max_entries`) and are shown in a virtualized list that
+    only renders visible rows. Filter edits are debounced.
     """
     
-    def __init__(self, parent=None):
+    DEFAULT_MAX_ENTRIES = 50_000
+    FILTER_DEBOUNCE_MS = 150
+    
+    def __init__(self, parent=None, max_entries: int = DEFAULT_MAX_ENTRIES):
         super().__init__(parent)
         self.setObjectName("logViewer")
-        self._log_entries: List[dict] = []
+        self._model = LogListModel(max_entries, self)
+        self._pending_entries: List[dict] = []  # Not yet displayed
+        self._scheduler = None
         self._setup_ui()
-        self._add_demo_logs()
         
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -58,7 +231,6 @@ class LogViewer(QWidget):
                 min-width: 100px;
             }
         """)
-        self._level_combo.currentTextChanged.connect(self._filter_logs)
         header.addWidget(self._level_combo)
         
         # Search
@@ -74,9 +246,16 @@ class LogViewer(QWidget):
                 min-width: 200px;
             }
         """)
-        self._search_edit.textChanged.connect(self._filter_logs)
         header.addWidget(self._search_edit)
         
+        # Debounce filter edits
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(self.FILTER_DEBOUNCE_MS)
+        self._filter_timer.timeout.connect(self._filter_logs)
+        self._level_combo.currentTextChanged.connect(self._filter_timer.start)
+        self._search_edit.textChanged.connect(self._filter_timer.start)
+        
         # Clear button
         clear_btn = QPushButton("Clear")
         clear_btn.setStyleSheet("""
@@ -96,11 +275,21 @@ class LogViewer(QWidget):
         
         layout.addLayout(header)
         
-        # Log display
-        self._log_display = QTextEdit()
-        self._log_display.setReadOnly(True)
+        # Log display (virtualized: fixed row height, only visible rows are painted)
+        self._log_display = QTableView()
+        self._log_display.setModel(self._model)
+        self._log_display.horizontalHeader().setVisible(False)
+        self._log_display.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self._log_display.verticalHeader().setVisible(False)
+        self._log_display.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self._log_display.verticalHeader().setDefaultSectionSize(18)
+        self._log_display.setShowGrid(False)
+        self._log_display.setWordWrap(False)
+        self._log_display.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._log_display.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._log_display.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self._log_display.setStyleSheet("""
-            QTextEdit {
+            QTableView {
                 background: #0d0d14;
                 color: #ddd;
                 border: 1px solid rgba(255, 255, 255, 20);
@@ -112,31 +301,14 @@ class LogViewer(QWidget):
         """)
         layout.addWidget(self._log_display)
         
-    def _add_demo_logs(self):
-        """Add demo log entries."""
-        demo_logs = [
-            {"level": "INFO", "message": "Application started", "source": "main"},
-            {"level": "INFO", "message": "Connecting to TWS at 127.0.0.1:7497", "source": "ibkr_bridge"},
-            {"level": "INFO", "message": "Connection established", "source": "ibkr_bridge"},
-            {"level": "DEBUG", "message": "Received nextValidId: 1", "source": "ibkr_bridge"},
-            {"level": "INFO", "message": "Account: DUM425288", "source": "ibkr_bridge"},
-            {"level": "WARNING", "message": "Market data farm connection is slow", "source": "ibkr_bridge"},
-            {"level": "ERROR", "message": "Order rejected: Insufficient funds", "source": "order_manager"},
-            {"level": "INFO", "message": "Strategy 'MeanReversion' started", "source": "strategy"},
-        ]
+    def set_update_scheduler(self, scheduler):
+        """
+        Defer log display to a shared UpdateScheduler.
         
-        for log in demo_logs:
-            self.add_log(log["level"], log["message"], log["source"])
-            
-    def _get_level_color(self, level: str) -> str:
-        """Get color for log level."""
-        colors = {
-            "DEBUG": "#888888",
-            "INFO": "#26a69a",
-            "WARNING": "#ffb74d",
-            "ERROR": "#ef5350",
-        }
-        return colors.get(level, "#ddd")
+        Args:
+            scheduler: UpdateScheduler instance, or None to display immediately
+        """
+        self._scheduler = scheduler
         
     @Slot(str, str, str)
     def add_log(self, level: str, message: str, source: str = "app"):
@@ -154,35 +326,30 @@ class LogViewer(QWidget):
             "level": level,
             "message": message,
             "source": source,
+            "message_lower": message.lower(),
+            "text": f"[{timestamp}] [{level:>7}] {source:>15} | {message}",
         }
-        self._log_entries.append(entry)
-        self._display_log(entry)
-        
-    def _display_log(self, entry: dict):
-        """Display a log entry in the text area."""
-        color = self._get_level_color(entry["level"])
-        formatted = f'<span style="color:#666">[{entry["timestamp"]}]</span> '
-        formatted += f'<span style="color:{color}">[{entry["level"]:>7}]</span> '
-        formatted += f'<span style="color:#888">{entry["source"]:>15}</span> | '
-        formatted += f'<span style="color:#ddd">{entry["message"]}</span>'
-        
-        self._log_display.append(formatted)
+        self._pending_entries.append(entry)
+        schedule_flush(self._scheduler, self._flush_pending)
         
+    def _flush_pending(self):
+        """Display entries added since the last frame."""
+        pending, self._pending_entries = self._pending_entries, []
+        scrollbar = self._log_display.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        self._model.append_entries(pending)
+        if at_bottom:
+            self._log_display.scrollToBottom()
+            
+    @Slot()
     def _filter_logs(self):
         """Filter logs based on level and search text."""
-        level_filter = self._level_combo.currentText()
-        search_text = self._search_edit.text().lower()
-        
-        self._log_display.clear()
+        self._model.set_filter(
+            self._level_combo.currentText(), self._search_edit.text()
+        )
+        self._log_display.scrollToBottom()
         
-        for entry in self._log_entries:
-            if level_filter != "ALL" and entry["level"] != level_filter:
-                continue
-            if search_text and search_text not in entry["message"].lower():
-                continue
-            self._display_log(entry)
-            
     def _clear_logs(self):
         """Clear all logs."""
-        self._log_entries.clear()
-        self._log_display.clear()
+        self._pending_entries.clear()
+        self._model.clear()
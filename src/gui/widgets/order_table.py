@@ -4,20 +4,181 @@ Order Table Widget.
 Displays order history and active orders.
 """
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem,
-    QHeaderView, QLabel, QHBoxLayout, QPushButton
+    QWidget, QVBoxLayout, QTableView, QHeaderView,
+    QLabel, QHBoxLayout, QPushButton, QLineEdit
+)
+from PySide6.QtCore import (
+    Qt, Signal, Slot, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 )
-from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtGui import QColor
-from typing import List, Dict
-from datetime import datetime
+from dataclasses import replace
+from typing import List, Dict, Optional
+
+from src.core.events import OrderEvent, OrderStatusEvent
+from src.gui.update_scheduler import schedule_flush
+
+
+class OrderTableModel(QAbstractTableModel):
+    """
+    Table model of orders indexed by orderId.
+    
+    Rows are kept in arrival order. Updating an existing order emits
+    dataChanged for that row only, so every update is O(1) regardless of
+    order history size. New orders are staged and inserted as one block by
+    `commit_pending()`, so a sorting proxy merges a whole burst in one pass.
+    """
+    
+    COLUMNS = ["Order ID", "Symbol", "Side", "Qty", "Type", "Status"]
+    SORT_ROLE = Qt.UserRole
+    
+    _SIDE_COLORS = {
+        "BUY": QColor("#26a69a"),
+    }
+    _STATUS_COLORS = {
+        "Filled": QColor("#26a69a"),
+        "Cancelled": QColor("#ef5350"),
+        "Submitted": QColor("#ffb74d"),
+        "PreSubmitted": QColor("#ffb74d"),
+    }
+    _SELL_COLOR = QColor("#ef5350")
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._orders: List[OrderEvent] = []
+        self._pending: List[OrderEvent] = []   # Staged new orders (rows not yet inserted)
+        self._rows: Dict[int, int] = {}  # orderId -> row (including staged rows)
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orders)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section]
+        return None
+        
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        order = self._orders[index.row()]
+        column = index.column()
+        
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(order.order_id)
+            if column == 1:
+                return order.symbol
+            if column == 2:
+                return order.action
+            if column == 3:
+                return str(int(order.quantity))
+            if column == 4:
+                return order.order_type
+            if column == 5:
+                return order.status
+        elif role == self.SORT_ROLE:
+            if column == 0:
+                return order.order_id
+            if column == 3:
+                return float(order.quantity)
+            return self.data(index, Qt.DisplayRole)
+        elif role == Qt.ForegroundRole:
+            if column == 2:
+                return self._SIDE_COLORS.get(order.action, self._SELL_COLOR)
+            if column == 5:
+                return self._STATUS_COLORS.get(order.status)
+        return None
+        
+    def upsert_order(self, order: OrderEvent) -> bool:
+        """
+        Add a new order or replace an existing one.
+        
+        Returns:
+            True if the order is new and waits in `commit_pending()`
+        """
+        order_id = order.order_id
+        row = self._rows.get(order_id)
+        if row is None:
+            self._rows[order_id] = len(self._orders) + len(self._pending)
+            self._pending.append(order)
+            return True
+        previous = self._order_at(row)
+        if previous.filled > order.filled:
+            order = replace(order, filled=previous.filled)  # openOrder may lag orderStatus
+        self._set_order_at(row, order)
+        self._emit_row_changed(row)
+        return False
+        
+    def commit_pending(self):
+        """Insert all staged orders as one block of rows."""
+        if not self._pending:
+            return
+        first = len(self._orders)
+        self.beginInsertRows(QModelIndex(), first, first + len(self._pending) - 1)
+        self._orders.extend(self._pending)
+        self._pending = []
+        self.endInsertRows()
+        
+    def update_status(self, status: OrderStatusEvent) -> bool:
+        """
+        Apply an order status update.
+        
+        Returns:
+            True if the order is known
+        """
+        row = self._rows.get(status.order_id)
+        if row is None:
+            return False
+        order = replace(self._order_at(row), status=status.status, filled=status.filled)
+        self._set_order_at(row, order)
+        self._emit_row_changed(row)
+        return True
+        
+    def clear(self):
+        """Remove all orders."""
+        self.beginResetModel()
+        self._orders.clear()
+        self._pending.clear()
+        self._rows.clear()
+        self.endResetModel()
+        
+    def order(self, order_id: int) -> Optional[OrderEvent]:
+        """Get order data by orderId (None if unknown)."""
+        row = self._rows.get(order_id)
+        return None if row is None else self._order_at(row)
+        
+    @property
+    def total_count(self) -> int:
+        """Number of orders including staged ones."""
+        return len(self._orders) + len(self._pending)
+        
+    def _order_at(self, row: int) -> OrderEvent:
+        if row < len(self._orders):
+            return self._orders[row]
+        return self._pending[row - len(self._orders)]
+        
+    def _set_order_at(self, row: int, order: OrderEvent):
+        if row < len(self._orders):
+            self._orders[row] = order
+        else:
+            self._pending[row - len(self._orders)] = order
+        
+    def _emit_row_changed(self, row: int):
+        if row >= len(self._orders):
+            return  # Staged row, not visible yet
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.COLUMNS) - 1)
+        )
 
 
 class OrderTable(QWidget):
     """
     Table showing orders with status.
     
-    Displays order ID, symbol, side, quantity, type, status.
+    Displays order ID, symbol, side, quantity, type, status. Backed by an
+    OrderTableModel with a sort/filter proxy in front of the view.
     """
     
     # Signals
@@ -27,7 +188,8 @@ class OrderTable(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("orderTable")
-        self._orders = {}  # orderId -> order data
+        self._model = OrderTableModel(self)
+        self._scheduler = None
         self._setup_ui()
         
     def _setup_ui(self):
@@ -42,6 +204,21 @@ class OrderTable(QWidget):
         header.addWidget(self._title)
         header.addStretch()
         
+        # Filter
+        self._filter_edit = QLineEdit()
+        self._filter_edit.setPlaceholderText("Filter orders...")
+        self._filter_edit.setStyleSheet("""
+            QLineEdit {
+                background: rgba(255, 255, 255, 10);
+                color: white;
+                border: 1px solid rgba(255, 255, 255, 30);
+                border-radius: 4px;
+                padding: 4px 8px;
+                min-width: 120px;
+            }
+        """)
+        header.addWidget(self._filter_edit)
+        
         self._cancel_all_btn = QPushButton("Cancel All")
         self._cancel_all_btn.setStyleSheet("""
             QPushButton {
@@ -60,23 +237,28 @@ class OrderTable(QWidget):
         header.addWidget(self._cancel_all_btn)
         layout.addLayout(header)
         
+        # Sort/filter proxy
+        self._proxy = QSortFilterProxyModel(self)
+        self._proxy.setSourceModel(self._model)
+        self._proxy.setSortRole(OrderTableModel.SORT_ROLE)
+        self._proxy.setFilterKeyColumn(-1)  # Match any column
+        self._proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self._filter_edit.textChanged.connect(self._on_filter_changed)
+        
         # Table
-        self._table = QTableWidget()
-        self._table.setColumnCount(6)
-        self._table.setHorizontalHeaderLabels([
-            "Order ID", "Symbol", "Side", "Qty", "Type", "Status"
-        ])
+        self._table = QTableView()
+        self._table.setModel(self._proxy)
         
         # Style
         self._table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background: rgba(30, 30, 46, 200);
                 color: #ddd;
                 border: 1px solid rgba(255, 255, 255, 20);
                 border-radius: 4px;
                 gridline-color: rgba(255, 255, 255, 30);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
             QHeaderView::section {
@@ -90,73 +272,73 @@ class OrderTable(QWidget):
         
         self._table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self._table.verticalHeader().setVisible(False)
-        self._table.setSelectionBehavior(QTableWidget.SelectRows)
-        self._table.setEditTriggers(QTableWidget.NoEditTriggers)
+        # Fixed row height keeps scrolling O(visible rows) with large histories
+        self._table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self._table.verticalHeader().setDefaultSectionSize(28)
+        self._table.setSelectionBehavior(QTableView.SelectRows)
+        self._table.setEditTriggers(QTableView.NoEditTriggers)
+        # Start in arrival order; sorting kicks in once a header is clicked
+        self._table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self._table.setSortingEnabled(True)
         
         layout.addWidget(self._table)
         
-    @Slot(dict)
-    def add_order(self, order: Dict):
+    def set_update_scheduler(self, scheduler):
         """
-        Add or update an order.
+        Defer header refreshes to a shared UpdateScheduler.
         
         Args:
-            order: Order dict with orderId, symbol, action, quantity, orderType, status
+            scheduler: UpdateScheduler instance, or None to refresh immediately
         """
-        order_id = order["orderId"]
-        self._orders[order_id] = order
-        self._refresh_table()
+        self._scheduler = scheduler
         
-    @Slot(dict)
-    def update_order_status(self, status: Dict):
+    @property
+    def model(self) -> OrderTableModel:
+        """Get the underlying order model."""
+        return self._model
+        
+    @Slot(object)
+    def add_order(self, order: OrderEvent):
         """
-        Update order status.
+        Add or update an order.
         
         Args:
-            status: Status dict with orderId, status, filled, remaining
+            order: OrderEvent from the bridge
         """
-        order_id = status["orderId"]
-        if order_id in self._orders:
-            self._orders[order_id]["status"] = status["status"]
-            self._orders[order_id]["filled"] = status.get("filled", 0)
-            self._refresh_table()
+        if self._model.upsert_order(order):
+            schedule_flush(self._scheduler, self._flush_pending)
             
+    @Slot(object)
+    def update_order_status(self, status: OrderStatusEvent):
+        """
+        Update order status.
+        
+        Args:
+            status: OrderStatusEvent from the bridge
+        """
+        self._model.update_status(status)
+        
     @Slot()
     def clear_orders(self):
         """Clear all orders."""
-        self._orders.clear()
-        self._refresh_table()
+        self._model.clear()
+        self._refresh_title()
         
-    def _refresh_table(self):
-        """Refresh the table from orders data."""
-        orders = list(self._orders.values())
+    def _flush_pending(self):
+        """Insert orders received since the last frame."""
+        self._model.commit_pending()
+        self._refresh_title()
         
-        self._title.setText(f"Orders ({len(orders)})")
-        self._table.setRowCount(len(orders))
+    @Slot(str)
+    def _on_filter_changed(self, text: str):
+        self._proxy.setFilterFixedString(text)
+        self._refresh_title()
         
-        for row, order in enumerate(orders):
-            self._table.setItem(row, 0, QTableWidgetItem(str(order["orderId"])))
-            self._table.setItem(row, 1, QTableWidgetItem(order["symbol"]))
-            
-            # Side with color
-            side = order["action"]
-            side_item = QTableWidgetItem(side)
-            if side == "BUY":
-                side_item.setForeground(QColor("#26a69a"))
-            else:
-                side_item.setForeground(QColor("#ef5350"))
-            self._table.setItem(row, 2, side_item)
-            
-            self._table.setItem(row, 3, QTableWidgetItem(str(int(order["quantity"]))))
-            self._table.setItem(row, 4, QTableWidgetItem(order["orderType"]))
-            
-            # Status with color
-            status = order["status"]
-            status_item = QTableWidgetItem(status)
-            if status == "Filled":
-                status_item.setForeground(QColor("#26a69a"))
-            elif status == "Cancelled":
-                status_item.setForeground(QColor("#ef5350"))
-            elif status in ["Submitted", "PreSubmitted"]:
-                status_item.setForeground(QColor("#ffb74d"))
-            self._table.setItem(row, 5, status_item)
+    def _refresh_title(self):
+        """Refresh the header with visible/total order counts."""
+        total = self._model.rowCount()
+        visible = self._proxy.rowCount()
+        if visible == total:
+            self._title.setText(f"Orders ({total})")
+        else:
+            self._title.setText(f"Orders ({visible}/{total})")
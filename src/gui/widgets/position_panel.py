@@ -11,6 +11,9 @@ from PySide6.QtCore import Qt, Signal, Slot
 from PySide6.QtGui import QColor
 from typing import List, Dict
 
+from src.core.events import PositionEvent
+from src.gui.update_scheduler import schedule_flush
+
 
 class PositionPanel(QWidget):
     """
@@ -22,7 +25,8 @@ class PositionPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setObjectName("positionPanel")
-        self._positions = {}  # symbol -> position data
+        self._positions: Dict[str, PositionEvent] = {}  # symbol -> latest position
+        self._scheduler = None
         self._setup_ui()
         
     def _setup_ui(self):
@@ -70,35 +74,43 @@ class PositionPanel(QWidget):
         
         layout.addWidget(self._table)
         
-    @Slot(dict)
-    def add_position(self, position: Dict):
+    def set_update_scheduler(self, scheduler):
+        """
+        Defer table refreshes to a shared UpdateScheduler.
+        
+        Args:
+            scheduler: UpdateScheduler instance, or None to refresh immediately
+        """
+        self._scheduler = scheduler
+        
+    @Slot(object)
+    def add_position(self, position: PositionEvent):
         """
         Add or update a position.
         
         Args:
-            position: Position dict with symbol, position, avgCost
+            position: PositionEvent from the bridge
         """
-        symbol = position["symbol"]
-        self._positions[symbol] = position
-        self._refresh_table()
+        self._positions[position.symbol] = position
+        schedule_flush(self._scheduler, self._refresh_table)
         
     @Slot()
     def clear_positions(self):
         """Clear all positions."""
         self._positions.clear()
-        self._refresh_table()
+        schedule_flush(self._scheduler, self._refresh_table)
         
     def _refresh_table(self):
         """Refresh the table from positions data."""
-        positions = [p for p in self._positions.values() if p["position"] != 0]
+        positions = [p for p in self._positions.values() if p.position != 0]
         
         self._title.setText(f"Positions ({len(positions)})")
         self._table.setRowCount(len(positions))
         
         for row, pos in enumerate(positions):
-            symbol = pos["symbol"]
-            qty = pos["position"]
-            avg_cost = pos["avgCost"]
+            symbol = pos.symbol
+            qty = pos.position
+            avg_cost = pos.avg_cost
             value = abs(qty * avg_cost)
             
             self._table.setItem(row, 0, QTableWidgetItem(symbol))
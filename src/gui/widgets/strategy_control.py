@@ -9,6 +9,10 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, Slot
 
+from src.core.logger import get_logger
+
+log = get_logger("strategy")
+
 
 class StrategyControl(QWidget):
     """
@@ -147,7 +151,7 @@ class StrategyControl(QWidget):
     def _on_start_clicked(self):
         """Handle start button click."""
         strategy_name = self._strategy_combo.currentText()
-        print(f"[Strategy] Starting: {strategy_name}")
+        log.info("Starting: %s", strategy_name)
         
         self._strategy_running = True
         self._update_ui_state()
@@ -156,7 +160,7 @@ class StrategyControl(QWidget):
     def _on_stop_clicked(self):
         """Handle stop button click."""
         strategy_name = self._strategy_combo.currentText()
-        print(f"[Strategy] Stopping: {strategy_name}")
+        log.info("Stopping: %s", strategy_name)
         
         self._strategy_running = False
         self._update_ui_state()
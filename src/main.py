@@ -1,3 +1,4 @@
+import asyncio
 import sys
 import os
 
@@ -9,10 +10,21 @@ if project_root not in sys.path:
 from PySide6.QtWidgets import QApplication
 from qfluentwidgets import setTheme, Theme
 from gui.mainwindow import TradingMainWindow
+from src.core.logger import setup_logging
 
 def main():
+    # Queue-based logging (per-category levels via QS_LOG_LEVELS)
+    setup_logging()
+    
     app = QApplication(sys.argv)
     
+    # USE_ASYNC_IB=1 reads the TWS socket with asyncio, so run Qt through qasync
+    loop = None
+    if os.environ.get("USE_ASYNC_IB", "0") == "1":
+        import qasync
+        loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(loop)
+    
     # Set Theme (Auto sync with system)
     setTheme(Theme.AUTO)
     
@@ -20,6 +32,10 @@ def main():
     w = TradingMainWindow()
     w.show()
     
+    if loop is not None:
+        with loop:
+            loop.run_forever()
+        sys.exit(0)
     sys.exit(app.exec())
 
 if __name__ == '__main__':
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Add project root to python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from src.core.bar_store import BAR_DTYPE, BarStore
+
+DAY = 86400
+T0 = 1_700_006_400  # A UTC midnight
+
+
+@pytest.mark.parametrize("gap, duration", [
+    (DAY, "86400 S"),
+    (DAY + 1, "2 D"),
+    (365 * DAY, "365 D"),
+    (365 * DAY + 1, "2 Y"),
+    (3 * 365 * DAY, "3 Y"),
+])
+def test_missing_duration_units(tmp_path, gap, duration):
+    store = BarStore(tmp_path)
+    bars = np.zeros(1, dtype=BAR_DTYPE)
+    bars["time"] = T0
+    store.merge("AAPL", "1 day", "TRADES", bars, synced=False)
+    # The window reaches back to the start of the last cached (daily) bar
+    now = T0 + gap - DAY
+    assert store.missing_duration("AAPL", "1 day", "TRADES", now=now) == duration
@@ -0,0 +1,35 @@
+from PySide6.QtCore import QObject, Signal
+
+from src.core.contract_cache import ContractCache, ContractResolutionError
+
+
+class FakeBridge(QObject):
+    contract_details_received = Signal(int, object)
+    contract_details_end = Signal(int)
+    request_error = Signal(int, int, str)
+    connected = Signal()
+    disconnected = Signal()
+
+    is_connected = True
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def request_contract_details(self, symbol, req_id):
+        self.sent.append(req_id)
+        return req_id
+
+
+def test_only_warning_codes_keep_the_request(tmp_path):
+    bridge = FakeBridge()
+    cache = ContractCache(bridge, path=tmp_path / "contracts.json")
+    future = cache.resolve("AAPL")
+    req_id = bridge.sent[0]
+
+    bridge.request_error.emit(req_id, 2158, "Sec-def data farm connection is OK")
+    assert not future.done()
+
+    bridge.request_error.emit(req_id, 10197, "No market data during competing live session")
+    assert isinstance(future.exception(0), ContractResolutionError)
+    assert future.exception(0).code == 10197
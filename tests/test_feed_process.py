@@ -0,0 +1,123 @@
+import queue
+
+import pytest
+
+from src.core.feed_process import FeedClient, FeedProcessBridge
+
+
+class Recorder:
+    """Stands in for the replay client and records every callback."""
+
+    _connected = False
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+
+class FakeProcess:
+    alive = True
+    exitcode = 0
+
+    def __init__(self):
+        self.signals = []
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.signals.append("terminate")
+
+    def kill(self):
+        self.signals.append("kill")
+
+
+@pytest.fixture
+def feed():
+    bridge = FeedProcessBridge(ring_capacity=8)
+    events = queue.Queue()
+    bridge._events = events
+    bridge._replay = Recorder()
+    bridge._process = FakeProcess()
+    yield bridge, FeedClient(bridge._ring, events)
+    bridge._process = None
+    bridge.close()
+
+
+def errors(recorder):
+    return [args[0] for name, args in recorder.calls if name == "error"]
+
+
+def test_event_order_survives_ring_overrun(feed):
+    bridge, client = feed
+    client.error(1, 200, "first")
+    bridge._poll()
+    for i in range(2, 5):
+        client.error(i, 200, "overrun")
+        for _ in range(10):  # Laps the 8-record ring: the EVENT records are lost
+            client.tickPrice(1, 4, 100.0, None)
+    client.error(5, 200, "after")
+    bridge._poll()
+
+    assert bridge._ring.stats["lost"] > 0
+    assert errors(bridge._replay) == [1, 2, 3, 4, 5]
+    assert not bridge._event_items
+
+    client.error(6, 200, "next")
+    bridge._poll()
+    assert errors(bridge._replay) == [1, 2, 3, 4, 5, 6]
+
+
+def test_records_wait_for_their_event(feed):
+    bridge, client = feed
+    client.tickPrice(1, 4, 100.0, None)
+    bridge._ring.write(15, 0)  # EVENT record whose queue item is still in transit
+    client.tickPrice(1, 4, 101.0, None)
+    bridge._poll()
+    assert [name for name, _ in bridge._replay.calls] == ["tickPrice"]
+
+    bridge._events.put((0, "error", (7, 200, "late")))
+    client._event_seq = 1
+    bridge._poll()
+    assert [name for name, _ in bridge._replay.calls] == ["tickPrice", "error", "tickPrice"]
+
+
+def test_lost_events_replayed_when_the_process_ends(feed):
+    bridge, client = feed
+    replay = bridge._replay
+    client.error(1, 200, "lost")
+    for _ in range(10):
+        client.tickPrice(1, 4, 100.0, None)
+    bridge._poll()
+    assert errors(replay) == []  # No later EVENT record says it was lost yet
+
+    bridge._process.alive = False
+    bridge._poll()
+    assert errors(replay) == [1]
+    assert bridge._replay is None
+
+
+def test_reconnect_never_waits_for_a_stuck_process(feed, monkeypatch):
+    bridge, _ = feed
+    clock = [0.0]
+    monkeypatch.setattr("src.core.feed_process.time.monotonic", lambda: clock[0])
+    started = []
+    monkeypatch.setattr(bridge, "_start_process", lambda *args: started.append(args))
+    old = bridge._process
+
+    client = bridge._start_client("127.0.0.1", 7497, 1)
+    assert not started and bridge._starting[0] is client
+
+    clock[0] += bridge.STOP_TIMEOUT
+    bridge._poll()
+    assert old.signals == ["terminate"]
+    clock[0] += bridge.STOP_TIMEOUT
+    bridge._poll()
+    assert old.signals == ["terminate", "kill"]
+    assert not started
+
+    old.alive = False
+    bridge._poll()
+    assert started == [(client, "127.0.0.1", 7497, 1)]
@@ -0,0 +1,43 @@
+import pytest
+from PySide6.QtCore import QObject, Signal
+
+from src.core.history_scheduler import HistoryRequest, HistoryScheduler, PRIORITY_NORMAL
+from src.core.pacing import PacingLimiter
+
+
+class FakeBridge(QObject):
+    historical_bars_received = Signal(int, object, bool)
+    request_error = Signal(int, int, str)
+    connected = Signal()
+    disconnected = Signal()
+
+    is_connected = True
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def request_historical_data(self, symbol, req_id, *args):
+        self.sent.append((symbol, req_id))
+        return req_id
+
+    def cancel_historical_data(self, req_id):
+        pass
+
+
+def test_requeue_jobs_of_same_priority():
+    clock = [0.0]
+    bridge = FakeBridge()
+    scheduler = HistoryScheduler(bridge, limiter=PacingLimiter(clock=lambda: clock[0]))
+    jobs = [scheduler.submit(HistoryRequest(f"SYM{i}"), PRIORITY_NORMAL) for i in range(4)]
+    scheduler._dispatch()
+    assert len(bridge.sent) == 4
+
+    scheduler._on_disconnected()  # Requeues all four at the front
+    assert all(job.req_id is None for job in jobs)
+    assert scheduler.queued_count == 4
+
+    clock[0] += 20.0  # Past the identical-request interval
+    scheduler._dispatch()
+    assert len(bridge.sent) == 8
+    assert all(job.req_id is not None for job in jobs)
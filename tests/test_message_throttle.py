@@ -0,0 +1,52 @@
+import threading
+
+import pytest
+
+from src.core.pacing import MSG_PRIORITY_NORMAL, MessageThrottle
+
+
+def make_throttle(rate=10, burst=3):
+    clock = [0.0]
+    return MessageThrottle(rate=rate, burst=burst, clock=lambda: clock[0]), clock
+
+
+def test_send_runs_outside_the_lock():
+    throttle, _ = make_throttle()
+    seen = []
+
+    def send(msg):
+        # Another thread can read the throttle while a send is in progress
+        reader = threading.Thread(target=lambda: seen.append(throttle.stats["queued"]))
+        reader.start()
+        reader.join(1.0)
+        assert not reader.is_alive()
+
+    assert throttle.submit("a", send, MSG_PRIORITY_NORMAL)
+    assert seen == [0]
+
+
+def test_failed_send_restores_the_rest():
+    throttle, clock = make_throttle(burst=1)
+    sent = []
+
+    def send(msg):
+        if msg == "bad":
+            raise OSError("socket closed")
+        sent.append(msg)
+
+    throttle.submit("first", send, MSG_PRIORITY_NORMAL)
+    for msg in ("bad", "b", "c"):
+        assert not throttle.submit(msg, send, MSG_PRIORITY_NORMAL)
+
+    clock[0] += 0.35  # Tokens for three messages, capped by the burst of one
+    with pytest.raises(OSError):
+        throttle.drain()
+    assert throttle.queued == 2
+    assert throttle.stats["failed"] == 1
+
+    clock[0] += 0.2
+    assert throttle.drain() == 1
+    clock[0] += 0.2
+    assert throttle.drain() == 1
+    assert sent == ["first", "b", "c"]
+    assert throttle.stats["sent"] == 3
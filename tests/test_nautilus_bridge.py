@@ -0,0 +1,21 @@
+from src.core.contract_cache import ContractCache, ContractResolutionError
+from src.core.nautilus_bridge import UNSUPPORTED_ERROR, NautilusBridge
+
+
+def test_unsupported_requests_fail_fast(app, tmp_path):
+    bridge = NautilusBridge()
+    bridge._is_connected = True
+    cache = ContractCache(bridge, path=tmp_path / "contracts.json")
+    future = cache.resolve("AAPL")
+    app.processEvents()
+    assert isinstance(future.exception(0), ContractResolutionError)
+    assert future.exception(0).code == UNSUPPORTED_ERROR
+
+
+def test_cancel_order_reports_an_order_error(app):
+    bridge = NautilusBridge()
+    errors = []
+    bridge.order_error.connect(lambda *args: errors.append(args[:2]))
+    bridge.cancel_order(100_001)
+    app.processEvents()
+    assert errors == [(100_001, UNSUPPORTED_ERROR)]
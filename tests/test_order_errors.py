@@ -0,0 +1,24 @@
+from src.core.ibkr_bridge import IBKRBridge, IBKRClient
+from src.core.req_ids import ORDER_ID_FLOOR
+
+
+def test_order_ids_start_above_req_ids():
+    client = IBKRClient(IBKRBridge())
+    client.nextValidId(1)
+    assert client.allocate_order_ids(2) == ORDER_ID_FLOOR
+    assert client.allocate_order_ids(1) == ORDER_ID_FLOOR + 2
+
+
+def test_errors_routed_by_id(app):
+    bridge = IBKRBridge()
+    client = IBKRClient(bridge)
+    request_errors, order_errors = [], []
+    bridge.request_error.connect(lambda *args: request_errors.append(args))
+    bridge.order_error.connect(lambda *args: order_errors.append(args))
+
+    client.error(1_000, 200, "No security definition")
+    client.error(ORDER_ID_FLOOR + 5, 201, "Order rejected")
+    app.processEvents()
+
+    assert request_errors == [(1_000, 200, "No security definition")]
+    assert order_errors == [(ORDER_ID_FLOOR + 5, 201, "Order rejected")]
@@ -0,0 +1,17 @@
+import pytest
+
+from src.core.req_ids import ReqIdRange
+
+
+def test_wraps_and_skips_live_ids():
+    ids = ReqIdRange(100, 3)
+    assert [ids.next(), ids.next(), ids.next()] == [100, 101, 102]
+    assert ids.next(live={100}) == 101
+    assert ids.next(live={102, 100}) == 101
+    assert 103 not in ids
+
+
+def test_exhausted_range_raises():
+    ids = ReqIdRange(100, 2)
+    with pytest.raises(RuntimeError):
+        ids.next(live={100, 101})
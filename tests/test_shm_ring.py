@@ -0,0 +1,23 @@
+import pytest
+
+from src.core.shm_ring import ShmRing
+
+
+@pytest.fixture
+def ring():
+    ring = ShmRing.create(capacity=8)
+    yield ring
+    ring.close()
+
+
+def test_text_cut_on_character_boundary(ring):
+    ring.write(1, text="a" + "é" * 40)  # 81 UTF-8 bytes; byte 60 is mid-character
+    record = ring.read()[0]
+    decoded = record["text"].decode()
+    assert decoded == "a" + "é" * 29
+    assert len(decoded.encode()) <= 60
+
+
+def test_short_text_unchanged(ring):
+    ring.write(1, text="NASDAQ")
+    assert ring.read()[0]["text"].decode() == "NASDAQ"
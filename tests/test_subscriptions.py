@@ -0,0 +1,43 @@
+from PySide6.QtCore import QObject, Signal
+
+from src.core.subscriptions import ACTIVE, SubscriptionManager
+
+
+class FakeBridge(QObject):
+    ticks_received = Signal(object)
+    request_error = Signal(int, int, str)
+    connected = Signal()
+    disconnected = Signal()
+
+    is_connected = True
+
+    def subscribe_market_data(self, symbol, req_id):
+        return req_id
+
+    def unsubscribe_market_data(self, req_id):
+        pass
+
+
+def subscribe(manager, symbol):
+    manager.subscribe(symbol, lambda symbol, tick: None)
+    return manager.req_id_for(symbol)
+
+
+def test_warnings_keep_the_line():
+    bridge = FakeBridge()
+    manager = SubscriptionManager(bridge)
+    req_id = subscribe(manager, "AAPL")
+    bridge.request_error.emit(req_id, 10167, "Displaying delayed market data")
+    assert manager.subscription("AAPL").state == ACTIVE
+
+
+def test_fatal_10xxx_codes_fail_the_line():
+    bridge = FakeBridge()
+    manager = SubscriptionManager(bridge)
+    failed = []
+    manager.subscription_failed.connect(lambda *args: failed.append(args))
+    req_id = subscribe(manager, "AAPL")
+    bridge.request_error.emit(req_id, 10168, "Requested market data is not subscribed")
+    assert manager.subscription("AAPL") is None
+    assert manager.stats["lines_used"] == 0
+    assert failed == [("AAPL", 10168, "Requested market data is not subscribed")]
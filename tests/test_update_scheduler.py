@@ -0,0 +1,13 @@
+import pytest
+
+from src.gui.update_scheduler import UpdateScheduler
+
+
+@pytest.mark.parametrize("fps", [0, -5])
+def test_rejects_non_positive_fps(fps):
+    with pytest.raises(ValueError):
+        UpdateScheduler(fps)
+    scheduler = UpdateScheduler(30)
+    with pytest.raises(ValueError):
+        scheduler.set_fps(fps)
+    assert scheduler.fps == pytest.approx(1000 / 33)